@@ -1,15 +1,24 @@
-import pandas as pd
 import os
 import openpyxl
 import copy
-from openpyxl.styles import Font, Alignment, PatternFill, Color, Border, Side, numbers
+import pandas as pd
+from openpyxl.styles import Color
 from openpyxl.drawing.image import Image
 from openpyxl.utils import cell as ce
 from openpyxl.utils.units import points_to_pixels as f2p
 from openpyxl.drawing.spreadsheet_drawing import OneCellAnchor, AnchorMarker
 from openpyxl.drawing.xdr import XDRPoint2D, XDRPositiveSize2D
 from openpyxl.utils.units import pixels_to_EMU as p2e
-from tqdm import tqdm
+from io import BytesIO
+from survey_data import PreprocessedSurvey
+from scoring import get_scores
+from snapshot import read_excel
+from heatmap import HeatmapPalette
+from batch import run_batch, leader_jobs, print_timings
+from streaming import StreamingWorkbook
+from report_styles import ReportStyles, is_tested_openpyxl
+from report_template import SheetTemplate
+from instrumentation import progress, set_progress, phase, start_trace, trace_job, print_trace_summary, TRACE_FILE
 
 class DemographicFileMaker:
 
@@ -28,6 +37,7 @@ class DemographicFileMaker:
         self.output_source = args['output_folder']
         self.input_source = args['input_folder']
         self.how2use_file = args['how to use']
+        self.streaming = args.get('streaming', True) and is_tested_openpyxl()
         
         self.performance_order = [
             "Exceptional",
@@ -37,34 +47,50 @@ class DemographicFileMaker:
             "On Leave",
             "No Rating",
         ]
+
+        self.survey = None
+        self._templates = {}
     
     def setLeader(self, id, GM=False):
         self._leader_id = id
         self.GM = GM
 
-        self._leader_id = 112372
-        self.GM = False
+    def setSurvey(self, survey):
+        self.survey = survey
+
+    def getSurvey(self):
+        ## build the leader-independent state once, unless it is shared by another maker.
+        if self.survey is None:
+            self.survey = PreprocessedSurvey(self.origin_raw_data_pd, self.origin_raw_data_past_pd, self.item_code_pd,
+                self.origin_category_pd, self.origin_demographics_pd, self.demographics_past_pd)
+        return self.survey
 
     def readAllFiles(self):
         ## read files and save it in object data.
-        self.origin_raw_data_pd = pd.read_excel(self.input_source + "/" + self.raw_data_file, engine="openpyxl")
-        self.origin_raw_data_past_pd = pd.read_excel(self.input_source + "/" + self.raw_data_past_file, engine="openpyxl")
-        self.item_code_pd = pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="ItemCodeSTAR")
-        self.origin_category_pd =  pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="CurrentCategorySTAR")
-        self.origin_demographics_pd = pd.read_excel(self.input_source + "/" + self.demographics_file, engine="openpyxl")
-        self.demographics_past_pd = pd.read_excel(self.input_source + "/" + self.demographics_past_file, engine="openpyxl")
-        self.heatmap_color_pd = pd.read_excel(self.input_source + "/" + self.heatmap_color_file, engine="openpyxl")
-        self.benchmark_pd = pd.read_excel(self.input_source + "/" + self.benchmark_file, engine="openpyxl")
-        self.leaders = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Leader")
-        self.GMs = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="GM")
-        self.how2use_pd = pd.read_excel(self.input_source + "/" + self.how2use_file, engine="openpyxl", sheet_name="Demographic Trends How to Use")
+        self.origin_raw_data_pd = read_excel(self.input_source + "/" + self.raw_data_file, engine="openpyxl")
+        self.origin_raw_data_past_pd = read_excel(self.input_source + "/" + self.raw_data_past_file, engine="openpyxl")
+        self.item_code_pd = read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="ItemCodeSTAR")
+        self.origin_category_pd = read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="CurrentCategorySTAR")
+        self.origin_demographics_pd = read_excel(self.input_source + "/" + self.demographics_file, engine="openpyxl")
+        self.demographics_past_pd = read_excel(self.input_source + "/" + self.demographics_past_file, engine="openpyxl")
+        with open(self.input_source + "/" + self.image_src, "rb") as file:
+            self.logo = file.read()
+        self.heatmap_palette = HeatmapPalette(read_excel(self.input_source + "/" + self.heatmap_color_file, engine="openpyxl"))
+        self.benchmark_pd = read_excel(self.input_source + "/" + self.benchmark_file, engine="openpyxl")
+        self.leaders = read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Leader")
+        self.GMs = read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="GM")
+        self.how2use_pd = read_excel(self.input_source + "/" + self.how2use_file, engine="openpyxl", sheet_name="Demographic Trends How to Use")
 
 
     def calculateValues(self):
         
         ## do some process referred to individual leader ID.
-        self._preProcess()
-        self._prepareColumnsForID()
+        with phase("DemographicFileMaker", "_preProcess"):
+            self._preProcess()
+        with phase("DemographicFileMaker", "_prepareColumnsForID"):
+            _ = self._prepareColumnsForID()
+        if _:
+            return _
 
         item_list = []
         item_dict = {}
@@ -75,7 +101,7 @@ class DemographicFileMaker:
             category_list.append(key)
             item_list.append([0, key])
             temp_list = []
-            for item in self.category_pd.iloc[self._group_dict[key], 0]:
+            for item in self._catalog.getItemIds(key):
                 item_list.append([1, item])
                 temp_list.append(item)
             item_dict.update({key:temp_list})
@@ -83,14 +109,15 @@ class DemographicFileMaker:
         self._item_list = item_list
 
         ## do main calculation process by iterating over the category list.
-        for category in tqdm(category_list, desc="iterating over the list of category"):
-            sub_id_list = item_dict[category]
+        with phase("DemographicFileMaker", "_calculateEachRow"):
+            for category in progress(category_list, desc="iterating over the list of category"):
+                sub_id_list = item_dict[category]
 
-            ## filter the source data frame to have columns belonged to each category.
-            self._filterResource(sub_id_list)
+                ## filter the source data frame to have columns belonged to each category.
+                self._filterResource(sub_id_list)
 
-            ## based on the filtered source, calculate the values for each row.
-            self._calculateEachRow(category)
+                ## based on the filtered source, calculate the values for each row.
+                self._calculateEachRow(category)
        
     def writeOutput(self):
 
@@ -108,7 +135,8 @@ class DemographicFileMaker:
         os.makedirs(self.output_source + self.output_path, exist_ok=True)
 
         ## and write the output file.
-        self.book.save(path)
+        with phase("DemographicFileMaker", "save"):
+            self.book.save(path)
 
     def makeReport(self):
 
@@ -134,7 +162,7 @@ class DemographicFileMaker:
             "\n" + f"{self._participated:,d}" + ' / ' + f"{self._invited:,d}" + "\n" + "(Participated / Invited)"
 
         ## prepare image.
-        img  = Image(self.input_source + "/" + self.image_src)
+        img  = Image(BytesIO(self.logo))
         img.height = 90
         img.width = 110
 
@@ -142,25 +170,12 @@ class DemographicFileMaker:
         total_rows = 4 + len(self._item_list)
 
         ## make a workbook and sheet.
-        self.book = openpyxl.Workbook()
+        self.book = StreamingWorkbook() if self.streaming else openpyxl.Workbook()
         sheet = self.book.active
         sheet.title = "Demographic Trends"
 
         ## set styles like font, color, direction, border...
-        ft = Font(name="Arial", size=8)
-        ft_bold = Font(name="Arial", size=8, bold=True)
-        light_na_font = Font(name="Arial", size=8, color="999999")
-        bold_na_font = Font(name="Arial", size=8, color="999999", bold=True)
-        vertical = Alignment(textRotation=90, horizontal='center')
-        center_alignment = Alignment(horizontal='center')
-        right_alignment = Alignment(horizontal='right', vertical='center')
-        grey_back = PatternFill("solid", fgColor="EEEEEE")
-        white_back = PatternFill("solid", fgColor="FFFFFF")
-        side = Side(style='thin', color="CCCCCC")
-        thin_border = Border(left=side,
-                     right=side,
-                     top=side,
-                     bottom=side)
+        styles = ReportStyles(self.book)
 
         ## merge all needed columns and rows.
         col_num = 1
@@ -173,7 +188,7 @@ class DemographicFileMaker:
                 delta += 1
             end_col = delta + col_num
             cell = sheet.cell(row=1, column=col_num)
-            cell.font = ft
+            styles.apply(cell, font=styles.font)
             cell.value = "" if key == "delta" else key
             sheet.merge_cells(start_row=1, start_column=col_num, end_row=2, end_column=end_col)
             col_num += delta + 2
@@ -184,12 +199,12 @@ class DemographicFileMaker:
         ## set empty cells white.
         for row in range(1, total_rows + 1 + 1):
             for col in range(1, col_num - 2 + 1 + 1):
-                sheet.cell(row=row, column=col).fill = white_back
+                styles.apply(sheet.cell(row=row, column=col), fill=styles.white_back)
 
         ## prepare the whole data to be placed in the sheet.
         len_sub_key = 0
         frames = []
-        for key in tqdm(self.precious_dict, desc="prepare the whole data"):
+        for key in progress(self.precious_dict, desc="prepare the whole data"):
             sub_dict = self.precious_dict[key]
             
             ## prepare and write the first column data.
@@ -201,20 +216,17 @@ class DemographicFileMaker:
                     if criteria == 0:
                         _list.append([item, 0])
                     elif criteria == 1:
-                        _list.append([self._item_pd[self._item_pd["Item ID"] == item]["Short Text [2020 onward]"].values[0], 1])
+                        _list.append([self._catalog.getText(item), 1])
                 
                 ## write the first column data and set styles.
                 for index, item in enumerate(_list):
                     cell = sheet.cell(row=3 + index, column=1)
                     if item[1] == 0:
-                        cell.font = ft_bold
+                        styles.apply(cell, font=styles.bold_font)
                     else:
-                        cell.font = ft
+                        styles.apply(cell, font=styles.font)
 
-                    cell.border = thin_border
-                    cell.fill = grey_back
-                    cell.alignment = right_alignment
-                    cell.alignment = cell.alignment.copy(horizontal="left")
+                    styles.apply(cell, border=styles.thin_border, fill=styles.grey_back, alignment=styles.left_alignment)
 
                     ## set value to cell.
                     cell.value = item[0]
@@ -259,8 +271,8 @@ class DemographicFileMaker:
                     for criteria, item in self._item_list:
                         origin_item = item
                         if criteria == 1:
-                            origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                            item = self._get_past_field_name_by_current_name(origin_item)
+                            origin_item = self._catalog.getCode(item)
+                            item = self._catalog.getPastCode(origin_item)
                         try:
                             _ = sub_item[item]
                             if _[0] != "N/A":
@@ -273,8 +285,8 @@ class DemographicFileMaker:
                     for criteria, item in self._item_list:
                         origin_item = item
                         if criteria == 1:
-                            origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                            item = self._get_benchmark_field_name_by_current_name(origin_item)
+                            origin_item = self._catalog.getCode(item)
+                            item = self._catalog.getBenchmarkCode(origin_item)
                         try:
                             _ = sub_item[item]
                             if _[0] != "N/A":
@@ -285,7 +297,7 @@ class DemographicFileMaker:
                 else:
                     for criteria, item in self._item_list:
                         if criteria == 1:
-                            item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
+                            item = self._catalog.getCode(item)
 
                         _list.append(sub_item[item])
                     
@@ -306,30 +318,27 @@ class DemographicFileMaker:
         gilead_org = frames[0]
 
         ## write the rest of the columns and set styles.
-        for col_index, column in enumerate(tqdm(frames, desc="formating and styling")):
+        for col_index, column in enumerate(progress(frames, desc="formating and styling")):
             for row_index, item in enumerate(column):
                 cell = sheet.cell(row=3 + row_index, column = get_column_number(2 + col_index))
 
                 ## set borders of all cells.
-                cell.border = thin_border
+                styles.apply(cell, border=styles.thin_border)
 
                 ## set background grey of the row->4.
                 if row_index == 1:
-                    cell.fill = grey_back
-                    cell.number_format = numbers.BUILTIN_FORMATS[3]
+                    styles.apply(cell, fill=styles.grey_back, number_format=styles.count_format)
 
                 ## if the cell is placed in category row, set bold font style. Otherwise set general font style.
                 if item[1] == 0:
-                    cell.font = ft_bold
+                    styles.apply(cell, font=styles.bold_font)
                 else:
-                    cell.font = ft
-                cell.alignment = right_alignment
+                    styles.apply(cell, font=styles.font)
+                styles.apply(cell, alignment=styles.right_alignment)
 
                 ## set corresponding styles to row->3
                 if item[1] == 2:
-                    cell.alignment = center_alignment
-                    cell.alignment = vertical
-                    cell.fill = grey_back
+                    styles.apply(cell, alignment=styles.vertical_alignment, fill=styles.grey_back)
                 
                 ## set value to cell.
                 cell.value = item[0]
@@ -337,20 +346,18 @@ class DemographicFileMaker:
                 ## make "N/A" cell lightgrey.
                 if row_index >= 1:
                     if item[0] == "N/A":
-                        cell.alignment = right_alignment
-                        cell.font = bold_na_font if item[1] == 0 else light_na_font
+                        styles.apply(cell, alignment=styles.right_alignment, font=styles.bold_na_font if item[1] == 0 else styles.na_font)
 
                 ## set background color and set format of percentage to rows below 5.
                 if row_index >= 2:
 
                     ## set format percentage.
-                    cell.number_format = numbers.FORMAT_PERCENTAGE
+                    styles.apply(cell, number_format=styles.percent_format)
 
                     ## compare the rest of the columns with your org and set background.
                     if col_index >= self.logic:
                         try:
-                            # cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(your_org[row_index][0], item[0])))
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(frames[self.logic - 1][row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(frames[self.logic - 1][row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -358,7 +365,7 @@ class DemographicFileMaker:
                     ## compare your org (2020) with parent org and set background.
                     elif col_index == self.logic - 1 and self.logic >= 2:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(frames[self.logic - 2][row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(frames[self.logic - 2][row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -366,7 +373,7 @@ class DemographicFileMaker:
                     ## compare parent org with gilead org and set background.
                     elif col_index == 1 and self.logic == 3:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(gilead_org[row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(gilead_org[row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -378,7 +385,7 @@ class DemographicFileMaker:
                         _ = 0
                     if col_index == self.logic + _ or col_index == self.logic + 1 + _:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(round(item[0] * 100)))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(round(item[0] * 100)))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -387,7 +394,7 @@ class DemographicFileMaker:
                     if column[0][0][0] == "Δ":
                         try:
                             if item[0] > 0:
-                                cell.number_format = "+0%"
+                                styles.apply(cell, number_format=styles.plus_format)
                         except:
                             pass
 
@@ -412,30 +419,36 @@ class DemographicFileMaker:
         sheet.freeze_panes = ce.get_column_letter(self.logic + 3) + '5'
 
         ## push content right in A3, A4.
-        sheet['A3'].alignment = right_alignment
-        sheet['A4'].alignment = right_alignment
+        styles.apply(sheet['A3'], alignment=styles.right_alignment)
+        styles.apply(sheet['A4'], alignment=styles.right_alignment)
 
         ## insert picture and set background white
-        sheet['A3'].fill = white_back
+        styles.apply(sheet['A3'], fill=styles.white_back)
         size = XDRPositiveSize2D(p2e(115), p2e(95))
         marker = AnchorMarker(col=0, colOff=p2e(0), row=2, rowOff=p2e(10))
         img.anchor = OneCellAnchor(_from=marker, ext=size)
         
-        sheet['A3'].alignment = sheet['A3'].alignment.copy(wrapText=True, vertical="bottom")
+        styles.apply(sheet['A3'], alignment=styles.picture_alignment)
         sheet.add_image(img)
     
-        how_sheet = self.book.create_sheet("How to Use")
-        cell = how_sheet.cell(column=1, row=1)
+        ## insert how to use sheet, copied from the template rendered once per run.
+        if "how to use" not in self._templates:
+            self._templates["how to use"] = SheetTemplate(self._makeHowToUse)
+        self._templates["how to use"].copyTo(self.book.create_sheet("How to Use"), styles)
+
+    def _makeHowToUse(self, sheet, styles):
+        ## the how to use sheet is the same for every leader.
+        cell = sheet.cell(column=1, row=1)
         cell.value = self.how2use_pd.columns.values[0]
-        cell.alignment = Alignment(wrapText=True)
-        how_sheet.row_dimensions[1].height = 40
+        styles.apply(cell, alignment=styles.wrap_alignment)
+        sheet.row_dimensions[1].height = 40
         for index in range(len(self.how2use_pd.index)):
-            cell = how_sheet.cell(column=1, row=2 + index)
+            cell = sheet.cell(column=1, row=2 + index)
             cell.value = self.how2use_pd.iloc[index, 0]
-            cell.alignment = Alignment(wrapText=True)
-            how_sheet.row_dimensions[index + 2].height = 40
+            styles.apply(cell, alignment=styles.wrap_alignment)
+            sheet.row_dimensions[index + 2].height = 40
 
-        how_sheet.column_dimensions["A"].width = 135
+        sheet.column_dimensions["A"].width = 135
 
     def _get_names_from_field(self, field_list):
 
@@ -445,10 +458,12 @@ class DemographicFileMaker:
 
     def _filterResource(self, id_list):
 
-        filter_item = self._item_pd[self._item_pd["Item ID"].isin(id_list)]["Unique Item Code"].tolist()
+        filter_item = self._catalog.getCodes(id_list)
 
         filter_item.insert(0, 'ExternalReference')
         self._filtered_raw_data = self.raw_data_pd[filter_item]
+        self._filtered_columns = self._filtered_raw_data.columns.values[1:]
+        self._filtered_values = self._filtered_raw_data.iloc[:, 1:].to_numpy()
 
         ## about history data.
         self._helper_past = False
@@ -457,13 +472,15 @@ class DemographicFileMaker:
             if index == 0:
                 filter_past_item.append(item)
             else:
-                new_item = self._get_past_field_name_by_current_name(item)
+                new_item = self._catalog.getPastCode(item)
                 if new_item != None:
                     filter_past_item.append(new_item)
                 else:
                     self._helper_past = True
         
         self._filtered_raw_past_data = self.raw_data_past_pd[filter_past_item]
+        self._filtered_past_columns = self._filtered_raw_past_data.columns.values[1:]
+        self._filtered_past_values = self._filtered_raw_past_data.iloc[:, 1:].to_numpy()
 
         ## about benchmark data.
         self._helper_benchmark = False
@@ -472,7 +489,7 @@ class DemographicFileMaker:
             if index == 0:
                 filter_benchmark_item.append(item)
             else:
-                new_item = self._get_benchmark_field_name_by_current_name(item)
+                new_item = self._catalog.getBenchmarkCode(item)
                 if new_item:
                     filter_benchmark_item.append(new_item)
                 else:
@@ -480,132 +497,30 @@ class DemographicFileMaker:
         
         self._filtered_benchmark_value = self.benchmark_pd[self.benchmark_pd["Unique Item Code"].isin(filter_benchmark_item)]
 
-    def _get_color(self, delta):
-        if abs(delta) > 25:
-            delta = delta // abs(delta) * 25
-        series = self.heatmap_color_pd[self.heatmap_color_pd["Delta"] == delta]
-        return str(hex(series["R"].values[0]))[2:] + str(hex(series["G"].values[0]))[2:] + str(hex(series["B"].values[0]))[2:]
 
     def _preProcess(self):
 
-        ## make a item group and filter the able source.
-        self._item_pd = self.item_code_pd[self.item_code_pd["Type ID"] == "T01"]
-
-        self._benchmark_item_pd = self._item_pd[self._item_pd["External Benchmark"] == "e"]
-        self._item_pd = self._item_pd[self._item_pd["External Benchmark"] == "i"]
-
-        self._rest_item_pd = self._item_pd[~self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._rest_item_pd = self._rest_item_pd[self._rest_item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-        self._both_item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-
-        self.category_pd = self.origin_category_pd[self.origin_category_pd["Item ID in 2020 Survey"].isin(self._item_pd["Item ID"].tolist())]
-        self.category_pd = self.category_pd.drop_duplicates(subset=["Item ID in 2020 Survey"]).reset_index(drop=True)
-        self.order_category = self.category_pd.drop_duplicates(subset=["2020 Category"]).loc[:, "2020 Category"].tolist()
-
-        self._group_dict = self.category_pd.groupby(["2020 Category"]).groups
-
-        self.raw_data_pd = self.origin_raw_data_pd.iloc[2:].reset_index(drop=True)
-
-        ## filter the able source from history file.
-        self.raw_data_past_pd = self.origin_raw_data_past_pd.iloc[2:].reset_index(drop=True)
-
-        ## Convert numeric values into favorable or not.
-        ## [1, 2, 3] -> 0, [4, 5] -> 1, [6, -99, ''] -> ''
-        for field in self._item_pd["Unique Item Code"]:
-            new_list = []
-            for item in self.raw_data_pd[field].tolist():
-                if item < 4 and item > 0:
-                    new_list.append(0)
-                elif item >= 4 and item <= 5:
-                    new_list.append(1)
-                else:
-                    new_list.append('')
-            self.raw_data_pd[field] = new_list
-            
-            ## do the same process about history data.
-            try:
-                field = self._get_past_field_name_by_current_name(field)
-                new_list_past = []
-                for item in self.raw_data_past_pd[field].tolist():
-                    if item < 4 and item > 0:
-                        new_list_past.append(0)
-                    elif item >= 4 and item <= 5:
-                        new_list_past.append(1)
-                    else:
-                        new_list_past.append('')
-                self.raw_data_past_pd[field] = new_list_past
-            except:
-                pass
-
-        ## new feature -> process A/B pair.
-        pairs = self._item_pd[self._item_pd["AB Code"].isin(["A", "B"])].reset_index(drop=True)
-        pairs_dict = pairs.groupby(["Item ID"]).groups
-
-        for key in pairs_dict:
-
-            _list = pairs_dict[key]
-            pairs_row = pairs.iloc[_list, :]
-            item_list = pairs_row["Unique Item Code"].tolist()
-            text_list = pairs_row["Short Text [2020 onward]"].tolist()
-            new_text = "/".join(text_list)
-            self._item_pd = self._item_pd[~(self._item_pd["Unique Item Code"] == item_list[1])].reset_index(drop=True)
-            _index = self._item_pd[self._item_pd["Unique Item Code"] == item_list[0]].index
-            self._item_pd.loc[_index, "Short Text [2020 onward]"] = new_text
-
-            column_pair = self.raw_data_pd[item_list]
-            _list = []
-            for index in range(len(column_pair.index)):
-                _row = column_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                    _list.append('')
+        ## take the shared leader-independent state.
+        survey = self.getSurvey()
+        self._catalog = survey.item_catalog
 
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_pd = self.raw_data_pd.drop(columns=[item_list[1]])
-            self.raw_data_pd[item_list[0]] = _pd
+        self.order_category = self._catalog.categories
 
-        self.demographics_pd = self.origin_demographics_pd
+        self.raw_data_pd = survey.raw_data_pd
+        self.raw_data_past_pd = survey.raw_data_past_pd
 
-        ## convert the demographics data to include only answered entries.
-        self._invited_demographics_data = self.demographics_pd[self.demographics_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_data = self._invited_demographics_data[self._invited_demographics_data.loc[:, "Worker ID"].isin(self.raw_data_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self.demographics_pd = survey.demographics_pd
+        self._invited_demographics_data = survey.invited_demographics_data
+        self._answered_demographics_data = survey.answered_demographics_data
         self._gilead_org = self._answered_demographics_data
 
-        ## do the same process about history data.
-        self._invited_demographics_past_data = self.demographics_past_pd[self.demographics_past_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_past_data = self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, "Worker ID"].isin(self.raw_data_past_pd['ExternalReference'].tolist())].reset_index(drop=True)
-    
-        if self.GM:
-            self._gm_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.GM] == 1].reset_index(drop=True)
-            self._gm_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.GM] == 1].reset_index(drop=True)
-        
-    def _get_past_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            new_field_name = self._rest_item_pd[self._rest_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            new_field_name = None
-
-        if new_field_name == None:
-            try:
-                new_field_name = self._both_item_pd[self._both_item_pd["Unique Item Code"] == field_name]["Unique Item Code"].values[0]
-            except:
-                new_field_name = None
-
-        return new_field_name
-
-    def _get_benchmark_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            field_name = self._benchmark_item_pd[self._benchmark_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            field_name = None
-        
-        return field_name
+        self._invited_demographics_past_data = survey.invited_demographics_past_data
+        self._answered_demographics_past_data = survey.answered_demographics_past_data
+        self._respondents = survey.respondents
+        self._past_respondents = survey.past_respondents
+        self._segments = self._respondents.segments
+        self._past_segments = self._past_respondents.segments
+        self._org_tree = survey.org_tree
 
     def _prepareColumnsForID(self):
         ## find the supervisor level of the given leader id.
@@ -613,83 +528,84 @@ class DemographicFileMaker:
         self.first_row = {}
         _temp = "Supervisor Level {} ID"
 
-        leader_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._leader_id]
+        leader_entry = self._org_tree.entry(self._leader_id)
 
         if self._leader_id == 999999:
             self.logic = 1
             leader_level = 1
         else:
-            for index, level in enumerate(leader_entry.loc[:, _temp.format(2) : _temp.format(10)]):
-                if (leader_entry[level] == self._leader_id).tolist()[0]:
-                    leader_level = index + 2
-                    break
+            leader_level = self._org_tree.level(self._leader_id)
         
         self.output_path = "/" + leader_entry["Worker Name"].values[0]
         self.file_name = leader_entry["Worker Last Name"].values[0]
+        _name = leader_entry["Worker Name"].values[0]
 
         supervisor_level = leader_level - 1
-        direct_level = leader_level + 1
 
         if leader_level >= 3:
             self.logic = 3
             self._supervisor_id = leader_entry.loc[:, _temp.format(supervisor_level)].values[0]
-            _supervisor_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._supervisor_id]
+            _supervisor_entry = self._org_tree.entry(self._supervisor_id)
             self._supervisor_last_name = _supervisor_entry["Worker Last Name"].values[0]
 
             ## get Parent group.
-            self._parent_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(supervisor_level)] == self._supervisor_id].reset_index(drop=True)
+            self._parent_mask = self._segments.org(supervisor_level, self._supervisor_id)
 
         elif leader_level == 2:
             self.logic = 2
 
         ## get Your Org data
         if self.logic == 1:
-            self._your_org = self._answered_demographics_data
+            self._your_mask = self._segments.answered()
             self._invited = len(self._invited_demographics_data.index)
         else:
             if self.GM:
-                self._your_org = self._gm_demographics_data
+                _name = self.GM
+                self._your_mask = self._segments.mask(self.GM, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.GM] == 1].index)
             else:
-                self._your_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
-                self._invited = len(self._invited_demographics_data[self._invited_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
-        
+                self._your_mask = self._segments.org(leader_level, self._leader_id)
+                self._invited = self._org_tree.invited(leader_level, self._leader_id)
+
+        if self._your_mask.sum() < 4:
+            return self._leader_id, _name
+
         ## calculate nums of participated
-        self._participated = len(self._your_org.loc[:, "Worker ID"])
+        self._participated = int(self._your_mask.sum())
         
         ## get your history group
         if self.GM:
-            self._your_past_org = self._gm_demographics_past_data
+            self._your_past_mask = self._past_segments.mask(self.GM, 1)
         else:
             if self.logic == 1:
-                self._your_past_org = self._answered_demographics_past_data
+                self._your_past_mask = self._past_segments.answered()
             else:
-                self._your_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                self._your_past_mask = self._past_segments.org(leader_level, self._leader_id)
 
 
         ## make direct report fields.
         self._direct_report_field = []
-        temp_org = self._your_org[~(self._your_org.loc[:, "Worker ID"] == self._leader_id)].reset_index(drop=True)
+        temp_mask = self._your_mask & ~self._segments.mask("Worker ID", self._leader_id)
 
         if self.GM:
-            temp_org = temp_org[temp_org.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+            temp_mask = temp_mask & self._segments.org(leader_level, self._leader_id)
 
-        _dict = temp_org.groupby(_temp.format(direct_level)).groups
+        _dict = self._segments.directs(leader_level, self._leader_id, temp_mask)
         for key in _dict:
             try:
-                self._direct_report_field.append([self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == key].loc[:, "Worker Name"].values[0], _dict[key]])
+                self._direct_report_field.append([self._org_tree.entry(key)["Worker Name"].values[0], _dict[key]])
             except:
                 pass
 
         ## make grade group fields.
         self._grade_group_fields = []
-        _dict = self._your_org.groupby("Pay Grade Group").groups
+        _dict = self._segments.groups("Pay Grade Group", self._your_mask)
         for key in _dict:
             self._grade_group_fields.append([str(key), _dict[key]])
 
         ## make tenure group fields.
         self._tenure_group_fields = []
-        _dict = self._your_org.groupby("Length of Service Group").groups
+        _dict = self._segments.groups("Length of Service Group", self._your_mask)
         for key in _dict:
             if not key == "15+ Years":
                 self._tenure_group_fields.append([key, _dict[key]])
@@ -700,7 +616,7 @@ class DemographicFileMaker:
         
         ## make performance rating fields.
         self._performance_rating_fields = []
-        _dict = self._your_org.groupby("2019 Performance Rating").groups
+        _dict = self._segments.groups("2019 Performance Rating", self._your_mask)
         _list = _dict.keys()
         for key in self.performance_order:
             try:
@@ -716,7 +632,7 @@ class DemographicFileMaker:
 
         ## make talent cordinate fields.
         self._talent_cordinate_fields = []
-        _dict = self._your_org.groupby("2020 Talent Coordinate").groups
+        _dict = self._segments.groups("2020 Talent Coordinate", self._your_mask)
         for key in _dict:
             _key = key
             if key == "Unspecified":
@@ -725,13 +641,13 @@ class DemographicFileMaker:
         
         ## make gender fields.
         self._gender_fields = []
-        _dict = self._your_org.groupby("Gender").groups
+        _dict = self._segments.groups("Gender", self._your_mask)
         for key in _dict:
             self._gender_fields.append([key, _dict[key]])
 
         ## make Ethnicity fields.
         self._ethnicity_fields = []
-        _dict = self._your_org.groupby("Ethnicity (US)").groups
+        _dict = self._segments.groups("Ethnicity (US)", self._your_mask)
         for key in _dict:
             if not key == "Non-US":
                 self._ethnicity_fields.append([key, _dict[key]])
@@ -742,37 +658,37 @@ class DemographicFileMaker:
 
         ## make age group fields.
         self._age_fields = []
-        _dict = self._your_org.groupby("Age Group").groups
+        _dict = self._segments.groups("Age Group", self._your_mask)
         for key in _dict:
             self._age_fields.append([key, _dict[key]])
 
         ## make country fields.
         self._country_fields = []
-        _dict = self._your_org.groupby("Country").groups
+        _dict = self._segments.groups("Country", self._your_mask)
         for key in _dict:
             self._country_fields.append([key, _dict[key]])
 
         ## make kite fields.
         self._kite_fields = []
-        _dict = self._your_org.groupby("Kite Employee Flag").groups
+        _dict = self._segments.groups("Kite Employee Flag", self._your_mask)
         for key in _dict:
             self._kite_fields.append([key, _dict[key]])
 
         ## make office type fields.
         self._office_fields = []
-        _dict = self._your_org.groupby("Office Type").groups
+        _dict = self._segments.groups("Office Type", self._your_mask)
         for key in _dict:
             self._office_fields.append([key, _dict[key]])
 
         ## make Region fields.
         self._region_fields = []
-        _dict = self._your_org.groupby("Location Level 2").groups
+        _dict = self._segments.groups("Location Level 2", self._your_mask)
         for key in _dict:
             self._region_fields.append([key, _dict[key]])
 
         ## make Department fields.
         self._department_fields = []
-        _dict = self._your_org.groupby("Department Level 2").groups
+        _dict = self._segments.groups("Department Level 2", self._your_mask)
         for key in _dict:
             self._department_fields.append([key, _dict[key]])
 
@@ -810,25 +726,25 @@ class DemographicFileMaker:
     def _calculateEachRow(self, item):
         
         ## calculate Gilead overall %s
-        _dict, lens = self._calculateOverall(self._gilead_org, item)
+        _dict, lens = self._calculateOverall(self._respondents.answered, item)
         self.precious_dict[""]["Gilead Overall"].update(_dict)
         self.first_row.update({"Gilead Overall": lens})
 
         ## calculate Parent Group %s
         if self.logic == 3:
-            _dict, lens = self._calculateOverall(self._parent_org, item)
+            _dict, lens = self._calculateOverall(self._parent_mask, item)
             self.precious_dict[""]["Parent Group"].update(_dict)
             self.first_row.update({"Parent Group": lens})
 
         ## calculate Your Org(2018) %s
         if self.logic >= 2:
-            _dict, lens = self._calculateOverall(self._your_org, item)
+            _dict, lens = self._calculateOverall(self._your_mask, item)
             self.precious_dict[""]["Your Org (2020)"].update(_dict)
             self.first_row.update({"Your Org (2020)": lens})
 
         ## calculate Δ Your Org (2018) %s
         if len(self._filtered_raw_past_data.columns) > 1:
-            _dict, lens = self._calculateOverall(self._your_past_org, item, history=True)
+            _dict, lens = self._calculateOverall(self._your_past_mask, item, history=True)
             self.precious_dict["delta"]["Δ Your Org (2018)"].update(_dict)
             self.first_row.update({"deltaΔ Your Org (2018)": lens})
 
@@ -884,90 +800,25 @@ class DemographicFileMaker:
         ## calculate department %s
         self._calculateSubFields(self._department_fields, "Department", item)
 
-    def _calculateOverall(self, dataframe, item, history=False):
+    def _calculateOverall(self, mask, item, history=False):
 
         ## calcualte overall fields.
-        ids = dataframe.iloc[:, 0]
-        # nums = len(ids)
+        nums = int(mask.sum())
         if history:
-            working_pd = self._filtered_raw_past_data[self._filtered_raw_past_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-        else:
-            working_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-        nums = len(working_pd.iloc[:, 0])
-        return self._get_sum(working_pd.iloc[:, 1:], nums, item, history), len(ids)
+            return get_scores(self._filtered_past_columns, self._filtered_past_values[mask], nums, item, history, ndigits=2), nums
+        return get_scores(self._filtered_columns, self._filtered_values[mask], nums, item, ndigits=2), nums
     
     def _calculateSubFields(self, dataframe, column_name, item):
 
         ## calculate the sum of all sub fields except overall fields.
         for field in dataframe:
             dictionary = self.precious_dict[column_name]
-            _list = field[1]
-            ids = self._your_org.iloc[_list, 0].tolist()
-            nums = len(ids)
-            working_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-            _dict = self._get_sum(working_pd.iloc[:, 1:], nums, item)
+            _mask = field[1]
+            nums = int(_mask.sum())
+            _dict = get_scores(self._filtered_columns, self._filtered_values[_mask], nums, item, ndigits=2)
             dictionary[field[0]].update(_dict)
-            self.first_row.update({column_name + field[0]: len(ids)})
+            self.first_row.update({column_name + field[0]: nums})
     
-    def _get_sum(self, data, nums, item, implicity=False):
-
-        ## calculate the sum of favorable scores.
-        _dict = {}
-        determine_parent_na = False
-
-        for ind in range(len(data.columns)):
-            _ = data.iloc[:, ind]
-            is_empty_column = True
-            lens = nums
-            sub = 0
-            count_valid = 0
-            for __ in _:
-                if __ != '':
-                    is_empty_column = False
-                    sub += __
-                    count_valid += 1
-                else:
-                    lens -= 1
-            if is_empty_column:
-                _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                determine_parent_na = True
-            else:
-                if count_valid >= 4:
-                    _dict.update({data.columns.values[ind]: [round(sub / lens, 2), 1]})
-                else:
-                    _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                    determine_parent_na = True
-        
-        if determine_parent_na:
-            _dict.update({item: ["N/A", 0]})
-        else:
-            total_lens = nums
-            total = 0
-            cols = len(data.columns)
-            for ind in range(nums):
-                _series = data.iloc[ind, :]
-                sub_sum = 0
-                _is_nan = False
-                for val in _series:
-                    if val != '':
-                        sub_sum += val
-                    else:
-                        _is_nan = True
-                        total_lens -= 1
-                        break
-
-                if not _is_nan:
-                    total += sub_sum / cols
-
-            if total_lens < 4:
-                _dict.update({item: ["N/A", 0]})
-            else:
-                _dict.update({item: [round(total / total_lens, 2), 0]})
-
-        if implicity:
-                _dict.update({item: ["N/A", 0]})
-        return _dict
-
 if __name__ == "__main__":
 
     ## Create a object.
@@ -984,28 +835,55 @@ if __name__ == "__main__":
         'output_folder': "./output",
         'input_folder': "./input",
         'image': "/image.png",
+        ## number of worker processes, all the cpus if None.
+        'workers': None,
+        ## write the reports with the streaming backend, the cells are styled once per style and written as text, on a tested openpyxl.
+        'streaming': True,
+        ## file of the time, CPU and peak memory of each phase of each leader in the output folder, .csv or .jsonl, None to skip it.
+        'trace': TRACE_FILE,
+        ## show the progress bars.
+        'progress': True,
     }
 
+    set_progress(init_data["progress"])
+    start_trace(init_data["output_folder"] + "/" + init_data["trace"] if init_data["trace"] else None)
+
     dfm = DemographicFileMaker(**init_data)
 
     ## read all needed files.
-    dfm.readAllFiles()
+    with phase("DemographicFileMaker", "readAllFiles"):
+        dfm.readAllFiles()
 
-    total_ids = len(dfm.leaders.index) + len(dfm.GMs.index)
+    def process(job):
+        with trace_job(job):
+            dfm.setLeader(*job)
 
-    for index in tqdm(range(total_ids), desc="total process"):
-        if index < len(dfm.leaders.index):
-            dfm.setLeader(dfm.leaders.iloc[index, :].values[0])
-        else:
-            row = dfm.GMs.iloc[index - len(dfm.leaders.index), :]
-            dfm.setLeader(row["GM ID"], row["GM Org"])
-    
-        ## do main process to calculate report.
-        dfm.calculateValues()
+            ## do main process to calculate report.
+            result = dfm.calculateValues()
+            if result:
+                return [result[0], result[1]]
+
+            ## make report dataframe to output.
+            with phase("DemographicFileMaker", "makeReport"):
+                dfm.makeReport()
+
+            ## write output file (Mockup STAR.xlsx)
+            dfm.writeOutput()
+
+    ## preprocess the survey and count every org once, before the workers are forked so they share it.
+    with phase("PreprocessedSurvey", "load"):
+        dfm.getSurvey().load(flags=list(dfm.GMs["GM Org"]))
+
+    ## fan the leaders out over the worker processes.
+    jobs = leader_jobs(dfm.leaders, dfm.GMs)
+    results = run_batch(process, jobs, init_data["workers"])
+    victims = [result[0] for result in results if result[0]]
 
-        ## make report dataframe to output.
-        dfm.makeReport()
+    if len(victims) > 0:
+        df = pd.DataFrame(victims, columns=["ID", "Org"])
+        df.to_excel(init_data["output_folder"] + "/rest.xlsx", index=False)
 
-        ## write output file (Mockup STAR.xlsx)
-        dfm.writeOutput()
+    print_timings(jobs, results, top=0 if init_data["trace"] else 5)
+    if init_data["trace"]:
+        print_trace_summary(init_data["output_folder"] + "/" + init_data["trace"])
     print("complete!")
\ No newline at end of file
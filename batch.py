@@ -0,0 +1,58 @@
+import multiprocessing
+import os
+import time
+from instrumentation import progress
+
+
+## the job list and the function run for each job, inherited by the forked workers.
+_batch = {}
+
+
+def run_batch(process, jobs, workers=None, desc="total process"):
+    """
+    Runs process(job) for every job over a pool of worker processes.
+    The workers are forked after the survey is read and preprocessed, so the makers and the survey
+    are shared copy-on-write and only the job index and the result cross the process boundary.
+    process: function of one job, it has to write its own output
+    jobs: the list of jobs, e.g. the setLeader arguments of each leader
+    workers: the number of processes, all the cpus if None, 1 runs the jobs in this process
+    Returns [result, seconds] of each job, in the order of the jobs.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+
+    _batch.update({"process": process, "jobs": jobs})
+
+    ## fork is needed to share the state, run in this process where it is not available.
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        return [_run_job(index) for index in progress(range(len(jobs)), desc=desc)]
+
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        return list(progress(pool.imap(_run_job, range(len(jobs))), total=len(jobs), desc=desc))
+
+
+def _run_job(index):
+    start = time.perf_counter()
+    result = _batch["process"](_batch["jobs"][index])
+    return [result, time.perf_counter() - start]
+
+
+def leader_jobs(leaders, GMs=None, site_leads=None):
+    """
+    The setLeader arguments of every leader, GM and site lead of the leader file, in this order.
+    """
+    jobs = [[id] for id in leaders.iloc[:, 0].tolist()]
+    if GMs is not None:
+        jobs += [[row["GM ID"], row["GM Org"]] for _, row in GMs.iterrows()]
+    if site_leads is not None:
+        jobs += [[row["Site Leader ID"], False, row["Site Name"]] for _, row in site_leads.iterrows()]
+    return jobs
+
+
+def print_timings(jobs, results, top=5):
+    ## the slowest jobs, to find the leaders who blow the batch window, top=0 when the trace summary lists them.
+    seconds = [result[1] for result in results]
+    print("{} jobs, {:.1f}s of work".format(len(jobs), sum(seconds)))
+    for index in sorted(range(len(jobs)), key=lambda index: -seconds[index])[:top]:
+        print("  {:.1f}s  {}".format(seconds[index], jobs[index]))
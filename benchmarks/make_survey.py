@@ -0,0 +1,314 @@
+import argparse
+import math
+import os
+import random
+import shutil
+import numpy as np
+import pandas as pd
+
+
+SUPERVISOR_LEVEL = "Supervisor Level {} ID"
+
+## the workbooks read by mergedD&L_FM.py and DFM.py, by setting, the first name is written and the others copied.
+INPUT_FILES = {
+    "leader": ["List of Leaders and GMs 2021-02-28.xlsx", "List of Leaders and GMs 2021-02-05.xlsx"],
+    "raw_data": ["2020 Employee Survey Responses Sample 2021-02-05.xlsx"],
+    "raw_data_past": ["2018 Employee Survey Responses Sample 2021-02-05.xlsx"],
+    "item_code": ["Item Code SHARE 2021-01-23.xlsx"],
+    "demographics": ["2020 Demographics File Sample 2021-02-17.xlsx", "2020 Demographics File Sample 2021-02-05.xlsx"],
+    "demographics_past": ["2018 Demographics File Sample 2021-02-17.xlsx", "2018 Demographics File Sample 2021-02-05.xlsx"],
+    "heatmap_color": ["Heatmap Colors.xlsx"],
+    "benchmark": ["External Benchmarks.xlsx"],
+    "how to use": ["How to Use Content 2021-02-28.xlsx", "How to Use Content 2021-02-13.xlsx"],
+    "gm_levels": ["GM Levels 2021-02-17.xlsx"],
+    "image": ["image.png"],
+}
+
+## the demographic segments and their values.
+SEGMENTS = {
+    "Pay Grade Group": ["Grade 1-5", "Grade 6-9", "Grade 10-12", "Grade 13+"],
+    "Length of Service Group": ["15+ Years", "<1 Year", "1-2 Years", "3-5 Years", "6-10 Years", "11-15 Years"],
+    "Gender": ["Female", "Male"],
+    "Ethnicity (US)": ["Asian", "Black", "Hispanic", "White", "Non-US"],
+    "Age Group": ["<30", "30-39", "40-49", "50+"],
+    "Kite Employee Flag": ["Kite", "Gilead (No Kite)"],
+    "Office Type": ["Home Office", "Field Office", "Site Office"],
+    "Department Level 2": ["Commercial - COMM", "Research", "Manufacturing", "G&A"],
+}
+RATINGS = ["Exceptional", "Exceeded", "Achieved", "Improvement Needed", "On Leave", "Unspecified"]
+COORDINATES = ["1A", "2B", "3C", "Unspecified"]
+COUNTRIES = {"North America": ["United States", "Canada"], "Europe": ["France", "Germany"], "Asia": ["Japan", "China"]}
+CATEGORIES = ["Engagement", "Leadership", "Inclusion", "Growth", "Wellbeing", "Innovation"]
+
+## the GM orgs: (org, level, parent org), and the flag of each org is set by region or country.
+GM_ORGS = [
+    ("Global Org", 1, None),
+    ("Europe Org", 2, "Global Org"),
+    ("Asia Org", 2, "Global Org"),
+    ("France Org", 3, "Europe Org"),
+    ("Germany Org", 3, "Europe Org"),
+    ("Kite Europe Org", 3, "Europe Org"),
+    ("Japan Org", 3, "Asia Org"),
+    ("Paris Org", 4, "France Org"),
+    ("Lyon Org", 4, "France Org"),
+]
+SITES = ["Foster City / CA", "Oceanside / CA"]
+
+ROOT_ID = 999999
+RESPONSE_RATE = 0.8
+PAST_RESPONSE_RATE = 0.75
+
+
+def make_survey(folder, respondents=5000, leaders=100, items=36, seed=7):
+    """
+    Writes a synthetic set of the input workbooks into folder.
+    respondents: the number of answered responses of the current year, about
+    leaders: the number of leaders of the leader file, plus the overall report 999999
+    items: the number of items of the current survey, every 11th is an A/B pair
+    The org tree is up to 10 levels deep, the past year keeps 90% of the workers, and the answers are
+    1-5 codes with some 6 (don't know), -99 (skipped) and blanks, leaning per respondent.
+    """
+    rnd = random.Random(seed)
+    generator = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    workers = max(int(math.ceil(respondents / RESPONSE_RATE / 0.97)), leaders * 6)
+    managers = max(workers // 6, leaders + len(GM_ORGS) + len(SITES))
+    parents, depths, managers = _make_org_tree(workers, managers, rnd)
+    demographics = _make_demographics(parents, managers, rnd, generator)
+    items_pd, categories_pd, current_codes, past_codes, benchmark_pd = _make_items(items, rnd)
+
+    ## the past year has most of the same workers, the leavers are replaced by new ones.
+    demographics_past = demographics.copy()
+    leavers = demographics_past.sample(frac=0.1, random_state=seed).index
+    demographics_past.loc[leavers, "Worker ID"] = np.arange(800000, 800000 + len(leavers))
+    demographics_past = demographics_past.drop(columns=["2019 Performance Rating", "2020 Talent Coordinate"])
+
+    raw_data = _make_responses(demographics, current_codes, RESPONSE_RATE, generator)
+    raw_data_past = _make_responses(demographics_past, past_codes, PAST_RESPONSE_RATE, generator)
+
+    ## the leaders of the leader file, the GMs and the site leads are other managers.
+    pool = [manager for manager in managers if manager != ROOT_ID]
+    rnd.shuffle(pool)
+    gm_ids = {org: pool[index] for index, (org, _, _) in enumerate(GM_ORGS)}
+    site_ids = pool[len(GM_ORGS):len(GM_ORGS) + len(SITES)]
+    leader_ids = sorted(pool[len(GM_ORGS) + len(SITES):][:leaders], key=lambda manager: depths[manager])
+
+    leader_pd = pd.DataFrame({"Leader ID": [ROOT_ID] + leader_ids})
+    gm_pd = pd.DataFrame({"GM ID": [gm_ids[org] for org in ["Europe Org", "France Org", "Paris Org"]],
+                          "GM Org": ["Europe Org", "France Org", "Paris Org"]})
+    site_pd = pd.DataFrame({"Site Leader ID": site_ids, "Site Name": SITES})
+
+    _write(folder, "leader", {"Leader": leader_pd, "GM": gm_pd, "Site Leader": site_pd})
+    _write(folder, "raw_data", {"Sheet1": raw_data})
+    _write(folder, "raw_data_past", {"Sheet1": raw_data_past})
+    _write(folder, "item_code", {"ItemCodeSTAR": items_pd, "CurrentCategorySTAR": categories_pd})
+    _write(folder, "demographics", {"Sheet1": demographics})
+    _write(folder, "demographics_past", {"Sheet1": demographics_past})
+    _write(folder, "heatmap_color", {"Sheet1": _make_heatmap()})
+    _write(folder, "benchmark", {"Sheet1": benchmark_pd})
+    _write(folder, "how to use", {
+        "Demographic Trends How to Use": _make_how_to_use("Demographic Trends guide"),
+        "Score Details How to Use": _make_how_to_use("Score Details guide"),
+        "Score Summary How to Use": _make_how_to_use("Score Summary guide"),
+    })
+    _write(folder, "gm_levels", {"Sheet1": _make_gm_levels(gm_ids)})
+
+    ## the logo of the reports is the one of the repo.
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "input", "image.png"),
+                os.path.join(folder, INPUT_FILES["image"][0]))
+
+
+def _make_org_tree(workers, managers, rnd):
+    ## the managers hang under one of the recent managers, so the tree goes deep instead of wide, down to level 10.
+    ids = list(range(100001, 100001 + workers))
+    rnd.shuffle(ids)
+    parents = {ROOT_ID: None}
+    depths = {ROOT_ID: 1}
+    supervisors = [ROOT_ID]
+    for worker_id in ids[:managers]:
+        parent = rnd.choice(supervisors[-40:])
+        parents[worker_id] = parent
+        depths[worker_id] = depths[parent] + 1
+        if depths[worker_id] < 10:
+            supervisors.append(worker_id)
+
+    ## the other workers report to any manager, the ones under level 10 managers are below it.
+    managers = list(parents)
+    for worker_id in ids[len(managers) - 1:]:
+        parent = rnd.choice(managers)
+        parents[worker_id] = parent
+        depths[worker_id] = depths[parent] + 1
+    return parents, depths, managers
+
+
+def _make_demographics(parents, managers, rnd, generator):
+    worker_ids = list(parents)
+    manager_set = set(managers)
+    size = len(worker_ids)
+
+    ## the chain of supervisors of each worker, a manager is its own deepest supervisor.
+    chains = []
+    for worker_id in worker_ids:
+        chain = []
+        node = worker_id if worker_id in manager_set else parents[worker_id]
+        while node is not None:
+            chain.append(node)
+            node = parents[node]
+        chains.append(chain[::-1])
+
+    data = {
+        "Worker ID": worker_ids,
+        "Worker Name": ["First{} Last{}".format(worker_id, worker_id) for worker_id in worker_ids],
+        "Worker Last Name": ["Last{}".format(worker_id) for worker_id in worker_ids],
+        "Invitee Flag": np.where((generator.random(size) < 0.97) | np.isin(worker_ids, managers), 1, 0),
+    }
+    for level in range(1, 11):
+        data[SUPERVISOR_LEVEL.format(level)] = [chain[level - 1] if level <= len(chain) else np.nan for chain in chains]
+    for column, values in SEGMENTS.items():
+        data[column] = generator.choice(values, size)
+
+    regions = generator.choice(list(COUNTRIES), size)
+    countries = np.array([rnd.choice(COUNTRIES[region]) for region in regions])
+    data["Location Level 2"] = regions
+    data["Country"] = countries
+    data["2019 Performance Rating"] = generator.choice(RATINGS, size)
+    data["2020 Talent Coordinate"] = generator.choice(COORDINATES, size)
+    data["2017 Performance Rating"] = generator.choice(RATINGS, size)
+    data["2017 Talent Coordinate"] = generator.choice(COORDINATES, size)
+
+    ## the GM and site flag columns.
+    paris = (countries == "France") & (generator.random(size) < 0.5)
+    data["Europe Org"] = (regions == "Europe").astype(int)
+    data["Asia Org"] = (regions == "Asia").astype(int)
+    data["France Org"] = (countries == "France").astype(int)
+    data["Germany Org"] = (countries == "Germany").astype(int)
+    data["Kite Europe Org"] = ((regions == "Europe") & (data["Kite Employee Flag"] == "Kite")).astype(int)
+    data["Paris Org"] = paris.astype(int)
+    data["Lyon Org"] = ((countries == "France") & ~paris).astype(int)
+    data["Japan Org"] = (countries == "Japan").astype(int)
+    data["Foster City / CA"] = (generator.random(size) < 0.3).astype(int)
+    data["Oceanside / CA"] = (generator.random(size) < 0.1).astype(int)
+    return pd.DataFrame(data)
+
+
+def _make_items(items, rnd):
+    ## some items are asked in both years, some have another code in the past, half have a benchmark.
+    item_rows = []
+    category_rows = []
+    benchmark_rows = []
+    current_codes = []
+    past_codes = []
+    for number in range(1, items + 1):
+        item_id = "I{:03d}".format(number)
+        category_rows.append({"Item ID in 2020 Survey": item_id, "2020 Category": CATEGORIES[(number - 1) * len(CATEGORIES) // items], "Note": ""})
+
+        pair = number % 11 == 5
+        codes = ["Q{}A".format(number), "Q{}B".format(number)] if pair else ["Q{}".format(number)]
+        for ab_code, code in zip(["A", "B"] if pair else [np.nan], codes):
+            item_rows.append({"Type ID": "T01", "External Benchmark": "i", "Unique Item Code": code, "Item ID": item_id,
+                              "AB Code": ab_code, "Short Text [2020 onward]": "Statement {} {}".format(number, code)})
+            current_codes.append(code)
+
+        if number % 7 in (1, 2, 3) and not pair:
+            past_codes.append(codes[0])
+        elif number % 7 in (4, 5) or pair:
+            code = "P{}".format(number)
+            item_rows.append({"Type ID": "T01", "External Benchmark": "i", "Unique Item Code": code, "Item ID": item_id,
+                              "AB Code": np.nan, "Short Text [2018]": "Old {}".format(number)})
+            past_codes.append(code)
+
+        if number % 2 == 0:
+            code = "E{}".format(number)
+            item_rows.append({"Type ID": "T01", "External Benchmark": "e", "Unique Item Code": code, "Item ID": item_id, "AB Code": np.nan})
+            benchmark_rows.append({"Unique Item Code": code, "External - CAmp Biotechnology & Medical Devices 2019": round(rnd.uniform(0.5, 0.9), 3)})
+
+    ## a demographic question and a retired item, which the reports leave out.
+    item_rows.append({"Type ID": "T02", "External Benchmark": np.nan, "Unique Item Code": "D1", "Item ID": "X01"})
+    category_rows.append({"Item ID in 2020 Survey": "I999", "2020 Category": "Retired", "Note": ""})
+    return pd.DataFrame(item_rows), pd.DataFrame(category_rows), current_codes, past_codes, pd.DataFrame(benchmark_rows)
+
+
+def _make_responses(demographics, codes, rate, generator):
+    invited = demographics.loc[demographics["Invitee Flag"] == 1, "Worker ID"].to_numpy()
+    worker_ids = invited[generator.random(len(invited)) < rate]
+    size = len(worker_ids)
+
+    ## the 1-5 codes lean to favorable or unfavorable per respondent.
+    lean = generator.random(size)[:, None]
+    values = np.clip(np.rint(generator.normal(2.6 + 2 * lean, 1.0, (size, len(codes)))), 1, 5)
+    draw = generator.random((size, len(codes)))
+    values[draw < 0.07] = np.nan
+    values[draw < 0.05] = -99
+    values[draw < 0.03] = 6
+
+    ## a respondent answers only one item of an A/B pair.
+    second = generator.random(size) < 0.5
+    for index, code in enumerate(codes):
+        if code.endswith("A") and code[:-1] + "B" in codes:
+            values[second, index] = np.where(generator.random(int(second.sum())) < 0.5, -99, np.nan)
+        elif code.endswith("B") and code[:-1] + "A" in codes:
+            values[~second, index] = np.nan
+
+    responses = pd.DataFrame(values, columns=codes)
+    responses.insert(0, "ExternalReference", worker_ids)
+    responses.insert(0, "StartDate", "2020-09-01")
+
+    ## the question text and the import id rows of the survey export.
+    header = pd.DataFrame([{column: "Question text" for column in responses.columns},
+                           {column: '{"ImportId":"x"}' for column in responses.columns}])
+    return pd.concat([header, responses], ignore_index=True)
+
+
+def _make_gm_levels(gm_ids):
+    rows = []
+    parents = {org: parent for org, _, parent in GM_ORGS}
+    for org, level, _ in GM_ORGS:
+        chain = [org]
+        while parents[chain[-1]] is not None:
+            chain.append(parents[chain[-1]])
+        chain = chain[::-1]
+
+        row = {"GM ID": gm_ids[org], "GM Org": org, "Parent Level": level - 1}
+        for index in range(1, 5):
+            row["GM Level {} ID".format(index)] = gm_ids[chain[index - 1]] if index <= len(chain) else np.nan
+            row["GM Level {} Org".format(index)] = chain[index - 1] if index <= len(chain) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _make_heatmap():
+    ## white at 0, up to red for -25 and green for +25.
+    rows = []
+    for delta in range(-25, 26):
+        scale = abs(delta) / 25
+        color = (248, 105, 107) if delta < 0 else (99, 190, 123)
+        rows.append({"Delta": delta, "R": int(255 + (color[0] - 255) * scale), "G": int(255 + (color[1] - 255) * scale), "B": int(255 + (color[2] - 255) * scale)})
+    return pd.DataFrame(rows)
+
+
+def _make_how_to_use(title):
+    return pd.DataFrame({title: ["Step {} explains how to read the report.".format(index) * 3 for index in range(4)],
+                         "Notes": ["Note {} for readers.".format(index) for index in range(4)]})
+
+
+def _write(folder, setting, sheets):
+    path = os.path.join(folder, INPUT_FILES[setting][0])
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for name, frame in sheets.items():
+            frame.to_excel(writer, sheet_name=name, index=False)
+    for other in INPUT_FILES[setting][1:]:
+        shutil.copy(path, os.path.join(folder, other))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Write a synthetic set of the survey input workbooks.")
+    parser.add_argument("folder", help="the input folder to write, e.g. ./input")
+    parser.add_argument("--respondents", type=int, default=5000)
+    parser.add_argument("--leaders", type=int, default=100)
+    parser.add_argument("--items", type=int, default=36)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    make_survey(args.folder, args.respondents, args.leaders, args.items, args.seed)
@@ -0,0 +1,186 @@
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from make_survey import make_survey, INPUT_FILES
+from snapshot import SNAPSHOT_FOLDER
+from instrumentation import set_progress, start_trace, trace_job, phase, read_trace, get_phase_totals, get_peak_rss, TRACE_FILE
+
+
+## marker of the generated inputs, they are written again only for other parameters.
+PARAMS_FILE = "benchmark-params.json"
+
+
+def load_makers():
+    ## the makers live in a script whose name is not importable.
+    spec = importlib.util.spec_from_file_location("merged_makers", os.path.join(ROOT, "mergedD&L_FM.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def prepare_inputs(folder, respondents, leaders, items, seed, cold=False):
+    ## the inputs of the same parameters are kept between runs, generating them takes longer than the run.
+    params = {"respondents": respondents, "leaders": leaders, "items": items, "seed": seed}
+    marker = os.path.join(folder, PARAMS_FILE)
+    try:
+        with open(marker) as file:
+            reuse = json.load(file) == params
+    except:
+        reuse = False
+
+    if not reuse:
+        shutil.rmtree(folder, ignore_errors=True)
+        start = time.perf_counter()
+        make_survey(folder, respondents, leaders, items, seed)
+        print("generated the inputs in {:.1f}s".format(time.perf_counter() - start))
+        with open(marker, "w") as file:
+            json.dump(params, file)
+
+    ## a cold run parses the workbooks again instead of reading their snapshots.
+    if cold:
+        shutil.rmtree(os.path.join(folder, SNAPSHOT_FOLDER), ignore_errors=True)
+
+
+def run(folder, output_folder, max_jobs=None):
+    """
+    Builds the reports of the leaders of the inputs in folder in this process and times each phase of each maker.
+    max_jobs: build only the first jobs of the leader file
+    """
+    makers = load_makers()
+    set_progress(False)
+
+    init_data = {
+        'leader': INPUT_FILES["leader"][0],
+        'raw_data': INPUT_FILES["raw_data"][0],
+        'item_code': INPUT_FILES["item_code"][0],
+        'demographics': INPUT_FILES["demographics"][0],
+        'heatmap_color': INPUT_FILES["heatmap_color"][0],
+        'raw_data_past': INPUT_FILES["raw_data_past"][0],
+        'demographics_past': INPUT_FILES["demographics_past"][0],
+        'benchmark': INPUT_FILES["benchmark"][0],
+        'how to use': INPUT_FILES["how to use"][0],
+        'gm_levels': INPUT_FILES["gm_levels"][0],
+        'output_folder': output_folder,
+        'input_folder': folder,
+        'image': INPUT_FILES["image"][0],
+        'workers': 1,
+        'streaming': True,
+        'incremental': False,
+        'score_store': False,
+        'serve': None,
+        'custom text': "\n* 2018 indicates 2018 Global Employee Survey results\nGilead column compares {}'s scores to Gilead Overall ({})\n",
+    }
+    os.makedirs(output_folder, exist_ok=True)
+
+    ## the phases of the run and those of the makers go to the same trace.
+    trace = os.path.join(output_folder, TRACE_FILE)
+    start_trace(trace)
+
+    start = time.perf_counter()
+    with phase("inputs", "read"):
+        inputs = makers.SurveyInputs(**init_data)
+        dfm = makers.DemographicFileMaker(inputs, **init_data)
+        ltm = makers.LTMaker(inputs, **init_data)
+        ssm = makers.SSM(inputs, **init_data)
+        dfm.readAllFiles()
+        ltm.readAllFiles()
+        ssm.readAllFiles()
+        for name in inputs.SHEETS:
+            getattr(inputs, name)
+
+    with phase("survey", "preprocess"):
+        survey = dfm.getSurvey()
+        ltm.setSurvey(survey)
+        ssm.setSurvey(survey)
+        survey.load(flags=list(dfm.GM_levels["GM Org"]) + list(dfm.site_leads["Site Name"]))
+
+    jobs = makers.leader_jobs(dfm.leaders, dfm.GMs, dfm.site_leads)[:max_jobs]
+    skipped = 0
+    for job in jobs:
+        with trace_job(job):
+            with phase("all", "setLeader"):
+                dfm.setLeader(*job)
+                ltm.setLeader(*job)
+                ssm.setLeader(*job)
+
+            ## the phases inside the makers are traced by the makers, only makeReport is timed here like in the scripts.
+            result = dfm.calculateValues()
+            if result:
+                skipped += 1
+                continue
+            with phase("DemographicFileMaker", "makeReport"):
+                dfm.makeReport()
+            book = dfm.getWorkBook()
+
+            ltm.setWorkBook(book)
+            ltm.calculateValues()
+            with phase("LTMaker", "makeReport"):
+                ltm.makeReport()
+            ltm.writeOutput()
+
+            ssm.calculateValues()
+            with phase("SSM", "makeReport"):
+                ssm.makeReport()
+            ssm.writeOutput()
+
+    return {
+        "jobs": len(jobs),
+        "skipped": skipped,
+        "respondents": len(survey.raw_data_pd),
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": get_peak_rss(),
+        "phases": get_phase_totals(read_trace(trace)),
+    }
+
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip() or None
+    except:
+        return None
+
+
+def print_summary(report):
+    print("{} respondents, {} jobs ({} under the minimum respondents), {:.1f}s, {:.2f} leaders/s, peak RSS {}".format(
+        report["respondents"], report["jobs"], report["skipped"], report["seconds"], report["jobs"] / report["seconds"],
+        "n/a" if report["peak_rss_mb"] is None else "{:.0f} MB".format(report["peak_rss_mb"])))
+    print("{:<22}{:<24}{:>7}{:>10}{:>10}{:>10}".format("maker", "phase", "calls", "total s", "mean ms", "max ms"))
+    for totals in report["phases"]:
+        print("{:<22}{:<24}{:>7}{:>10.2f}{:>10.1f}{:>10.1f}".format(
+            totals["maker"], totals["phase"], totals["calls"], totals["total"], totals["mean"] * 1000, totals["max"] * 1000))
+
+
+if __name__ == "__main__":
+
+    ## e.g. python benchmarks/run_benchmark.py --respondents 20000 --leaders 500 --results benchmarks.jsonl
+    parser = argparse.ArgumentParser(description="Time each phase of the makers on a synthetic survey.")
+    parser.add_argument("--respondents", type=int, default=5000)
+    parser.add_argument("--leaders", type=int, default=100)
+    parser.add_argument("--items", type=int, default=36)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--jobs", type=int, default=None, help="build only the first jobs of the leader file")
+    parser.add_argument("--folder", default=os.path.join(ROOT, "benchmarks", "data"), help="folder of the generated inputs")
+    parser.add_argument("--output", default=os.path.join(ROOT, "benchmarks", "output"), help="folder of the reports")
+    parser.add_argument("--cold", action="store_true", help="parse the workbooks again instead of reading their snapshots")
+    parser.add_argument("--results", default=None, help="append the summary as a JSON line to this file")
+    args = parser.parse_args()
+
+    prepare_inputs(args.folder, args.respondents, args.leaders, args.items, args.seed, args.cold)
+    report = run(args.folder, args.output, args.jobs)
+    print_summary(report)
+
+    if args.results:
+        report.update({"commit": get_commit(), "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                       "params": {"respondents": args.respondents, "leaders": args.leaders, "items": args.items,
+                                  "seed": args.seed, "jobs": args.jobs, "cold": args.cold}})
+        with open(args.results, "a") as file:
+            file.write(json.dumps(report) + "\n")
@@ -0,0 +1,19 @@
+from openpyxl.styles import PatternFill
+
+
+class HeatmapPalette:
+    """
+    The heatmap fill of each delta from -25 to 25, compiled once from the Heatmap Colors sheet
+    and shared by the report writers.
+    """
+
+    def __init__(self, heatmap_color):
+        self._fills = {}
+        for delta, r, g, b in heatmap_color.loc[:, ["Delta", "R", "G", "B"]].itertuples(index=False):
+            self._fills.update({int(delta): PatternFill("solid", fgColor="{:02x}{:02x}{:02x}".format(int(r), int(g), int(b)))})
+
+    def fill(self, delta):
+        ## the deltas beyond 25 take the color of 25, raises KeyError for a delta without color.
+        if abs(delta) > 25:
+            delta = delta // abs(delta) * 25
+        return self._fills[delta]
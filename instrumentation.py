@@ -0,0 +1,170 @@
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from tqdm import tqdm
+from python_values import json_default
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+## file of the trace, next to the reports.
+TRACE_FILE = "trace.jsonl"
+
+FIELDS = ["job", "maker", "phase", "wall", "cpu", "peak_rss_mb", "rss_growth_mb"]
+
+## the trace of this process and the progress bar switch, inherited by the forked workers.
+_trace = {"path": None, "job": None, "records": []}
+_progress = {"disable": False}
+
+
+def start_trace(path):
+    """
+    Records the phases of the run to path, a .csv file or else JSON lines, None records nothing.
+    The trace of a previous run is replaced.
+    """
+    _trace.update({"path": path, "job": None, "records": []})
+    if path is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", newline="") as file:
+            if path.endswith(".csv"):
+                csv.writer(file).writerow(FIELDS)
+
+
+@contextmanager
+def trace_job(job):
+    """
+    The phases recorded in the block belong to the job, they are written to the trace at the end of it.
+    """
+    _trace["job"] = job
+    try:
+        yield
+    finally:
+        flush_trace()
+        _trace["job"] = None
+
+
+def flush_trace():
+    ## the records of a job are appended at once, so the lines of the workers do not interleave.
+    if _trace["path"] is None or not _trace["records"]:
+        return
+    with open(_trace["path"], "a", newline="") as file:
+        if _trace["path"].endswith(".csv"):
+            writer = csv.writer(file)
+            writer.writerows([[json.dumps(record["job"], default=json_default) if field == "job" else record[field] for field in FIELDS]
+                              for record in _trace["records"]])
+        else:
+            file.write("".join(json.dumps(record, default=json_default) + "\n" for record in _trace["records"]))
+    _trace["records"] = []
+
+
+@contextmanager
+def phase(maker, name):
+    """
+    Records the wall time, CPU time and peak RSS of the block, e.g.
+    with phase("LTMaker", "_prepareColumnsForID"): ...
+    The peak RSS is the high-water mark of the process after the block, the growth is how much the block raised it.
+    """
+    if _trace["path"] is None:
+        yield
+        return
+
+    rss = get_peak_rss()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    try:
+        yield
+    finally:
+        peak = get_peak_rss()
+        _trace["records"].append({
+            "job": _trace["job"], "maker": maker, "phase": name,
+            "wall": round(time.perf_counter() - wall, 6), "cpu": round(time.process_time() - cpu, 6),
+            "peak_rss_mb": peak, "rss_growth_mb": None if peak is None else round(peak - rss, 1),
+        })
+
+        ## the phases of the whole run are written before the workers are forked with them.
+        if _trace["job"] is None:
+            flush_trace()
+
+
+def get_peak_rss():
+    ## in KB on Linux and in bytes on macOS, not available on Windows.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def read_trace(path):
+    if path.endswith(".csv"):
+        with open(path, newline="") as file:
+            records = list(csv.DictReader(file))
+        for record in records:
+            record["job"] = json.loads(record["job"])
+            for field in FIELDS[3:]:
+                record[field] = float(record[field]) if record[field] else None
+        return records
+    with open(path) as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def get_phase_totals(records):
+    """
+    The calls, total and longest wall time and the CPU time of each phase of each maker of the trace records,
+    in the order the phases first ran.
+    """
+    phases = {}
+    for record in records:
+        totals = phases.setdefault((record["maker"], record["phase"]), [0, 0.0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += record["wall"]
+        totals[2] += record["cpu"]
+        totals[3] = max(totals[3], record["wall"])
+    return [
+        {"maker": maker, "phase": name, "calls": calls, "total": wall, "mean": wall / calls, "cpu": cpu, "max": longest}
+        for (maker, name), (calls, wall, cpu, longest) in phases.items()
+    ]
+
+
+def print_trace_summary(path, top=5):
+    """
+    Prints the time of each phase of each maker over the run and the leaders taking the longest, with their peak RSS.
+    """
+    flush_trace()
+    records = read_trace(path)
+    if not records:
+        return
+
+    jobs = {}
+    for record in records:
+        if record["job"] is not None:
+            key = json.dumps(record["job"])
+            job = jobs.setdefault(key, [0.0, 0.0])
+            job[0] += record["wall"]
+            job[1] = max(job[1], record["peak_rss_mb"] or 0.0)
+
+    print("{:<22}{:<24}{:>7}{:>10}{:>10}{:>10}".format("maker", "phase", "calls", "wall s", "cpu s", "max s"))
+    for totals in get_phase_totals(records):
+        print("{:<22}{:<24}{:>7}{:>10.2f}{:>10.2f}{:>10.2f}".format(
+            totals["maker"], totals["phase"], totals["calls"], totals["total"], totals["cpu"], totals["max"]))
+
+    print("the longest leaders:")
+    for key, (wall, peak) in sorted(jobs.items(), key=lambda item: -item[1][0])[:top]:
+        print("  {:.2f}s  {:.0f} MB  {}".format(wall, peak, key))
+
+
+def set_progress(enabled):
+    ## the progress bars of the makers and of the batch.
+    _progress["disable"] = not enabled
+
+
+def progress(iterable=None, **args):
+    """
+    Same as tqdm, hidden after set_progress(False).
+    """
+    return tqdm(iterable, disable=_progress["disable"], **args)
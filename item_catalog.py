@@ -0,0 +1,80 @@
+class ItemCatalog:
+    """
+    The item codes of the survey, built once per run from the item code tables of PreprocessedSurvey.
+    Maps an item ID to its current code and short text, a category to its items, and a current code to its past and benchmark code,
+    so the makers look an item up in a dict instead of filtering the item tables on every call.
+    """
+
+    def __init__(self, item_pd, unmerged_item_pd, rest_item_pd, both_item_pd, benchmark_item_pd, category_pd):
+        ## the merged A/B pairs only keep the A item, its text is the joined text of the pair.
+        self._rows = list(zip(item_pd["Item ID"], item_pd["Unique Item Code"]))
+        self._codes = {}
+        self._texts = {}
+        self._code_texts = {}
+        for item_id, code, text in zip(item_pd["Item ID"], item_pd["Unique Item Code"], item_pd["Short Text [2020 onward]"]):
+            self._codes.setdefault(item_id, code)
+            self._texts.setdefault(item_id, text)
+            self._code_texts.setdefault(code, text)
+
+        ## the B item of a pair still has a past and benchmark code, it's used before the pairs are merged.
+        self._item_ids = {}
+        for item_id, code in zip(unmerged_item_pd["Item ID"], unmerged_item_pd["Unique Item Code"]):
+            self._item_ids.setdefault(code, item_id)
+
+        ## an item asked in both years keeps its code, else it's found by the item ID of the past only items.
+        rest_codes = self._getFirstCodes(rest_item_pd)
+        both_codes = set(both_item_pd["Unique Item Code"])
+        benchmark_codes = self._getFirstCodes(benchmark_item_pd)
+
+        self._past_codes = {}
+        self._benchmark_codes = {}
+        for code, item_id in self._item_ids.items():
+            past_code = rest_codes.get(item_id)
+            if past_code is None and code in both_codes:
+                past_code = code
+            self._past_codes[code] = past_code
+            self._benchmark_codes[code] = benchmark_codes.get(item_id)
+
+        ## the items of each category in the order of the category sheet.
+        self._category_items = {}
+        for item_id, category in zip(category_pd["Item ID in 2020 Survey"], category_pd["2020 Category"]):
+            self._category_items.setdefault(category, []).append(item_id)
+        self.categories = list(self._category_items)
+
+    def _getFirstCodes(self, items):
+        codes = {}
+        for item_id, code in zip(items["Item ID"], items["Unique Item Code"]):
+            codes.setdefault(item_id, code)
+        return codes
+
+    def getCode(self, item_id):
+        return self._codes[item_id]
+
+    def getCodes(self, item_ids):
+        ## in the order of the item table, like filtering it with isin.
+        item_ids = set(item_ids)
+        return [code for item_id, code in self._rows if item_id in item_ids]
+
+    def getItemId(self, code):
+        return self._item_ids[code]
+
+    def getText(self, item_id):
+        return self._texts[item_id]
+
+    def getTextByCode(self, code):
+        return self._code_texts[code]
+
+    def getItemIds(self, category):
+        return self._category_items[category]
+
+    def getPastCode(self, code):
+        """
+        The code of the item in the past survey, None if it was not asked.
+        """
+        return self._past_codes.get(code)
+
+    def getBenchmarkCode(self, code):
+        """
+        The code of the item in the external benchmark, None if it has none.
+        """
+        return self._benchmark_codes.get(code)
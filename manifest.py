@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+from python_values import json_default
+
+
+## folder of the manifest entries, next to the reports.
+MANIFEST_FOLDER = ".manifest"
+
+## the settings which change how a run goes, but not the reports.
+RUN_SETTINGS = ["workers", "streaming", "incremental", "serve", "trace", "progress"]
+
+## the input workbooks read as a whole by every report, the demographics are keyed per leader.
+SHARED_INPUTS = ["raw_data", "raw_data_past", "item_code", "heatmap_color", "benchmark", "how to use", "gm_levels", "image"]
+
+
+class BuildManifest:
+    """
+    The key of the inputs each job was built from, kept in the output folder with the reports it wrote,
+    so a rerun skips the jobs whose inputs did not change.
+    The key covers the code, the settings, the shared input workbooks and the set of answered respondents,
+    plus the demographics rows of the leader's parent org (all of them for the overall, GM and site lead jobs).
+    Each job writes its own entry, so the entries of the forked workers never clash.
+    """
+
+    def __init__(self, survey, **args):
+        self.survey = survey
+        self.folder = os.path.join(args['output_folder'], MANIFEST_FOLDER)
+
+        digest = hashlib.sha1()
+        settings = {key: value for key, value in args.items() if key not in RUN_SETTINGS}
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode("utf-8"))
+
+        ## the report code itself, a change of the layout rebuilds everything.
+        for path in _get_code_files():
+            digest.update(_read_file(path))
+        for setting in SHARED_INPUTS:
+            digest.update(_read_file(args['input_folder'] + "/" + args[setting]))
+
+        ## the overall columns count every answered respondent.
+        for respondents in [survey.respondents, survey.past_respondents]:
+            digest.update(str(respondents.worker_ids[respondents.answered].tolist()).encode("utf-8"))
+
+        self._digest = digest.hexdigest()
+
+    def getKey(self, job):
+        digest = hashlib.sha1((self._digest + _dump(job)).encode("utf-8"))
+        for tree in [self.survey.org_tree, self.survey.past_org_tree]:
+            rows = self._getRows(tree, job)
+            demographics = tree.demographics if rows is None else tree.demographics.iloc[rows]
+            digest.update(str(list(demographics.columns)).encode("utf-8"))
+            digest.update(pd.util.hash_pandas_object(demographics, index=False).to_numpy().tobytes())
+        return digest.hexdigest()
+
+    def _getRows(self, tree, job):
+        ## the rows of the parent org hold the org, its direct reports and the names in the report.
+        leader_id = job[0]
+        if leader_id == 999999 or len(job) > 1:
+            return None
+        try:
+            level = self.survey.org_tree.level(leader_id)
+            rows = tree.rows(level, leader_id)
+            if level >= 3:
+                supervisor_id = self.survey.org_tree.entry(leader_id)["Supervisor Level {} ID".format(level - 1)].values[0]
+                rows = np.union1d(rows, tree.rows(level - 1, supervisor_id))
+            return np.sort(rows)
+        except:
+            return None
+
+    def lookup(self, job, key):
+        """
+        The entry of the job if it was built from the same key and all its reports are still there, else None.
+        """
+        try:
+            with open(self._getPath(job), "r") as file:
+                entry = json.load(file)
+        except:
+            return None
+        if entry["key"] != key or not all(os.path.exists(path) for path in entry["files"]):
+            return None
+        return entry
+
+    def record(self, job, key, files, result):
+        ## write the entry in place at once, a job stopped halfway is rebuilt on the next run.
+        os.makedirs(self.folder, exist_ok=True)
+        path = self._getPath(job)
+        with open(path + ".tmp", "w") as file:
+            json.dump({"job": job, "key": key, "files": files, "result": result}, file, default=json_default)
+        os.replace(path + ".tmp", path)
+
+    def _getPath(self, job):
+        return os.path.join(self.folder, hashlib.sha1(_dump(job).encode("utf-8")).hexdigest()[:16] + ".json")
+
+
+def _get_code_files():
+    ## the modules of this folder the running script imported, and the script itself, not the other scripts next to them.
+    folder = os.path.dirname(os.path.abspath(__file__))
+    paths = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, "__file__", None)
+        if path and path.endswith(".py") and os.path.dirname(os.path.abspath(path)) == folder:
+            paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def _read_file(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def _dump(job):
+    return json.dumps(job, default=json_default)
@@ -1,8 +1,10 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
 import openpyxl
 import copy
-from openpyxl.styles import Font, Alignment, PatternFill, Color, Border, Side, numbers
+from openpyxl.styles import Color
 from openpyxl.drawing.image import Image
 from openpyxl.utils import cell as ce
 from openpyxl.utils.units import points_to_pixels as f2p
@@ -13,7 +15,19 @@ from openpyxl.chart import BarChart, Series, Reference
 from openpyxl.chart.shapes import GraphicalProperties
 from openpyxl.chart.label import DataLabelList
 from decimal import Decimal
-from tqdm import tqdm
+from io import BytesIO
+from survey_data import PreprocessedSurvey, MISSING
+from scoring import get_scores, get_count_scores, get_state_scores
+from score_cube import Counts
+from survey_inputs import SurveyInputs
+from batch import run_batch, leader_jobs, print_timings
+from streaming import StreamingWorkbook
+from report_styles import ReportStyles, is_tested_openpyxl
+from report_template import SheetTemplate
+from manifest import BuildManifest
+from score_store import ScoreStore, STORE_FILE, get_score_rows
+from report_service import ReportService
+from instrumentation import progress, set_progress, phase, start_trace, trace_job, print_trace_summary, TRACE_FILE
 
 
 def normal_round(num, ndigits=0):
@@ -30,7 +44,7 @@ def normal_round(num, ndigits=0):
 
 class DemographicFileMaker:
 
-    def __init__(self, **args):
+    def __init__(self, inputs=None, **args):
         ## initialize the object by specifying input and output files. 
         self.image_src = args['image']
 
@@ -46,6 +60,7 @@ class DemographicFileMaker:
         self.input_source = args['input_folder']
         self.how2use_file = args['how to use']
         self.GM_levels_file = args['gm_levels']
+        self.streaming = args.get('streaming', True) and is_tested_openpyxl()
         
         self.performance_order = [
             "Exceptional",
@@ -60,6 +75,9 @@ class DemographicFileMaker:
         self.past_year = self.demographics_past_file[:4]
 
         self.GM_region_human_parentorg = 0
+
+        self.survey = None
+        self.inputs = inputs if inputs is not None else SurveyInputs(**args)
     
     def setLeader(self, id, GM=False, site_lead=False):
         self.use_affiliate = False
@@ -72,26 +90,39 @@ class DemographicFileMaker:
     def setGMParentFlag(self, value):
         self.GM_region_human_parentorg = value
 
+    def setSurvey(self, survey):
+        self.survey = survey
+
+    def getSurvey(self):
+        ## build the leader-independent state once, unless it is shared by another maker.
+        if self.survey is None:
+            self.survey = PreprocessedSurvey(self.origin_raw_data_pd, self.origin_raw_data_past_pd, self.item_code_pd,
+                self.origin_category_pd, self.origin_demographics_pd, self.demographics_past_pd)
+        return self.survey
+
     def readAllFiles(self):
-        ## read files and save it in object data.
-        self.origin_raw_data_pd = pd.read_excel(self.input_source + "/" + self.raw_data_file, engine="openpyxl")
-        self.origin_raw_data_past_pd = pd.read_excel(self.input_source + "/" + self.raw_data_past_file, engine="openpyxl")
-        self.item_code_pd = pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="ItemCodeSTAR")
-        self.origin_category_pd =  pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="CurrentCategorySTAR")
-        self.origin_demographics_pd = pd.read_excel(self.input_source + "/" + self.demographics_file, engine="openpyxl")
-        self.demographics_past_pd = pd.read_excel(self.input_source + "/" + self.demographics_past_file, engine="openpyxl")
-        self.heatmap_color_pd = pd.read_excel(self.input_source + "/" + self.heatmap_color_file, engine="openpyxl")
-        self.benchmark_pd = pd.read_excel(self.input_source + "/" + self.benchmark_file, engine="openpyxl")
-        self.leaders = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Leader")
-        self.GMs = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="GM")
-        self.site_leads = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Site Leader")
-        self.GM_levels = pd.read_excel(self.input_source + "/" + self.GM_levels_file, engine="openpyxl")
+        ## take the needed sheets from the shared inputs, each one is read on its first use.
+        self.origin_raw_data_pd = self.inputs.origin_raw_data_pd
+        self.origin_raw_data_past_pd = self.inputs.origin_raw_data_past_pd
+        self.item_code_pd = self.inputs.item_code_pd
+        self.origin_category_pd = self.inputs.origin_category_pd
+        self.origin_demographics_pd = self.inputs.origin_demographics_pd
+        self.demographics_past_pd = self.inputs.demographics_past_pd
+        self.logo = self.inputs.logo
+        self.heatmap_palette = self.inputs.heatmap_palette
+        self.benchmark_pd = self.inputs.benchmark_pd
+        self.leaders = self.inputs.leaders
+        self.GMs = self.inputs.GMs
+        self.site_leads = self.inputs.site_leads
+        self.GM_levels = self.inputs.GM_levels
 
     def calculateValues(self):
         
         ## do some process referred to individual leader ID.
-        self._preProcess()
-        _ = self._prepareColumnsForID()
+        with phase("DemographicFileMaker", "_preProcess"):
+            self._preProcess()
+        with phase("DemographicFileMaker", "_prepareColumnsForID"):
+            _ = self._prepareColumnsForID()
         if _:
             return _
 
@@ -104,7 +135,7 @@ class DemographicFileMaker:
             category_list.append(key)
             item_list.append([0, key])
             temp_list = []
-            for item in self.category_pd.iloc[self._group_dict[key], 0]:
+            for item in self._catalog.getItemIds(key):
                 item_list.append([1, item])
                 temp_list.append(item)
             item_dict.update({key:temp_list})
@@ -112,14 +143,15 @@ class DemographicFileMaker:
         self._item_list = item_list
 
         ## do main calculation process by iterating over the category list.
-        for category in tqdm(category_list, desc="iterating over the list of category"):
-            sub_id_list = item_dict[category]
+        with phase("DemographicFileMaker", "_calculateEachRow"):
+            for category in progress(category_list, desc="iterating over the list of category"):
+                sub_id_list = item_dict[category]
 
-            ## filter the source data frame to have columns belonged to each category.
-            self._filterResource(sub_id_list)
+                ## filter the source data frame to have columns belonged to each category.
+                self._filterResource(sub_id_list)
 
-            ## based on the filtered source, calculate the values for each row.
-            self._calculateEachRow(category)
+                ## based on the filtered source, calculate the values for each row.
+                self._calculateEachRow(category)
        
     def writeOutput(self):
 
@@ -141,11 +173,16 @@ class DemographicFileMaker:
         os.makedirs(self.output_source + self.output_path, exist_ok=True)
 
         ## and write the output file.
-        self.book.save(path)
+        with phase("DemographicFileMaker", "save"):
+            self.book.save(path)
 
     def getWorkBook(self):
         return self.book
 
+    def getScores(self):
+        ## the computed scores of the leader, before makeReport turns the history column into deltas.
+        return get_score_rows(self.precious_dict, self.first_row)
+
     def makeReport(self):
 
         ## eliminate columns of which respondents are lower than 4.
@@ -177,7 +214,7 @@ class DemographicFileMaker:
             "\n" + f"{self._participated:,d}" + ' / ' + f"{self._invited:,d}" + "\n" + "(Participated / Invited)"
 
         ## prepare image.
-        img  = Image(self.input_source + "/" + self.image_src)
+        img  = Image(BytesIO(self.logo))
         img.height = 90
         img.width = 110
 
@@ -185,25 +222,12 @@ class DemographicFileMaker:
         total_rows = 4 + len(self._item_list)
 
         ## make a workbook and sheet.
-        self.book = openpyxl.Workbook()
+        self.book = StreamingWorkbook() if self.streaming else openpyxl.Workbook()
         sheet = self.book.active
         sheet.title = "{} Demographic Trends".format(self.current_year)
 
         ## set styles like font, color, direction, border...
-        ft = Font(name="Arial", size=8)
-        ft_bold = Font(name="Arial", size=8, bold=True)
-        light_na_font = Font(name="Arial", size=8, color="999999")
-        bold_na_font = Font(name="Arial", size=8, color="999999", bold=True)
-        vertical = Alignment(textRotation=90, horizontal='center')
-        center_alignment = Alignment(horizontal='center')
-        right_alignment = Alignment(horizontal='right', vertical='center')
-        grey_back = PatternFill("solid", fgColor="EEEEEE")
-        white_back = PatternFill("solid", fgColor="FFFFFF")
-        side = Side(style='thin', color="CCCCCC")
-        thin_border = Border(left=side,
-                     right=side,
-                     top=side,
-                     bottom=side)
+        styles = ReportStyles(self.book)
 
         ## merge all needed columns and rows.
         col_num = 1
@@ -216,7 +240,7 @@ class DemographicFileMaker:
                 delta += 1
             end_col = delta + col_num
             cell = sheet.cell(row=1, column=col_num)
-            cell.font = ft
+            styles.apply(cell, font=styles.font)
             cell.value = "" if key == "delta" else key
             sheet.merge_cells(start_row=1, start_column=col_num, end_row=2, end_column=end_col)
             col_num += delta + 2
@@ -227,12 +251,12 @@ class DemographicFileMaker:
         ## set empty cells white.
         for row in range(1, total_rows + 40 + 1):
             for col in range(1, col_num - 2 + 40 + 1):
-                sheet.cell(row=row, column=col).fill = white_back
+                styles.apply(sheet.cell(row=row, column=col), fill=styles.white_back)
 
         ## prepare the whole data to be placed in the sheet.
         len_sub_key = 0
         frames = []
-        for key in tqdm(self.precious_dict, desc="prepare the whole data"):
+        for key in progress(self.precious_dict, desc="prepare the whole data"):
             sub_dict = self.precious_dict[key]
             
             ## prepare and write the first column data.
@@ -244,20 +268,17 @@ class DemographicFileMaker:
                     if criteria == 0:
                         _list.append([item, 0])
                     elif criteria == 1:
-                        _list.append([self._item_pd[self._item_pd["Item ID"] == item]["Short Text [2020 onward]"].values[0], 1])
+                        _list.append([self._catalog.getText(item), 1])
                 
                 ## write the first column data and set styles.
                 for index, item in enumerate(_list):
                     cell = sheet.cell(row=3 + index, column=1)
                     if item[1] == 0:
-                        cell.font = ft_bold
+                        styles.apply(cell, font=styles.bold_font)
                     else:
-                        cell.font = ft
+                        styles.apply(cell, font=styles.font)
 
-                    cell.border = thin_border
-                    cell.fill = grey_back
-                    cell.alignment = right_alignment
-                    cell.alignment = cell.alignment.copy(horizontal="left")
+                    styles.apply(cell, border=styles.thin_border, fill=styles.grey_back, alignment=styles.left_alignment)
 
                     ## set value to cell.
                     try:
@@ -311,8 +332,8 @@ class DemographicFileMaker:
                     for criteria, item in self._item_list:
                         origin_item = item
                         if criteria == 1:
-                            origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                            item = self._get_past_field_name_by_current_name(origin_item)
+                            origin_item = self._catalog.getCode(item)
+                            item = self._catalog.getPastCode(origin_item)
                         try:
                             _ = sub_item[item]
                             if _[0] != "N/A":
@@ -325,8 +346,8 @@ class DemographicFileMaker:
                     for criteria, item in self._item_list:
                         origin_item = item
                         if criteria == 1:
-                            origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                            item = self._get_benchmark_field_name_by_current_name(origin_item)
+                            origin_item = self._catalog.getCode(item)
+                            item = self._catalog.getBenchmarkCode(origin_item)
                         try:
                             _ = sub_item[item]
                             if _[0] != "N/A":
@@ -337,7 +358,7 @@ class DemographicFileMaker:
                 else:
                     for criteria, item in self._item_list:
                         if criteria == 1:
-                            item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
+                            item = self._catalog.getCode(item)
 
                         _list.append(sub_item[item])
                     
@@ -358,30 +379,27 @@ class DemographicFileMaker:
         gilead_org = frames[0]
 
         ## write the rest of the columns and set styles.
-        for col_index, column in enumerate(tqdm(frames, desc="formating and styling")):
+        for col_index, column in enumerate(progress(frames, desc="formating and styling")):
             for row_index, item in enumerate(column):
                 cell = sheet.cell(row=3 + row_index, column = get_column_number(2 + col_index))
 
                 ## set borders of all cells.
-                cell.border = thin_border
+                styles.apply(cell, border=styles.thin_border)
 
                 ## set background grey of the row->4.
                 if row_index == 1:
-                    cell.fill = grey_back
-                    cell.number_format = numbers.BUILTIN_FORMATS[3]
+                    styles.apply(cell, fill=styles.grey_back, number_format=styles.count_format)
 
                 ## if the cell is placed in category row, set bold font style. Otherwise set general font style.
                 if item[1] == 0:
-                    cell.font = ft_bold
+                    styles.apply(cell, font=styles.bold_font)
                 else:
-                    cell.font = ft
-                cell.alignment = right_alignment
+                    styles.apply(cell, font=styles.font)
+                styles.apply(cell, alignment=styles.right_alignment)
 
                 ## set corresponding styles to row->3
                 if item[1] == 2:
-                    cell.alignment = center_alignment
-                    cell.alignment = vertical
-                    cell.fill = grey_back
+                    styles.apply(cell, alignment=styles.vertical_alignment, fill=styles.grey_back)
                 
                 ## set value to cell.
                 try:
@@ -392,20 +410,18 @@ class DemographicFileMaker:
                 ## make "N/A" cell lightgrey.
                 if row_index >= 1:
                     if item[0] == "N/A":
-                        cell.alignment = right_alignment
-                        cell.font = bold_na_font if item[1] == 0 else light_na_font
+                        styles.apply(cell, alignment=styles.right_alignment, font=styles.bold_na_font if item[1] == 0 else styles.na_font)
 
                 ## set background color and set format of percentage to rows below 5.
                 if row_index >= 2:
 
                     ## set format percentage.
-                    cell.number_format = numbers.FORMAT_PERCENTAGE
+                    styles.apply(cell, number_format=styles.percent_format)
 
                     ## compare the rest of the columns with your org and set background.
                     if col_index >= self.logic:
                         try:
-                            # cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(your_org[row_index][0], item[0])))
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(frames[self.logic - 1][row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(frames[self.logic - 1][row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -413,7 +429,7 @@ class DemographicFileMaker:
                     ## compare your org (2020) with parent org and set background.
                     elif col_index == self.logic - 1 and self.logic >= 2:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(frames[self.logic - 2][row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(frames[self.logic - 2][row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -421,7 +437,7 @@ class DemographicFileMaker:
                     ## compare parent org with gilead org and set background.
                     elif col_index == 1 and self.logic == 3:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(get_delta(gilead_org[row_index][0], item[0])))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(get_delta(gilead_org[row_index][0], item[0])))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -433,7 +449,7 @@ class DemographicFileMaker:
                         _ = 0
                     if col_index == self.logic + _ or col_index == self.logic + 1 + _:
                         try:
-                            cell.fill = PatternFill("solid", fgColor=self._get_color(normal_round(item[0] * 100)))
+                            styles.apply(cell, fill=self.heatmap_palette.fill(normal_round(item[0] * 100)))
                         except:
                             ## this skip the case of N/A
                             pass
@@ -442,7 +458,7 @@ class DemographicFileMaker:
                     if column[0][0][0] == "Δ":
                         try:
                             if item[0] > 0.005:
-                                cell.number_format = "+0%"
+                                styles.apply(cell, number_format=styles.plus_format)
                         except:
                             pass
 
@@ -467,16 +483,16 @@ class DemographicFileMaker:
         sheet.freeze_panes = ce.get_column_letter(self.logic + 3) + '5'
 
         ## push content right in A3, A4.
-        sheet['A3'].alignment = right_alignment
-        sheet['A4'].alignment = right_alignment
+        styles.apply(sheet['A3'], alignment=styles.right_alignment)
+        styles.apply(sheet['A4'], alignment=styles.right_alignment)
 
         ## insert picture and set background white
-        sheet['A3'].fill = white_back
+        styles.apply(sheet['A3'], fill=styles.white_back)
         size = XDRPositiveSize2D(p2e(115), p2e(95))
         marker = AnchorMarker(col=0, colOff=p2e(0), row=2, rowOff=p2e(10))
         img.anchor = OneCellAnchor(_from=marker, ext=size)
         
-        sheet['A3'].alignment = sheet['A3'].alignment.copy(wrapText=True, vertical="bottom")
+        styles.apply(sheet['A3'], alignment=styles.picture_alignment)
         sheet.add_image(img)
 
     def _get_names_from_field(self, field_list):
@@ -484,13 +500,24 @@ class DemographicFileMaker:
         keys = [field[0] for field in field_list]
         return keys
 
+    def _getReportedFields(self, field_list):
+
+        ## a segment is shown with at least 4 respondents, in a section of at least 2 segments.
+        nums = {field[0]: int(field[1].sum()) for field in field_list}
+        field_list = [field for field in field_list if nums[field[0]] >= 4]
+        if len(set(self._get_names_from_field(field_list))) < 2:
+            return []
+        return field_list
+
 
     def _filterResource(self, id_list):
 
-        filter_item = self._item_pd[self._item_pd["Item ID"].isin(id_list)]["Unique Item Code"].tolist()
+        filter_item = self._catalog.getCodes(id_list)
 
         filter_item.insert(0, 'ExternalReference')
         self._filtered_raw_data = self.raw_data_pd[filter_item]
+        self._filtered_columns = self._filtered_raw_data.columns.values[1:]
+        self._filtered_values = self._filtered_raw_data.iloc[:, 1:].to_numpy()
 
         ## about history data.
         self._helper_past = False
@@ -499,13 +526,14 @@ class DemographicFileMaker:
             if index == 0:
                 filter_past_item.append(item)
             else:
-                new_item = self._get_past_field_name_by_current_name(item)
+                new_item = self._catalog.getPastCode(item)
                 if new_item != None:
                     filter_past_item.append(new_item)
                 else:
                     self._helper_past = True
         
         self._filtered_raw_past_data = self.raw_data_past_pd[filter_past_item]
+        self._filtered_past_columns = self._filtered_raw_past_data.columns.values[1:]
 
         ## about benchmark data.
         self._helper_benchmark = False
@@ -514,7 +542,7 @@ class DemographicFileMaker:
             if index == 0:
                 filter_benchmark_item.append(item)
             else:
-                new_item = self._get_benchmark_field_name_by_current_name(item)
+                new_item = self._catalog.getBenchmarkCode(item)
                 if new_item:
                     filter_benchmark_item.append(new_item)
                 else:
@@ -522,11 +550,6 @@ class DemographicFileMaker:
         
         self._filtered_benchmark_value = self.benchmark_pd[self.benchmark_pd["Unique Item Code"].isin(filter_benchmark_item)]
 
-    def _get_color(self, delta):
-        if abs(delta) > 25:
-            delta = delta // abs(delta) * 25
-        series = self.heatmap_color_pd[self.heatmap_color_pd["Delta"] == delta]
-        return str(hex(series["R"].values[0]))[2:] + str(hex(series["G"].values[0]))[2:] + str(hex(series["B"].values[0]))[2:]
 
     def _preProcess(self):
 
@@ -544,128 +567,31 @@ class DemographicFileMaker:
             except:
                 pass
 
-        ## make a item group and filter the able source.
-        self._item_pd = self.item_code_pd[self.item_code_pd["Type ID"] == "T01"]
-
-        self._benchmark_item_pd = self._item_pd[self._item_pd["External Benchmark"] == "e"]
-        self._item_pd = self._item_pd[self._item_pd["External Benchmark"] == "i"]
-
-        self._rest_item_pd = self._item_pd[~self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._rest_item_pd = self._rest_item_pd[self._rest_item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-        self._both_item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-
-        self.category_pd = self.origin_category_pd[self.origin_category_pd["Item ID in 2020 Survey"].isin(self._item_pd["Item ID"].tolist())]
-        self.category_pd = self.category_pd.drop_duplicates(subset=["Item ID in 2020 Survey"]).reset_index(drop=True)
-        self.order_category = self.category_pd.drop_duplicates(subset=["2020 Category"]).loc[:, "2020 Category"].tolist()
-
-        self._group_dict = self.category_pd.groupby(["2020 Category"]).groups
-
-        self.raw_data_pd = self.origin_raw_data_pd.iloc[2:].reset_index(drop=True)
-
-        ## filter the able source from history file.
-        self.raw_data_past_pd = self.origin_raw_data_past_pd.iloc[2:].reset_index(drop=True)
-
-        ## Convert numeric values into favorable or not.
-        ## [1, 2, 3] -> 0, [4, 5] -> 1, [all others] -> ''
-        for field in self._item_pd["Unique Item Code"]:
-            new_list = []
-            for item in self.raw_data_pd[field].tolist():
-                if item < 4 and item > 0:
-                    new_list.append(0)
-                elif item >= 4 and item <= 5:
-                    new_list.append(1)
-                else:
-                    new_list.append('')
-            self.raw_data_pd[field] = new_list
-            
-            ## do the same process about history data.
-            try:
-                field = self._get_past_field_name_by_current_name(field)
-                new_list_past = []
-                for item in self.raw_data_past_pd[field].tolist():
-                    if item < 4 and item > 0:
-                        new_list_past.append(0)
-                    elif item >= 4 and item <= 5:
-                        new_list_past.append(1)
-                    else:
-                        new_list_past.append('')
-                self.raw_data_past_pd[field] = new_list_past
-            except:
-                pass
-
-        ## new feature -> process A/B pair.
-        pairs = self._item_pd[self._item_pd["AB Code"].isin(["A", "B"])].reset_index(drop=True)
-        pairs_dict = pairs.groupby(["Item ID"]).groups
-
-        for key in pairs_dict:
-
-            _list = pairs_dict[key]
-            pairs_row = pairs.iloc[_list, :]
-            item_list = pairs_row["Unique Item Code"].tolist()
-            text_list = pairs_row["Short Text [2020 onward]"].tolist()
-            new_text = "/".join(text_list)
-            self._item_pd = self._item_pd[~(self._item_pd["Unique Item Code"] == item_list[1])].reset_index(drop=True)
-            _index = self._item_pd[self._item_pd["Unique Item Code"] == item_list[0]].index
-            self._item_pd.loc[_index, "Short Text [2020 onward]"] = new_text
-
-            column_pair = self.raw_data_pd[item_list]
-            _list = []
-            for index in range(len(column_pair.index)):
-                _row = column_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                    _list.append('')
+        ## take the shared leader-independent state.
+        survey = self.getSurvey()
+        self._catalog = survey.item_catalog
 
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_pd = self.raw_data_pd.drop(columns=[item_list[1]])
-            self.raw_data_pd[item_list[0]] = _pd
+        self.order_category = self._catalog.categories
 
-        self.demographics_pd = self.origin_demographics_pd
+        self.raw_data_pd = survey.raw_data_pd
+        self.raw_data_past_pd = survey.raw_data_past_pd
 
-        ## convert the demographics data to include only answered entries.
-        self._invited_demographics_data = self.demographics_pd[self.demographics_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_data = self._invited_demographics_data[self._invited_demographics_data.loc[:, "Worker ID"].isin(self.raw_data_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self.demographics_pd = survey.demographics_pd
+        self._invited_demographics_data = survey.invited_demographics_data
+        self._answered_demographics_data = survey.answered_demographics_data
         self._gilead_org = self._answered_demographics_data
 
-        ## do the same process about history data.
-        self._invited_demographics_past_data = self.demographics_past_pd[self.demographics_past_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_past_data = self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, "Worker ID"].isin(self.raw_data_past_pd['ExternalReference'].tolist())].reset_index(drop=True)
-    
-        if self.GM:
-            self._gm_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.GM] == 1].reset_index(drop=True)
-            self._gm_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.GM] == 1].reset_index(drop=True)
-
-        if self.site_lead:
-            self._site_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.site_lead] == 1].reset_index(drop=True)
-            self._site_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.site_lead] == 1].reset_index(drop=True)      
-
-    def _get_past_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            new_field_name = self._rest_item_pd[self._rest_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            new_field_name = None
-
-        if new_field_name == None:
-            try:
-                new_field_name = self._both_item_pd[self._both_item_pd["Unique Item Code"] == field_name]["Unique Item Code"].values[0]
-            except:
-                new_field_name = None
+        self._invited_demographics_past_data = survey.invited_demographics_past_data
+        self._answered_demographics_past_data = survey.answered_demographics_past_data
+        self._respondents = survey.respondents
+        self._past_respondents = survey.past_respondents
+        self._segments = self._respondents.segments
+        self._past_segments = self._past_respondents.segments
+        self._past_cube = survey.past_score_cube
+        self._org_tree = survey.org_tree
+        self._past_org_tree = survey.past_org_tree
 
-        return new_field_name
 
-    def _get_benchmark_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            field_name = self._benchmark_item_pd[self._benchmark_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            field_name = None
-        
-        return field_name
 
     def _prepareColumnsForID(self):
         ## find the supervisor level of the given leader id.
@@ -673,16 +599,13 @@ class DemographicFileMaker:
         self.first_row = {}
         _temp = "Supervisor Level {} ID"
 
-        leader_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._leader_id]
+        leader_entry = self._org_tree.entry(self._leader_id)
 
         if self._leader_id == 999999:
             self.logic = 1
             leader_level = 1
         else:
-            for index, level in enumerate(leader_entry.loc[:, _temp.format(2) : _temp.format(10)]):
-                if (leader_entry[level] == self._leader_id).tolist()[0]:
-                    leader_level = index + 2
-                    break
+            leader_level = self._org_tree.level(self._leader_id)
         
         self.output_path = "/" + leader_entry["Worker Name"].values[0]
         self.file_name = leader_entry["Worker Last Name"].values[0]
@@ -690,28 +613,27 @@ class DemographicFileMaker:
         _name = leader_entry["Worker Name"].values[0]
 
         supervisor_level = leader_level - 1
-        direct_level = leader_level + 1
 
         if leader_level >= 3:
             self.logic = 3
             self._supervisor_id = leader_entry.loc[:, _temp.format(supervisor_level)].values[0]
-            _supervisor_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._supervisor_id]
+            _supervisor_entry = self._org_tree.entry(self._supervisor_id)
             self._supervisor_last_name = _supervisor_entry["Worker Last Name"].values[0]
 
             ## get Parent group.
-            self._parent_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(supervisor_level)] == self._supervisor_id].reset_index(drop=True)
+            self._parent_mask = self._segments.org(supervisor_level, self._supervisor_id)
 
         elif leader_level == 2:
             self.logic = 2
 
         ## get Your Org data
         if self.logic == 1:
-            self._your_org = self._answered_demographics_data
+            self._your_mask = self._segments.answered()
             self._invited = len(self._invited_demographics_data.index)
         else:
             if self.GM:
                 _name = self.GM
-                self._your_org = self._gm_demographics_data
+                self._your_mask = self._segments.mask(self.GM, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.GM] == 1].index)
 
                 temp_level = "GM Level {} ID"
@@ -728,58 +650,58 @@ class DemographicFileMaker:
                         _org_name = self.GM_levels[self.GM_levels["GM ID"] == _org_id]["GM Org"].values[0]
                         self.GM_parent = _org_name
                         
-                        self._parent_org = self._answered_demographics_data[self._answered_demographics_data[_org_name] == 1].reset_index(drop=True)
+                        self._parent_mask = self._segments.mask(_org_name, 1)
             elif self.site_lead:
                 _name = self.site_lead
-                self._your_org = self._site_demographics_data
+                self._your_mask = self._segments.mask(self.site_lead, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.site_lead] == 1].index)
 
             else:
-                self._your_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
-                self._invited = len(self._invited_demographics_data[self._invited_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
+                self._your_mask = self._segments.org(leader_level, self._leader_id)
+                self._invited = self._org_tree.invited(leader_level, self._leader_id)
         
-        if len(self._your_org.index) < 4:
+        if self._your_mask.sum() < 4:
             return self._leader_id, _name
 
         ## calculate nums of participated
-        self._participated = len(self._your_org.loc[:, "Worker ID"])
+        self._participated = int(self._your_mask.sum())
         
-        ## get your history group
+        ## get your history group, its key in the past score cube.
         if self.GM:
-            self._your_past_org = self._gm_demographics_past_data
+            self._your_past_org = self.GM
         elif self.site_lead:
-            self._your_past_org = self._site_demographics_past_data
+            self._your_past_org = self.site_lead
         else:
             if self.logic == 1:
-                self._your_past_org = self._answered_demographics_past_data
+                self._your_past_org = self._past_cube.full_span
             else:
-                self._your_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                self._your_past_org = self._past_org_tree.span(leader_level, self._leader_id)
 
 
         ## make direct report fields.
         if not self.GM:
             self._direct_report_field = []
-            temp_org = self._your_org[~(self._your_org.loc[:, "Worker ID"] == self._leader_id)].reset_index(drop=True)
+            temp_mask = self._your_mask & ~self._segments.mask("Worker ID", self._leader_id)
             
             if self.site_lead:
-                temp_org = temp_org[temp_org.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                temp_mask = temp_mask & self._segments.org(leader_level, self._leader_id)
 
-            _dict = temp_org.groupby(_temp.format(direct_level)).groups
+            _dict = self._segments.directs(leader_level, self._leader_id, temp_mask)
             for key in _dict:
                 try:
-                    self._direct_report_field.append([self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == key].loc[:, "Worker Name"].values[0], _dict[key]])
+                    self._direct_report_field.append([self._org_tree.entry(key)["Worker Name"].values[0], _dict[key]])
                 except:
                     pass
 
         ## make grade group fields.
         self._grade_group_fields = []
-        _dict = self._your_org.groupby("Pay Grade Group").groups
+        _dict = self._segments.groups("Pay Grade Group", self._your_mask)
         for key in _dict:
             self._grade_group_fields.append([str(key), _dict[key]])
 
         ## make tenure group fields.
         self._tenure_group_fields = []
-        _dict = self._your_org.groupby("Length of Service Group").groups
+        _dict = self._segments.groups("Length of Service Group", self._your_mask)
         for key in _dict:
             if not key == "15+ Years":
                 self._tenure_group_fields.append([key, _dict[key]])
@@ -790,7 +712,7 @@ class DemographicFileMaker:
         
         ## make performance rating fields.
         self._performance_rating_fields = []
-        _dict = self._your_org.groupby("2019 Performance Rating").groups
+        _dict = self._segments.groups("2019 Performance Rating", self._your_mask)
         _list = _dict.keys()
         for key in self.performance_order:
             try:
@@ -806,7 +728,7 @@ class DemographicFileMaker:
 
         ## make talent cordinate fields.
         self._talent_cordinate_fields = []
-        _dict = self._your_org.groupby("2020 Talent Coordinate").groups
+        _dict = self._segments.groups("2020 Talent Coordinate", self._your_mask)
         for key in _dict:
             _key = key
             if key == "Unspecified":
@@ -815,13 +737,13 @@ class DemographicFileMaker:
         
         ## make gender fields.
         self._gender_fields = []
-        _dict = self._your_org.groupby("Gender").groups
+        _dict = self._segments.groups("Gender", self._your_mask)
         for key in _dict:
             self._gender_fields.append([key, _dict[key]])
 
         ## make Ethnicity fields.
         self._ethnicity_fields = []
-        _dict = self._your_org.groupby("Ethnicity (US)").groups
+        _dict = self._segments.groups("Ethnicity (US)", self._your_mask)
         for key in _dict:
             if not key == "Non-US":
                 self._ethnicity_fields.append([key, _dict[key]])
@@ -832,43 +754,43 @@ class DemographicFileMaker:
 
         ## make age group fields.
         self._age_fields = []
-        _dict = self._your_org.groupby("Age Group").groups
+        _dict = self._segments.groups("Age Group", self._your_mask)
         for key in _dict:
             self._age_fields.append([key, _dict[key]])
 
         ## make country fields.
         self._country_fields = []
-        _dict = self._your_org.groupby("Country").groups
+        _dict = self._segments.groups("Country", self._your_mask)
         for key in _dict:
             self._country_fields.append([key, _dict[key]])
 
         ## make kite fields.
         self._kite_fields = []
-        _dict = self._your_org.groupby("Kite Employee Flag").groups
+        _dict = self._segments.groups("Kite Employee Flag", self._your_mask)
         for key in _dict:
             self._kite_fields.append([key, _dict[key]])
 
         ## make office type fields.
         self._office_fields = []
-        _dict = self._your_org.groupby("Office Type").groups
+        _dict = self._segments.groups("Office Type", self._your_mask)
         for key in _dict:
             self._office_fields.append([key, _dict[key]])
 
         ## make Region fields.
         self._region_fields = []
-        _dict = self._your_org.groupby("Location Level 2").groups
+        _dict = self._segments.groups("Location Level 2", self._your_mask)
         for key in _dict:
             self._region_fields.append([key, _dict[key]])
 
         ## make Department fields.
         self._department_fields = []
-        _dict = self._your_org.groupby("Department Level 2").groups
+        _dict = self._segments.groups("Department Level 2", self._your_mask)
         for key in _dict:
             self._department_fields.append([key, _dict[key]])
 
         ## make Gender x Ethnicity (US) fields.
         self._gender_ethnicity_fields = []
-        _dict = self._your_org.groupby(["Ethnicity (US)", "Gender"]).groups
+        _dict = self._segments.groups(["Ethnicity (US)", "Gender"], self._your_mask)
         _new_dict = copy.deepcopy(_dict)
         for key in _dict:
             _temp = _new_dict.pop(key)
@@ -923,7 +845,7 @@ class DemographicFileMaker:
                 for key in key_list:
                     real_key = key.strip()
                     try:
-                        _list = self._your_org[self._your_org[real_key] == 1].index
+                        _list = self._your_mask & self._segments.mask(real_key, 1)
                         self._affiliate_fields.append([key, _list])
                     except:
                         pass
@@ -946,11 +868,30 @@ class DemographicFileMaker:
 
                 for key in key_list:
                     try:
-                        _list = self._your_org[self._your_org[key] == 1].index
+                        _list = self._your_mask & self._segments.mask(key, 1)
                         self._affiliate_fields.append([key, _list])
                     except:
                         pass
 
+        ## leave out the segments the report suppresses, so they are never scored.
+        if not self.GM:
+            self._direct_report_field = self._getReportedFields(self._direct_report_field)
+        self._grade_group_fields = self._getReportedFields(self._grade_group_fields)
+        self._tenure_group_fields = self._getReportedFields(self._tenure_group_fields)
+        self._performance_rating_fields = self._getReportedFields(self._performance_rating_fields)
+        self._talent_cordinate_fields = self._getReportedFields(self._talent_cordinate_fields)
+        self._gender_fields = self._getReportedFields(self._gender_fields)
+        self._ethnicity_fields = self._getReportedFields(self._ethnicity_fields)
+        self._age_fields = self._getReportedFields(self._age_fields)
+        self._country_fields = self._getReportedFields(self._country_fields)
+        self._kite_fields = self._getReportedFields(self._kite_fields)
+        self._office_fields = self._getReportedFields(self._office_fields)
+        self._region_fields = self._getReportedFields(self._region_fields)
+        self._department_fields = self._getReportedFields(self._department_fields)
+        self._gender_ethnicity_fields = self._getReportedFields(self._gender_ethnicity_fields)
+        if self.use_affiliate:
+            self._affiliate_fields = self._getReportedFields(self._affiliate_fields)
+
         self.index_match = {
             "": ["Gilead Overall", "Parent Group", "Your Org ({})".format(self.current_year)],
             "Direct Reports (as of April 24, 2018)": sorted(self._get_names_from_field(self._direct_report_field)),
@@ -1001,25 +942,25 @@ class DemographicFileMaker:
     def _calculateEachRow(self, item):
         
         ## calculate Gilead overall %s
-        _dict, lens = self._calculateOverall(self._gilead_org, item)
+        _dict, lens = self._calculateOverall(self._respondents.answered, item)
         self.precious_dict[""]["Gilead Overall"].update(_dict)
         self.first_row.update({"Gilead Overall": lens})
 
         ## calculate Parent Group %s
         if self.logic == 3:
-            _dict, lens = self._calculateOverall(self._parent_org, item)
+            _dict, lens = self._calculateOverall(self._parent_mask, item)
             self.precious_dict[""]["Parent Group"].update(_dict)
             self.first_row.update({"Parent Group": lens})
 
         ## calculate Your Org(2018) %s
         if self.logic >= 2:
-            _dict, lens = self._calculateOverall(self._your_org, item)
+            _dict, lens = self._calculateOverall(self._your_mask, item)
             self.precious_dict[""]["Your Org ({})".format(self.current_year)].update(_dict)
             self.first_row.update({"Your Org ({})".format(self.current_year): lens})
 
         ## calculate Δ Your Org (2018) %s
         if len(self._filtered_raw_past_data.columns) > 1:
-            _dict, lens = self._calculateOverall(self._your_past_org, item, history=True)
+            _dict, lens = self._calculateHistory(self._past_cube.org(self._your_past_org), item)
             self.precious_dict["delta"]["Δ Your Org ({})".format(self.past_year)].update(_dict)
             self.first_row.update({"deltaΔ Your Org ({})".format(self.past_year): lens})
 
@@ -1084,93 +1025,32 @@ class DemographicFileMaker:
         ## calculate gender ethnicity %s
         self._calculateSubFields(self._gender_ethnicity_fields, "Gender x Ethnicity (US)", item)
 
-    def _calculateOverall(self, dataframe, item, history=False):
+    def _calculateOverall(self, mask, item):
 
         ## calcualte overall fields.
-        ids = dataframe.iloc[:, 0]
-        # nums = len(ids)
-        if history:
-            working_pd = self._filtered_raw_past_data[self._filtered_raw_past_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-        else:
-            working_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-        nums = len(working_pd.iloc[:, 0])
-        return self._get_sum(working_pd.iloc[:, 1:], nums, item, history), len(ids)
+        nums = int(mask.sum())
+        return get_scores(self._filtered_columns, self._filtered_values[mask], nums, item), nums
+
+    def _calculateHistory(self, counts, item):
+
+        ## calcualte the past fields of an org from its counts, the category is N/A.
+        columns = self._filtered_past_columns
+        return get_count_scores(columns, counts.get("favorable", columns), counts.get("valid", columns), item), counts.respondents
     
     def _calculateSubFields(self, dataframe, column_name, item):
 
         ## calculate the sum of all sub fields except overall fields.
         for field in dataframe:
             dictionary = self.precious_dict[column_name]
-            _list = field[1]
-            ids = self._your_org.iloc[_list, 0].tolist()
-            nums = len(ids)
-            working_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-            _dict = self._get_sum(working_pd.iloc[:, 1:], nums, item)
+            _mask = field[1]
+            nums = int(_mask.sum())
+            _dict = get_scores(self._filtered_columns, self._filtered_values[_mask], nums, item)
             dictionary[field[0]].update(_dict)
-            self.first_row.update({column_name + field[0]: len(ids)})
+            self.first_row.update({column_name + field[0]: nums})
     
-    def _get_sum(self, data, nums, item, implicity=False):
-
-        ## calculate the sum of favorable scores.
-        _dict = {}
-        determine_parent_na = False
-
-        for ind in range(len(data.columns)):
-            _ = data.iloc[:, ind]
-            is_empty_column = True
-            lens = nums
-            sub = 0
-            count_valid = 0
-            for __ in _:
-                if __ != '':
-                    is_empty_column = False
-                    sub += __
-                    count_valid += 1
-                else:
-                    lens -= 1
-            if is_empty_column:
-                _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                determine_parent_na = True
-            else:
-                if count_valid >= 4:
-                    _dict.update({data.columns.values[ind]: [sub / lens, 1]})
-                else:
-                    _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                    determine_parent_na = True
-        
-        if determine_parent_na:
-            _dict.update({item: ["N/A", 0]})
-        else:
-            total_lens = nums
-            total = 0
-            cols = len(data.columns)
-            for ind in range(nums):
-                _series = data.iloc[ind, :]
-                sub_sum = 0
-                _is_nan = False
-                for val in _series:
-                    if val != '':
-                        sub_sum += val
-                    else:
-                        _is_nan = True
-                        total_lens -= 1
-                        break
-
-                if not _is_nan:
-                    total += sub_sum / cols
-
-            if total_lens < 4:
-                _dict.update({item: ["N/A", 0]})
-            else:
-                _dict.update({item: [total / total_lens, 0]})
-
-        if implicity:
-                _dict.update({item: ["N/A", 0]})
-        return _dict
-
 class LTMaker:
 
-    def __init__(self, **args):
+    def __init__(self, inputs=None, **args):
         ## init method
         self.image_src = args['image']
 
@@ -1200,20 +1080,24 @@ class LTMaker:
 
         self.GM_region_human_parentorg = 0
 
+        self.survey = None
+        self._templates = {}
+        self.inputs = inputs if inputs is not None else SurveyInputs(**args)
+
     def readAllFiles(self):
-        ## read all needed files to make report.
-        self.origin_raw_data_pd = pd.read_excel(self.input_source + "/" + self.raw_data_file, engine="openpyxl")
-        self.origin_raw_data_past_pd = pd.read_excel(self.input_source + "/" + self.raw_data_past_file, engine="openpyxl")
-        self.item_code_pd = pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="ItemCodeSTAR")
-        self.origin_category_pd =  pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="CurrentCategorySTAR")
-        self.origin_demographics_pd = pd.read_excel(self.input_source + "/" + self.demographics_file, engine="openpyxl")
-        self.demographics_past_pd = pd.read_excel(self.input_source + "/" + self.demographics_past_file, engine="openpyxl")
-        self.heatmap_color_pd = pd.read_excel(self.input_source + "/" + self.heatmap_color_file, engine="openpyxl")
-        self.leaders = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Leader")
-        self.site_leads = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Site Leader")
-        self.GMs = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="GM")
-        self.how2use_pd = pd.read_excel(self.input_source + "/" + self.how2use_file, engine="openpyxl", sheet_name="Score Details How to Use")
-        self.GM_levels = pd.read_excel(self.input_source + "/" + self.GM_levels_file, engine="openpyxl")
+        ## take the needed sheets from the shared inputs, each one is read on its first use.
+        self.origin_raw_data_pd = self.inputs.origin_raw_data_pd
+        self.origin_raw_data_past_pd = self.inputs.origin_raw_data_past_pd
+        self.item_code_pd = self.inputs.item_code_pd
+        self.origin_category_pd = self.inputs.origin_category_pd
+        self.origin_demographics_pd = self.inputs.origin_demographics_pd
+        self.demographics_past_pd = self.inputs.demographics_past_pd
+        self.heatmap_palette = self.inputs.heatmap_palette
+        self.leaders = self.inputs.leaders
+        self.site_leads = self.inputs.site_leads
+        self.GMs = self.inputs.GMs
+        self.how2use_pd = self.inputs.how2use("Score Details How to Use")
+        self.GM_levels = self.inputs.GM_levels
 
     def setLeader(self, id, GM=False, site_lead=False):
         self.use_affiliate = False
@@ -1226,11 +1110,23 @@ class LTMaker:
     def setGMParentFlag(self, value):
         self.GM_region_human_parentorg = value
 
+    def setSurvey(self, survey):
+        self.survey = survey
+
+    def getSurvey(self):
+        ## build the leader-independent state once, unless it is shared by another maker.
+        if self.survey is None:
+            self.survey = PreprocessedSurvey(self.origin_raw_data_pd, self.origin_raw_data_past_pd, self.item_code_pd,
+                self.origin_category_pd, self.origin_demographics_pd, self.demographics_past_pd)
+        return self.survey
+
     def calculateValues(self):
         ## do some process referred to individual leader ID.
         self._item_list = []
-        self._preProcess()
-        self._prepareColumnsForID()
+        with phase("LTMaker", "_preProcess"):
+            self._preProcess()
+        with phase("LTMaker", "_prepareColumnsForID"):
+            self._prepareColumnsForID()
 
         item_list = []
         item_dict = {}
@@ -1241,24 +1137,28 @@ class LTMaker:
             category_list.append(key)
             item_list.append([0, key])
             temp_list = []
-            for item in self.category_pd.iloc[self._group_dict[key], 0]:
+            for item in self._catalog.getItemIds(key):
                 item_list.append([1, item])
                 temp_list.append(item)
             item_dict.update({key:temp_list})
 
         ## do main calculation process by iterating over the category list.
-        for category in tqdm(category_list, desc="iterating over the list of category"):
-            sub_id_list = item_dict[category]
+        with phase("LTMaker", "_calculateEachRow"):
+            for category in progress(category_list, desc="iterating over the list of category"):
+                sub_id_list = item_dict[category]
 
-            ## filter the source data frame to have columns belonged to each category.
-            self._filterResource(sub_id_list, category)
+                ## filter the source data frame to have columns belonged to each category.
+                self._filterResource(sub_id_list, category)
 
-            ## based on the filtered source, calculate the values for each row.
-            self._calculateEachRow(category)
+                ## based on the filtered source, calculate the values for each row.
+                self._calculateEachRow(category)
 
     def setWorkBook(self, book):
         self.book = book
 
+    def getScores(self):
+        return get_score_rows(self.precious_dict, self.first_row["current"], self.first_row["past"])
+
     def makeReport(self):
 
         ## eliminate columns of which respondents are lower than 4.
@@ -1299,20 +1199,7 @@ class LTMaker:
         # sheet.title = self.current_year + "vs." + self.past_year + " Longitudinal Trends"
 
         ## set styles like font, color, direction, border...
-        ft = Font(name="Arial", size=8)
-        ft_bold = Font(name="Arial", size=8, bold=True)
-        light_na_font = Font(name="Arial", size=8, color="999999")
-        bold_na_font = Font(name="Arial", size=8, color="999999", bold=True)
-        vertical = Alignment(textRotation=90, horizontal='center')
-        center_alignment = Alignment(horizontal='center')
-        right_alignment = Alignment(horizontal='right', vertical='center')
-        grey_back = PatternFill("solid", fgColor="EEEEEE")
-        white_back = PatternFill("solid", fgColor="FFFFFF")
-        side = Side(style='thin', color="CCCCCC")
-        thin_border = Border(left=side,
-            right=side,
-            top=side,
-            bottom=side)
+        styles = ReportStyles(self.book)
 
         ## merge all needed columns and rows.
         col_num = 1
@@ -1325,7 +1212,7 @@ class LTMaker:
                 delta += 1
             end_col = delta + col_num
             cell = sheet.cell(row=1, column=col_num)
-            cell.font = ft
+            styles.apply(cell, font=styles.font)
             cell.value = "" if key == "delta" else key
             sheet.merge_cells(start_row=1, start_column=col_num, end_row=2, end_column=end_col)
             col_num += delta + 2
@@ -1336,12 +1223,12 @@ class LTMaker:
         ## set empty cells white.
         for row in range(1, total_rows + 40 + 1):
             for col in range(1, col_num - 2 + 40 + 1):
-                sheet.cell(row=row, column=col).fill = white_back
+                styles.apply(sheet.cell(row=row, column=col), fill=styles.white_back)
 
         ## prepare the whole data to be placed in the sheet.
         frames = []
         len_sub_key = 0
-        for key in tqdm(self.precious_dict, desc="prepare the whole data"):
+        for key in progress(self.precious_dict, desc="prepare the whole data"):
             sub_dict = self.precious_dict[key]
 
             ## prepare and write the first column data.
@@ -1355,7 +1242,7 @@ class LTMaker:
                         if criteria == 0:
                             _list.append([item, 0])
                         elif criteria == 1:
-                            _list.append([self._item_pd[self._item_pd["Unique Item Code"] == item]["Short Text [2020 onward]"].values[0], 1])
+                            _list.append([self._catalog.getTextByCode(item), 1])
                     except:
                         pass
 
@@ -1363,14 +1250,11 @@ class LTMaker:
                 for index, item in enumerate(_list):
                     cell = sheet.cell(row=3 + index, column=1)
                     if item[1] == 0:
-                        cell.font = ft_bold
+                        styles.apply(cell, font=styles.bold_font)
                     else:
-                        cell.font = ft
+                        styles.apply(cell, font=styles.font)
 
-                    cell.border = thin_border
-                    cell.fill = grey_back
-                    cell.alignment = right_alignment
-                    cell.alignment = cell.alignment.copy(horizontal="left")
+                    styles.apply(cell, border=styles.thin_border, fill=styles.grey_back, alignment=styles.left_alignment)
 
                     ## set value to cell.
                     try:
@@ -1444,23 +1328,22 @@ class LTMaker:
                 sheet.column_dimensions[name].width = 4.5
 
         ## write the rest of the columns and set styles.
-        for col_index, column in enumerate(tqdm(frames, desc="formating and styling")):
+        for col_index, column in enumerate(progress(frames, desc="formating and styling")):
             for row_index, item in enumerate(column):
                 cell = sheet.cell(row=3 + row_index, column = get_column_number(2 + col_index))
 
                 ## set borders of all cells.
-                cell.border = thin_border
+                styles.apply(cell, border=styles.thin_border)
 
                 ## set background grey of the row->4.
                 if row_index <= 2:
-                    cell.fill = grey_back
-                    cell.number_format = numbers.BUILTIN_FORMATS[3]
+                    styles.apply(cell, fill=styles.grey_back, number_format=styles.count_format)
 
                 ## if the cell is placed in category row, set bold font style. Otherwise set general font style.
                 if item[1] == 0:
-                    cell.font = ft_bold
+                    styles.apply(cell, font=styles.bold_font)
                 else:
-                    cell.font = ft
+                    styles.apply(cell, font=styles.font)
                     
                     ## set value to cell.
                     try:
@@ -1468,28 +1351,25 @@ class LTMaker:
                     except:
                         cell.value = item[0]
 
-                cell.alignment = right_alignment
+                styles.apply(cell, alignment=styles.right_alignment)
 
                 ## set corresponding styles to row->3
                 if item[1] == 2:
-                    cell.alignment = center_alignment
-                    cell.alignment = vertical
-                    cell.fill = grey_back
+                    styles.apply(cell, alignment=styles.vertical_alignment, fill=styles.grey_back)
 
                 ## make "N/A" cell lightgrey.
                 if row_index >= 1:
                     if item[0] == "N/A":
-                        cell.alignment = right_alignment
-                        cell.font = bold_na_font if item[1] == 0 else light_na_font
+                        styles.apply(cell, alignment=styles.right_alignment, font=styles.bold_na_font if item[1] == 0 else styles.na_font)
 
                 ## set background color and set format of percentage to rows below 6.
                 if row_index >= 3:
 
                     ## set format percentage.
-                    cell.number_format = numbers.FORMAT_PERCENTAGE
+                    styles.apply(cell, number_format=styles.percent_format)
 
                     try:
-                        cell.fill = PatternFill("solid", fgColor=self._get_color(normal_round(item[0] * 100)))
+                        styles.apply(cell, fill=self.heatmap_palette.fill(normal_round(item[0] * 100)))
                     except:
                         pass
 
@@ -1501,7 +1381,7 @@ class LTMaker:
 
                     try:
                         if item[0] > 0.005:
-                            cell.number_format = "+0%"
+                            styles.apply(cell, number_format=styles.plus_format)
                     except:
                         pass
 
@@ -1518,48 +1398,50 @@ class LTMaker:
         sheet.freeze_panes = ce.get_column_letter(self.logic + 3) + '6'
 
         ## push content right in A3, A4, A5.
-        sheet['A3'].alignment = right_alignment
-        sheet['A4'].alignment = right_alignment
-        sheet['A5'].alignment = right_alignment
+        styles.apply(sheet['A3'], alignment=styles.right_alignment)
+        styles.apply(sheet['A4'], alignment=styles.right_alignment)
+        styles.apply(sheet['A5'], alignment=styles.right_alignment)
 
         ## insert picture and set background white
-        sheet['A3'].fill = white_back
+        styles.apply(sheet['A3'], fill=styles.white_back)
         # size = XDRPositiveSize2D(p2e(115), p2e(95))
         # marker = AnchorMarker(col=0, colOff=p2e(0), row=2, rowOff=p2e(10))
         # img.anchor = OneCellAnchor(_from=marker, ext=size)
 
-        sheet['A3'].alignment = sheet['A3'].alignment.copy(wrapText=True, vertical="bottom")
+        styles.apply(sheet['A3'], alignment=styles.picture_alignment)
         # sheet.add_image(img)
 
-        ## insert how to use sheet.
-        how_sheet = self.book.create_sheet("How to Use")
-        how_font = Font(name="Arial", size=10)
-        cell = how_sheet.cell(column=1, row=1)
+        ## insert how to use sheet, copied from the template rendered once per run.
+        if "how to use" not in self._templates:
+            self._templates["how to use"] = SheetTemplate(self._makeHowToUse)
+        self._templates["how to use"].copyTo(self.book.create_sheet("How to Use"), styles)
+
+    def _makeHowToUse(self, sheet, styles):
+        ## the how to use sheet is the same for every leader.
+        cell = sheet.cell(column=1, row=1)
         cell.value = self.how2use_pd.columns.values[0]
-        cell.alignment = Alignment(wrapText=True)
-        cell.font = how_font
-        how_sheet.row_dimensions[1].height = int(len(self.how2use_pd.columns.values[0]) / 120 * (40 / 3))
+        styles.apply(cell, alignment=styles.wrap_alignment, font=styles.how_font)
+        sheet.row_dimensions[1].height = int(len(self.how2use_pd.columns.values[0]) / 120 * (40 / 3))
         
 
         for index in range(len(self.how2use_pd.index)):
             _ = 0
             for col_index in range(len(self.how2use_pd.columns)):
-                cell = how_sheet.cell(column=1 + col_index, row=2 + index)
+                cell = sheet.cell(column=1 + col_index, row=2 + index)
 
                 content = self.how2use_pd.iloc[index, col_index]
                 if _ < len(content):
                     _ = len(content)
                 cell.value = content
-                cell.alignment = Alignment(wrapText=True)
-                cell.font = how_font
-                how_sheet.column_dimensions[ce.get_column_letter(col_index + 1)].width = 135
+                styles.apply(cell, alignment=styles.wrap_alignment, font=styles.how_font)
+                sheet.column_dimensions[ce.get_column_letter(col_index + 1)].width = 135
 
-            how_sheet.row_dimensions[index + 2].height = int(_ / 110 * (40 / 3))
+            sheet.row_dimensions[index + 2].height = int(_ / 110 * (40 / 3))
 
 
         for row in range(1, 41 + len(self.how2use_pd.index)):
             for col in range(1, 41 + len(self.how2use_pd.columns)):
-                how_sheet.cell(row=row, column=col).fill = white_back
+                styles.apply(sheet.cell(row=row, column=col), fill=styles.white_back)
 
     def writeOutput(self):
 
@@ -1581,7 +1463,9 @@ class LTMaker:
         os.makedirs(self.output_source + self.output_path, exist_ok=True)
 
         ## and write the output file.
-        self.book.save(path)
+        with phase("LTMaker", "save"):
+            self.book.save(path)
+        return path
 
     def _preProcess(self):
         ## some process about GM
@@ -1598,162 +1482,79 @@ class LTMaker:
             except:
                 pass
 
-        ## make a item group and filter the able source.
-        self._item_pd = self.item_code_pd[self.item_code_pd["Type ID"] == "T01"]
-
-        self._item_pd = self._item_pd[self._item_pd["External Benchmark"] == "i"]
-
-        self._rest_item_pd = self._item_pd[~self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._rest_item_pd = self._rest_item_pd[self._rest_item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-        self._both_item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
+        ## take the shared leader-independent state.
+        survey = self.getSurvey()
+        self._catalog = survey.item_catalog
         
-        self.category_pd = self.origin_category_pd[self.origin_category_pd["Item ID in 2020 Survey"].isin(self._item_pd["Item ID"].tolist())]
-        self.category_pd = self.category_pd.drop_duplicates(subset=["Item ID in 2020 Survey"]).reset_index(drop=True)
-        self.order_category = self.category_pd.drop_duplicates(subset=["2020 Category"]).loc[:, "2020 Category"].tolist()
-
-        self._group_dict = self.category_pd.groupby(["2020 Category"]).groups
-
-        self.raw_data_pd = self.origin_raw_data_pd.iloc[2:].reset_index(drop=True)
-
-        ## filter the able source from history file.
-        self.raw_data_past_pd = self.origin_raw_data_past_pd.iloc[2:].reset_index(drop=True)
-
-        ## Convert numeric values into favorable or not.
-        ## [1, 2, 3] -> 0, [4, 5] -> 1, [all others] -> ''
-        for field in self._item_pd["Unique Item Code"]:
-            new_list = []
-            for item in self.raw_data_pd[field].tolist():
-                if item < 4 and item > 0:
-                    new_list.append(0)
-                elif item >= 4 and item <= 5:
-                    new_list.append(1)
-                else:
-                    new_list.append('')
-            self.raw_data_pd[field] = new_list
-                        
-                ## do the same process about history data.
-            try:
-                field = self._get_past_field_name_by_current_name(field)
-                new_list_past = []
-                for item in self.raw_data_past_pd[field].tolist():
-                    if item < 4 and item > 0:
-                        new_list_past.append(0)
-                    elif item >= 4 and item <= 5:
-                        new_list_past.append(1)
-                    else:
-                        new_list_past.append('')
-                self.raw_data_past_pd[field] = new_list_past
-            except:
-                pass
-        ## new feature -> process A/B pair.
-        pairs = self._item_pd[self._item_pd["AB Code"].isin(["A", "B"])].reset_index(drop=True)
-        pairs_dict = pairs.groupby(["Item ID"]).groups
-
-        for key in pairs_dict:
-
-            _list = pairs_dict[key]
-            pairs_row = pairs.iloc[_list, :]
-            item_list = pairs_row["Unique Item Code"].tolist()
-            text_list = pairs_row["Short Text [2020 onward]"].tolist()
-            new_text = "/".join(text_list)
-            self._item_pd = self._item_pd[~(self._item_pd["Unique Item Code"] == item_list[1])].reset_index(drop=True)
-            _index = self._item_pd[self._item_pd["Unique Item Code"] == item_list[0]].index
-            self._item_pd.loc[_index, "Short Text [2020 onward]"] = new_text
-
-            column_pair = self.raw_data_pd[item_list]
-            _list = []
-            for index in range(len(column_pair.index)):
-                _row = column_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                        _list.append('')
+        self.order_category = self._catalog.categories
 
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_pd = self.raw_data_pd.drop(columns=[item_list[1]])
-            self.raw_data_pd[item_list[0]] = _pd
+        self.raw_data_pd = survey.raw_data_pd
+        self.raw_data_past_pd = survey.raw_data_past_pd
 
-        self.demographics_pd = self.origin_demographics_pd
+        self.demographics_pd = survey.demographics_pd
         
-        ## convert the demographics data to include only answered entries.
-        self._invited_demographics_data = self.demographics_pd[self.demographics_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_data = self._invited_demographics_data[self._invited_demographics_data.loc[:, "Worker ID"].isin(self.raw_data_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self._invited_demographics_data = survey.invited_demographics_data
+        self._answered_demographics_data = survey.answered_demographics_data
         self._gilead_org = self._answered_demographics_data
 
-        ## do the same process about history data.
-        self._invited_demographics_past_data = self.demographics_past_pd[self.demographics_past_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_past_data = self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, "Worker ID"].isin(self.raw_data_past_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self._invited_demographics_past_data = survey.invited_demographics_past_data
+        self._answered_demographics_past_data = survey.answered_demographics_past_data
         self._gilead_past_org = self._answered_demographics_past_data
+        self._respondents = survey.respondents
+        self._past_respondents = survey.past_respondents
+        self._segments = self._respondents.segments
+        self._past_segments = self._past_respondents.segments
+        self._cube = survey.score_cube
+        self._past_cube = survey.past_score_cube
+        self._org_tree = survey.org_tree
+        self._past_org_tree = survey.past_org_tree
 
-        if self.GM:
-            self._gm_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.GM] == 1].reset_index(drop=True)
-            self._gm_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.GM] == 1].reset_index(drop=True)
-
-        if self.site_lead:
-            self._site_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.site_lead] == 1].reset_index(drop=True)
-            self._site_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.site_lead] == 1].reset_index(drop=True)      
-
-    def _get_past_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            new_field_name = self._rest_item_pd[self._rest_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            new_field_name = None
 
-        if new_field_name == None:
-            try:
-                new_field_name = self._both_item_pd[self._both_item_pd["Unique Item Code"] == field_name]["Unique Item Code"].values[0]
-            except:
-                new_field_name = None
-
-        return new_field_name
 
     def _prepareColumnsForID(self):
         ## find the supervisor level of the given leader id.
         self.first_row = {"current": {}, "past": {}}
         _temp = "Supervisor Level {} ID"
 
-        leader_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._leader_id]
+        ## the org tree span of the orgs read from the score cube, None for the orgs of a flag column.
+        self._your_span = None
+        self._your_past_span = None
+
+        leader_entry = self._org_tree.entry(self._leader_id)
 
         if self._leader_id == 999999:
             self.logic = 1
             leader_level = 1
         else:
-            for index, level in enumerate(leader_entry.loc[:, _temp.format(2) : _temp.format(10)]):
-                if (leader_entry[level] == self._leader_id).tolist()[0]:
-                    leader_level = index + 2
-                    break
+            leader_level = self._org_tree.level(self._leader_id)
 
         self.output_path = "/" + leader_entry["Worker Name"].values[0]
         self.file_name = leader_entry["Worker Last Name"].values[0]
 
         supervisor_level = leader_level - 1
-        direct_level = leader_level + 1
 
         if leader_level >= 3:
             self.logic = 3
             self._supervisor_id = leader_entry.loc[:, _temp.format(supervisor_level)].values[0]
-            _supervisor_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._supervisor_id]
+            _supervisor_entry = self._org_tree.entry(self._supervisor_id)
             self._supervisor_last_name = _supervisor_entry["Worker Last Name"].values[0]
 
-            ## get Parent group.
-            self._parent_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(supervisor_level)] == self._supervisor_id].reset_index(drop=True)
-            self._parent_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data.loc[:, _temp.format(supervisor_level)] == self._supervisor_id].reset_index(drop=True)
+            ## get Parent group, its key in the score cubes.
+            self._parent_org = self._org_tree.span(supervisor_level, self._supervisor_id)
+            self._parent_past_org = self._past_org_tree.span(supervisor_level, self._supervisor_id)
 
         elif leader_level == 2:
             self.logic = 2
 
         ## get Your Org data
         if self.logic == 1:
-            self._your_org = self._answered_demographics_data
+            self._your_mask = self._segments.answered()
+            self._your_span = self._cube.full_span
             self._invited = len(self._invited_demographics_data.index)
             self._invited_past = len(self._invited_demographics_past_data.index)
         else:
             if self.GM:
-                self._your_org = self._gm_demographics_data
+                self._your_mask = self._segments.mask(self.GM, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.GM] == 1].index)
                 self._invited_past = len(self._invited_demographics_past_data[self._invited_demographics_past_data[self.GM] == 1].index)
                 
@@ -1771,77 +1572,89 @@ class LTMaker:
                         _org_name = self.GM_levels[self.GM_levels["GM ID"] == _org_id]["GM Org"].values[0]
                         self.GM_parent = _org_name
                         
-                        self._parent_org = self._answered_demographics_data[self._answered_demographics_data[_org_name] == 1].reset_index(drop=True)
-                        self._parent_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data[_org_name] == 1].reset_index(drop=True)
+                        self._parent_org = _org_name
+                        self._parent_past_org = _org_name
             elif self.site_lead:
-                self._your_org = self._site_demographics_data
+                self._your_mask = self._segments.mask(self.site_lead, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.site_lead] == 1].index)
                 self._invited_past = len(self._invited_demographics_past_data[self._invited_demographics_past_data[self.site_lead] == 1].index)
             
             else:
-                self._your_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
-                self._invited = len(self._invited_demographics_data[self._invited_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
-                self._invited_past = len(self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
+                self._your_mask = self._segments.org(leader_level, self._leader_id)
+                self._your_span = self._org_tree.span(leader_level, self._leader_id)
+                self._invited = self._org_tree.invited(leader_level, self._leader_id)
+                self._invited_past = self._past_org_tree.invited(leader_level, self._leader_id)
 
         ## get your history group
         if self.GM:
-            self._your_past_org = self._gm_demographics_past_data
+            self._your_past_mask = self._past_segments.mask(self.GM, 1)
         elif self.site_lead:
-            self._your_past_org = self._site_demographics_past_data
+            self._your_past_mask = self._past_segments.mask(self.site_lead, 1)
         else:
             if self.logic == 1:
-                self._your_past_org = self._answered_demographics_past_data
+                self._your_past_mask = self._past_segments.answered()
+                self._your_past_span = self._past_cube.full_span
             else:
-                self._your_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                self._your_past_mask = self._past_segments.org(leader_level, self._leader_id)
+                self._your_past_span = self._past_org_tree.span(leader_level, self._leader_id)
 
+        ## the key of your org in the score cubes, its span or its flag column.
+        self._your_org = self.GM or self.site_lead or self._your_span
+        self._your_past_org = self.GM or self.site_lead or self._your_past_span
 
         ## calculate nums of participated
-        self._participated = len(self._your_org.loc[:, "Worker ID"])
-        self._participated_past = len(self._your_past_org.loc[:, "Worker ID"])
+        self._participated = int(self._your_mask.sum())
+        self._participated_past = int(self._your_past_mask.sum())
 
         ## make direct report fields.
         if not self.GM:
             self._direct_report_field = []
-            self.temp_org = self._your_org[~(self._your_org.loc[:, "Worker ID"] == self._leader_id)].reset_index(drop=True)
+            temp_mask = self._your_mask & ~self._segments.mask("Worker ID", self._leader_id)
 
             if self.site_lead:
-                self.temp_org = self.temp_org[self.temp_org.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                temp_mask = temp_mask & self._segments.org(leader_level, self._leader_id)
 
-            _dict = self.temp_org.groupby(_temp.format(direct_level)).groups
+            if self._your_span is None:
+                _dict = self._segments.directs(leader_level, self._leader_id, temp_mask)
+            else:
+                _dict = self._cube.directs(leader_level, self._leader_id)
             for key in _dict:
                 try:
-                    self._direct_report_field.append([self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == key].loc[:, "Worker Name"].values[0], _dict[key]])
+                    self._direct_report_field.append([self._org_tree.entry(key)["Worker Name"].values[0], _dict[key]])
                 except:
                     pass
             
             self._direct_report_past_field = {}
-            self.temp_past_org = self._your_past_org[~(self._your_past_org.loc[:, "Worker ID"] == self._leader_id)].reset_index(drop=True)
+            temp_past_mask = self._your_past_mask & ~self._past_segments.mask("Worker ID", self._leader_id)
             
             if self.site_lead:
-                self.temp_past_org = self.temp_past_org[self.temp_past_org.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                temp_past_mask = temp_past_mask & self._past_segments.org(leader_level, self._leader_id)
 
-            _dict_past = self.temp_past_org.groupby(_temp.format(direct_level)).groups
+            if self._your_past_span is None:
+                _dict_past = self._past_segments.directs(leader_level, self._leader_id, temp_past_mask)
+            else:
+                _dict_past = self._past_cube.directs(leader_level, self._leader_id)
             for key in _dict:
                 try:
                     _values = _dict_past[key]
                 except:
-                    _values = [0]
-                self._direct_report_past_field.update({self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == key].loc[:, "Worker Name"].values[0]: _values})
+                    _values = self._past_segments.empty() if self._your_past_span is None else self._past_cube.empty()
+                self._direct_report_past_field.update({self._org_tree.entry(key)["Worker Name"].values[0]: _values})
 
         ## make grade group fields.
         self._grade_group_fields = []
-        _dict = self._your_org.groupby("Pay Grade Group").groups
+        _dict = self._getGroups("Pay Grade Group")
         for key in _dict:
             self._grade_group_fields.append([str(key), _dict[key]])
 
         self._grade_group_past_fields = {}
-        _dict = self._your_past_org.groupby("Pay Grade Group").groups
+        _dict = self._getGroups("Pay Grade Group", past=True)
         for key in _dict:
             self._grade_group_past_fields.update({str(key): _dict[key]})
 
         ## make tenure group fields.
         self._tenure_group_fields = []
-        _dict = self._your_org.groupby("Length of Service Group").groups
+        _dict = self._getGroups("Length of Service Group")
         for key in _dict:
             if not key == "15+ Years":
                 self._tenure_group_fields.append([key, _dict[key]])
@@ -1851,13 +1664,13 @@ class LTMaker:
             pass
 
         self._tenure_group_past_fields = {}
-        _dict = self._your_past_org.groupby("Length of Service Group").groups
+        _dict = self._getGroups("Length of Service Group", past=True)
         for key in _dict:
             self._tenure_group_past_fields.update({key: _dict[key]})
 
         ## make performance rating fields.
         self._performance_rating_fields = []
-        _dict = self._your_org.groupby("2019 Performance Rating").groups
+        _dict = self._getGroups("2019 Performance Rating")
         _list = _dict.keys()
         for key in self.performance_order:
             try:
@@ -1872,7 +1685,7 @@ class LTMaker:
                 self._performance_rating_fields.append([key, _dict[key]])
 
         self._performance_rating_past_fields = {}
-        _dict = self._your_past_org.groupby("2017 Performance Rating").groups
+        _dict = self._getGroups("2017 Performance Rating", past=True)
         for key in _dict:
             _key = key
             if key == "Unspecified":
@@ -1881,7 +1694,7 @@ class LTMaker:
 
         ## make talent cordinate fields.
         self._talent_cordinate_fields = []
-        _dict = self._your_org.groupby("2020 Talent Coordinate").groups
+        _dict = self._getGroups("2020 Talent Coordinate")
         for key in _dict:
             _key = key
             if key == "Unspecified":
@@ -1889,7 +1702,7 @@ class LTMaker:
             self._talent_cordinate_fields.append([_key, _dict[key]])
 
         self._talent_cordinate_past_fields = {}
-        _dict = self._your_past_org.groupby("2017 Talent Coordinate").groups
+        _dict = self._getGroups("2017 Talent Coordinate", past=True)
         for key in _dict:
             _key = key
             if key == "Unspecified":
@@ -1898,18 +1711,18 @@ class LTMaker:
 
         ## make gender fields.
         self._gender_fields = []
-        _dict = self._your_org.groupby("Gender").groups
+        _dict = self._getGroups("Gender")
         for key in _dict:
             self._gender_fields.append([key, _dict[key]])
 
         self._gender_past_fields = {}
-        _dict = self._your_past_org.groupby("Gender").groups
+        _dict = self._getGroups("Gender", past=True)
         for key in _dict:
             self._gender_past_fields.update({key: _dict[key]})
 
         ## make Ethnicity fields.
         self._ethnicity_fields = []
-        _dict = self._your_org.groupby("Ethnicity (US)").groups
+        _dict = self._getGroups("Ethnicity (US)")
         for key in _dict:
             if not key == "Non-US":
                 self._ethnicity_fields.append([key, _dict[key]])
@@ -1919,79 +1732,79 @@ class LTMaker:
             pass
 
         self._ethnicity_past_fields = {}
-        _dict = self._your_past_org.groupby("Ethnicity (US)").groups
+        _dict = self._getGroups("Ethnicity (US)", past=True)
         for key in _dict:
             self._ethnicity_past_fields.update({key: _dict[key]})
 
         ## make age group fields.
         self._age_fields = []
-        _dict = self._your_org.groupby("Age Group").groups
+        _dict = self._getGroups("Age Group")
         for key in _dict:
             self._age_fields.append([key, _dict[key]])
 
         self._age_past_fields = {}
-        _dict = self._your_past_org.groupby("Age Group").groups
+        _dict = self._getGroups("Age Group", past=True)
         for key in _dict:
             self._age_past_fields.update({key: _dict[key]})
 
         ## make country fields.
         self._country_fields = []
-        _dict = self._your_org.groupby("Country").groups
+        _dict = self._getGroups("Country")
         for key in _dict:
             self._country_fields.append([key, _dict[key]])
 
         self._country_past_fields = {}
-        _dict = self._your_past_org.groupby("Country").groups
+        _dict = self._getGroups("Country", past=True)
         for key in _dict:
             self._country_past_fields.update({key: _dict[key]})
 
         ## make kite fields.
         self._kite_fields = []
-        _dict = self._your_org.groupby("Kite Employee Flag").groups
+        _dict = self._getGroups("Kite Employee Flag")
         for key in _dict:
             self._kite_fields.append([key, _dict[key]])
 
         self._kite_past_fields = {}
-        _dict = self._your_past_org.groupby("Kite Employee Flag").groups
+        _dict = self._getGroups("Kite Employee Flag", past=True)
         for key in _dict:
             self._kite_past_fields.update({key: _dict[key]})
 
         ## make office type fields.
         self._office_fields = []
-        _dict = self._your_org.groupby("Office Type").groups
+        _dict = self._getGroups("Office Type")
         for key in _dict:
             self._office_fields.append([key, _dict[key]])
 
         self._office_past_fields = {}
-        _dict = self._your_past_org.groupby("Office Type").groups
+        _dict = self._getGroups("Office Type", past=True)
         for key in _dict:
             self._office_past_fields.update({key: _dict[key]})
 
         ## make Region fields.
         self._region_fields = []
-        _dict = self._your_org.groupby("Location Level 2").groups
+        _dict = self._getGroups("Location Level 2")
         for key in _dict:
             self._region_fields.append([key, _dict[key]])
 
         self._region_past_fields = {}
-        _dict = self._your_past_org.groupby("Location Level 2").groups
+        _dict = self._getGroups("Location Level 2", past=True)
         for key in _dict:
             self._region_past_fields.update({key: _dict[key]})
 
         ## make Department fields.
         self._department_fields = []
-        _dict = self._your_org.groupby("Department Level 2").groups
+        _dict = self._getGroups("Department Level 2")
         for key in _dict:
             self._department_fields.append([key, _dict[key]])
 
         self._department_past_fields = {}
-        _dict = self._your_past_org.groupby("Department Level 2").groups
+        _dict = self._getGroups("Department Level 2", past=True)
         for key in _dict:
             self._department_past_fields.update({key: _dict[key]})
 
         ## make Gender x Ethnicity (US) fields.
         self._gender_ethnicity_fields = []
-        _dict = self._your_org.groupby(["Ethnicity (US)", "Gender"]).groups
+        _dict = self._getGroups(["Ethnicity (US)", "Gender"])
         _new_dict = copy.deepcopy(_dict)
         for key in _dict:
             _temp = _new_dict.pop(key)
@@ -2002,7 +1815,7 @@ class LTMaker:
             self._gender_ethnicity_fields.append([key, _new_dict[key]])
 
         self._gender_ethnicity_past_fields = {}
-        _dict = self._your_past_org.groupby(["Ethnicity (US)", "Gender"]).groups
+        _dict = self._getGroups(["Ethnicity (US)", "Gender"], past=True)
         _new_dict = copy.deepcopy(_dict)
         for key in _dict:
             _temp = _new_dict.pop(key)
@@ -2059,12 +1872,12 @@ class LTMaker:
                 for key in key_list:
                     real_key = key.strip()
                     try:
-                        _list = self._your_org[self._your_org[real_key] == 1].index
+                        _list = self._your_mask & self._segments.mask(real_key, 1)
                         self._affiliate_fields.append([key, _list])
                     except:
                         pass
                     try:
-                        _list = self._your_past_org[self._your_past_org[real_key] == 1].index
+                        _list = self._your_past_mask & self._past_segments.mask(real_key, 1)
                         self._affiliate_past_fields.update({key: _list})
                     except:
                         pass
@@ -2087,16 +1900,35 @@ class LTMaker:
 
                 for key in key_list:
                     try:
-                        _list = self._your_org[self._your_org[key] == 1].index
+                        _list = self._your_mask & self._segments.mask(key, 1)
                         self._affiliate_fields.append([key, _list])
                     except:
                         pass
                     try:
-                        _list = self._your_past_org[self._your_past_org[key] == 1].index
+                        _list = self._your_past_mask & self._past_segments.mask(key, 1)
                         self._affiliate_past_fields.update({key: _list})
                     except:
                         pass
 
+        ## leave out the segments the report suppresses, so they are never scored.
+        if not self.GM:
+            self._direct_report_field = self._getReportedFields(self._direct_report_field, self._direct_report_past_field)
+        self._grade_group_fields = self._getReportedFields(self._grade_group_fields, self._grade_group_past_fields)
+        self._tenure_group_fields = self._getReportedFields(self._tenure_group_fields, self._tenure_group_past_fields)
+        self._performance_rating_fields = self._getReportedFields(self._performance_rating_fields, self._performance_rating_past_fields)
+        self._talent_cordinate_fields = self._getReportedFields(self._talent_cordinate_fields, self._talent_cordinate_past_fields)
+        self._gender_fields = self._getReportedFields(self._gender_fields, self._gender_past_fields)
+        self._ethnicity_fields = self._getReportedFields(self._ethnicity_fields, self._ethnicity_past_fields)
+        self._age_fields = self._getReportedFields(self._age_fields, self._age_past_fields)
+        self._country_fields = self._getReportedFields(self._country_fields, self._country_past_fields)
+        self._kite_fields = self._getReportedFields(self._kite_fields, self._kite_past_fields)
+        self._office_fields = self._getReportedFields(self._office_fields, self._office_past_fields)
+        self._region_fields = self._getReportedFields(self._region_fields, self._region_past_fields)
+        self._department_fields = self._getReportedFields(self._department_fields, self._department_past_fields)
+        self._gender_ethnicity_fields = self._getReportedFields(self._gender_ethnicity_fields, self._gender_ethnicity_past_fields)
+        if self.use_affiliate:
+            self._affiliate_fields = self._getReportedFields(self._affiliate_fields, self._affiliate_past_fields)
+
         self.index_match = {
             "": ["Gilead Overall Delta", "Parent Group Delta", "Your Org Delta ({} to {})".format(self.current_year, self.past_year)],
             "Direct Reports (as of 2 Sept 2020)": sorted(self._get_names_from_field(self._direct_report_field)),
@@ -2148,6 +1980,18 @@ class LTMaker:
         keys = [field[0] for field in field_list]
         return keys
 
+    def _getReportedFields(self, field_list, past_fields):
+
+        ## a segment is shown with at least 4 respondents in both years, in a section of at least 2 segments.
+        nums = {}
+        for field in field_list:
+            if field[0] in past_fields:
+                nums[field[0]] = min(self._getRespondents(field[1]), self._getRespondents(past_fields[field[0]]))
+        field_list = [field for field in field_list if nums.get(field[0], 0) >= 4]
+        if len(set(self._get_names_from_field(field_list))) < 2:
+            return []
+        return field_list
+
     def _filterResource(self, id_list, category):
 
         # filter_item = self._item_pd[self._item_pd["Item ID"].isin(id_list)]["Unique Item Code"].tolist()
@@ -2155,46 +1999,35 @@ class LTMaker:
         #######################################################################################################
         filter_item = []
         for item_id in id_list:
-            filter_item.append(self._item_pd[self._item_pd["Item ID"] == item_id]["Unique Item Code"].values[0])
+            filter_item.append(self._catalog.getCode(item_id))
         #######################################################################################################
-        _items  = ['ExternalReference']
-        _items_past = ['ExternalReference']
-
-        for item in filter_item:
-            item_past = self._get_past_field_name_by_current_name(item)
-            if item_past != None:
-                _items.append(item)
-                _items_past.append(item_past)
-            else:
-                pass
 
-        if len(_items) > 1:
+        ## the items asked in both years, the past columns are in the same order as the current ones.
+        self._filtered_columns, self._filtered_values, self._filtered_past_columns, self._filtered_past_values = self.survey.getAlignedItems(filter_item)
+
+        if len(self._filtered_columns) > 0:
             self._item_list.append([0, category])
-            for item in _items:
-                if item != 'ExternalReference':
-                    self._item_list.append([1, item])
-        
-        self._filtered_raw_data = self.raw_data_pd[_items]
-        self._filtered_raw_past_data = self.raw_data_past_pd[_items_past]
+            for item in self._filtered_columns:
+                self._item_list.append([1, item])
 
     def _calculateEachRow(self, item):
 
         ## calculate Gilead overall delta %s
-        _dict, c_lens, p_lens = self._calculateOverall(self._gilead_org, self._gilead_past_org, item)
+        _dict, c_lens, p_lens = self._calculateOverall(self._cube.total(self._cube.full_span), self._past_cube.total(self._past_cube.full_span), item)
         self.precious_dict[""]["Gilead Overall Delta"].update(_dict)
         self.first_row["current"].update({"Gilead Overall Delta": c_lens})
         self.first_row["past"].update({"Gilead Overall Delta": p_lens})
 
         ## calculate Parent Group delta %s
         if self.logic == 3:
-            _dict, c_lens, p_lens = self._calculateOverall(self._parent_org, self._parent_past_org, item)
+            _dict, c_lens, p_lens = self._calculateOverall(self._cube.org(self._parent_org), self._past_cube.org(self._parent_past_org), item)
             self.precious_dict[""]["Parent Group Delta"].update(_dict)
             self.first_row["current"].update({"Parent Group Delta": c_lens})
             self.first_row["past"].update({"Parent Group Delta": p_lens})
 
         ## calculate Your Org Delta (2020 to 2018) %s
         if self.logic >= 2:
-            _dict, c_lens, p_lens = self._calculateOverall(self._your_org, self._your_past_org, item)
+            _dict, c_lens, p_lens = self._calculateOverall(self._cube.org(self._your_org), self._past_cube.org(self._your_past_org), item)
             self.precious_dict[""]["Your Org Delta ({} to {})".format(self.current_year, self.past_year)].update(_dict)
             self.first_row["current"].update({"Your Org Delta ({} to {})".format(self.current_year, self.past_year): c_lens})
             self.first_row["past"].update({"Your Org Delta ({} to {})".format(self.current_year, self.past_year): p_lens})
@@ -2247,58 +2080,50 @@ class LTMaker:
         ## calculate gender ethnicity %s
         self._calculateSubFields(self._gender_ethnicity_fields, self._gender_ethnicity_past_fields, "Gender x Ethnicity (US)", item)
 
-    def _calculateOverall(self, current_f, past_f, item):
-        
-        ## calcualte overall fields.
-        current_ids = current_f.iloc[:, 0]
-        current_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(current_ids)].reset_index(drop=True)
-        nums = len(current_pd.iloc[:, 0])
-        current_dict = self._get_sum(current_pd, nums, item)
-
-        past_ids = past_f.iloc[:, 0]
-        past_pd = self._filtered_raw_past_data[self._filtered_raw_past_data["ExternalReference"].isin(past_ids)].reset_index(drop=True)
-        nums = len(past_pd.iloc[:, 0])
-        past_dict = self._get_sum(past_pd, nums, item)
-
-        for key in current_dict:
-            try:
-                value = current_dict[key][0] - past_dict[self._get_past_field_name_by_current_name(key)][0]
-                current_dict[key][0] = value
-            except:
-                current_dict[key][0] = "N/A"
-        
-        return current_dict, len(current_ids), len(past_ids)
-
-    def _get_sum(self, data, nums, item):
-
-        ## calculate the sum of favorable scores.
-        _dict = {}
-
-        for ind in range(len(data.columns)):
-            _ = data.iloc[:, ind]
-            is_empty_column = True
-            lens = nums
-            sub = 0
-            count_valid = 0
-            for __ in _:
-                if __ != '':
-                    is_empty_column = False
-                    sub += __
-                    count_valid += 1
-                else:
-                    lens -= 1
-            if is_empty_column:
-                _dict.update({data.columns.values[ind]: ["N/A", 1]})
-            else:
-                if count_valid >= 4:
-                    _dict.update({data.columns.values[ind]: [sub / lens, 1]})
-                else:
-                    _dict.update({data.columns.values[ind]: ["N/A", 1]})
-        
-        if len(data.columns) > 0:
-            _dict.update({item: ["N/A", 0]})
-
-        return _dict
+    def _getGroups(self, columns, past=False):
+        ## the groups of your org, summed from the score cube if your org is an org tree span.
+        if past:
+            if self._your_past_span is None:
+                return self._past_segments.groups(columns, self._your_past_mask)
+            return self._past_cube.groups(columns, self._your_past_span)
+        if self._your_span is None:
+            return self._segments.groups(columns, self._your_mask)
+        return self._cube.groups(columns, self._your_span)
+
+    def _getCounts(self, group, past=False):
+        ## the favorable and valid counts of each item and the respondents of a group, a bitmap or the Counts of the score cube.
+        columns = self._filtered_past_columns if past else self._filtered_columns
+        if isinstance(group, Counts):
+            return group.get("favorable", columns), group.get("valid", columns), group.respondents
+
+        values = (self._filtered_past_values if past else self._filtered_values)[group]
+        valid = values != MISSING
+        return np.where(valid, values, 0).sum(axis=0), valid.sum(axis=0), self._getRespondents(group)
+
+    def _getRespondents(self, group):
+        ## the respondents of a group, a bitmap or the Counts of the score cube.
+        if isinstance(group, Counts):
+            return group.respondents
+        return int(group.sum())
+
+    def _calculateOverall(self, current_group, past_group, item):
+
+        ## calcualte overall fields, the current minus the past score of each item at once.
+        c_favorable, c_valid, c_nums = self._getCounts(current_group)
+        p_favorable, p_valid, p_nums = self._getCounts(past_group, past=True)
+
+        ## an item needs at least 4 valid answers in both years.
+        scored = (c_valid >= 4) & (p_valid >= 4)
+        current = np.divide(c_favorable, c_valid, out=np.zeros(len(scored)), where=scored)
+        past = np.divide(p_favorable, p_valid, out=np.zeros(len(scored)), where=scored)
+
+        current_dict = {}
+        for key, value, valid in zip(self._filtered_columns, (current - past).tolist(), scored):
+            current_dict.update({key: [value if valid else "N/A", 1]})
+        if len(self._filtered_columns) > 0:
+            current_dict.update({item: ["N/A", 0]})
+
+        return current_dict, c_nums, p_nums
 
     def _calculateSubFields(self, dataframe, pastframe, column_name, item):
 
@@ -2306,25 +2131,8 @@ class LTMaker:
         for field in dataframe:
             try:
                 dictionary = self.precious_dict[column_name]
-                c_list = field[1]
-                c_ids = self._your_org.iloc[c_list, 0].tolist()
-                c_nums = len(c_ids)
-                c_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(c_ids)].reset_index(drop=True)
-                c_dict = self._get_sum(c_pd.iloc[:, 1:], c_nums, item)
-
-                p_list = pastframe[field[0]]
-                p_ids = self._your_past_org.iloc[p_list, 0].tolist()
-                p_nums = len(p_ids)
-                p_pd = self._filtered_raw_past_data[self._filtered_raw_past_data["ExternalReference"].isin(p_ids)].reset_index(drop=True)
-                p_dict = self._get_sum(p_pd.iloc[:, 1:], p_nums, item)
-
-                for key in c_dict:
-                    try:
-                        value = c_dict[key][0] - p_dict[self._get_past_field_name_by_current_name(key)][0]
-                        c_dict[key][0] = value
-                    except:
-                        c_dict[key][0] = "N/A"
-                
+                c_dict, c_nums, p_nums = self._calculateOverall(field[1], pastframe[field[0]], item)
+
                 dictionary[field[0]].update(c_dict)
                 self.first_row["current"].update({column_name + field[0]: c_nums})
                 self.first_row["past"].update({column_name + field[0]: p_nums})
@@ -2332,16 +2140,10 @@ class LTMaker:
             except:
                 pass
 
-    def _get_color(self, delta):
-        if abs(delta) > 25:
-            delta = delta // abs(delta) * 25
-        series = self.heatmap_color_pd[self.heatmap_color_pd["Delta"] == delta]
-        return str(hex(series["R"].values[0]))[2:] + str(hex(series["G"].values[0]))[2:] + str(hex(series["B"].values[0]))[2:]
-
 
 class SSM:
 
-    def __init__(self, **args):
+    def __init__(self, inputs=None, **args):
         ## initialize the object by specifying input and output files.
         self.image_src = args['image']
 
@@ -2356,26 +2158,32 @@ class SSM:
         self.output_source = args['output_folder']
         self.input_source = args['input_folder']
         self.how2use_file = args['how to use']
+        self.streaming = args.get('streaming', True) and is_tested_openpyxl()
 
         self.custom_text = args['custom text']
 
         self.current_year = self.demographics_file[:4]
         self.past_year = self.demographics_past_file[:4]
 
+        self.survey = None
+        self._templates = {}
+        self.inputs = inputs if inputs is not None else SurveyInputs(**args)
+
     def readAllFiles(self):
-        ## read files and save it in object data.
-        self.origin_raw_data_pd = pd.read_excel(self.input_source + "/" + self.raw_data_file, engine="openpyxl")
-        self.origin_raw_data_past_pd = pd.read_excel(self.input_source + "/" + self.raw_data_past_file, engine="openpyxl")
-        self.item_code_pd = pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="ItemCodeSTAR")
-        self.origin_category_pd =  pd.read_excel(self.input_source + "/" + self.item_code_file, engine="openpyxl", sheet_name="CurrentCategorySTAR")
-        self.origin_demographics_pd = pd.read_excel(self.input_source + "/" + self.demographics_file, engine="openpyxl")
-        self.demographics_past_pd = pd.read_excel(self.input_source + "/" + self.demographics_past_file, engine="openpyxl")
-        self.heatmap_color_pd = pd.read_excel(self.input_source + "/" + self.heatmap_color_file, engine="openpyxl")
-        self.benchmark_pd = pd.read_excel(self.input_source + "/" + self.benchmark_file, engine="openpyxl")
-        self.leaders = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Leader")
-        self.GMs = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="GM")
-        self.site_leads = pd.read_excel(self.input_source + "/" + self.leader_file, engine="openpyxl", sheet_name="Site Leader")
-        self.how2use_pd = pd.read_excel(self.input_source + "/" + self.how2use_file, engine="openpyxl", sheet_name="Score Summary How to Use")
+        ## take the needed sheets from the shared inputs, each one is read on its first use.
+        self.origin_raw_data_pd = self.inputs.origin_raw_data_pd
+        self.origin_raw_data_past_pd = self.inputs.origin_raw_data_past_pd
+        self.item_code_pd = self.inputs.item_code_pd
+        self.origin_category_pd = self.inputs.origin_category_pd
+        self.origin_demographics_pd = self.inputs.origin_demographics_pd
+        self.demographics_past_pd = self.inputs.demographics_past_pd
+        self.logo = self.inputs.logo
+        self.heatmap_palette = self.inputs.heatmap_palette
+        self.benchmark_pd = self.inputs.benchmark_pd
+        self.leaders = self.inputs.leaders
+        self.GMs = self.inputs.GMs
+        self.site_leads = self.inputs.site_leads
+        self.how2use_pd = self.inputs.how2use("Score Summary How to Use")
 
     def setLeader(self, id, GM=False, site_lead=False):
         self._leader_id = id
@@ -2384,10 +2192,22 @@ class SSM:
 
         # self._leader_id = 112372
 
+    def setSurvey(self, survey):
+        self.survey = survey
+
+    def getSurvey(self):
+        ## build the leader-independent state once, unless it is shared by another maker.
+        if self.survey is None:
+            self.survey = PreprocessedSurvey(self.origin_raw_data_pd, self.origin_raw_data_past_pd, self.item_code_pd,
+                self.origin_category_pd, self.origin_demographics_pd, self.demographics_past_pd)
+        return self.survey
+
     def calculateValues(self):
         ## do some process referred to individual leader ID.
-        self._preProcess()
-        self._prepareColumnsForID()
+        with phase("SSM", "_preProcess"):
+            self._preProcess()
+        with phase("SSM", "_prepareColumnsForID"):
+            self._prepareColumnsForID()
 
         item_list = []
         item_dict = {}
@@ -2398,7 +2218,7 @@ class SSM:
             category_list.append(key)
             item_list.append([0, key])
             temp_list = []
-            for item in self.category_pd.iloc[self._group_dict[key], 0]:
+            for item in self._catalog.getItemIds(key):
                 item_list.append([1, item])
                 temp_list.append(item)
             item_dict.update({key:temp_list})
@@ -2406,22 +2226,34 @@ class SSM:
         self._item_list = item_list
 
         ## do main calculation process by iterating over the category list.
-        for category in tqdm(category_list, desc="iterating over the list of category"):
-            sub_id_list = item_dict[category]
+        with phase("SSM", "_calculateEachRow"):
+            for category in progress(category_list, desc="iterating over the list of category"):
+                sub_id_list = item_dict[category]
 
-            ## filter the source data frame to have columns belonged to each category.
-            self._filterResource(sub_id_list)
+                ## filter the source data frame to have columns belonged to each category.
+                self._filterResource(sub_id_list)
 
-            ## based on the filtered source, calculate the values for each row.
-            self._calculateEachRow(category)
+                ## based on the filtered source, calculate the values for each row.
+                self._calculateEachRow(category)
         
 
-        self._makeBenchColumn()
+        with phase("SSM", "_makeBenchColumn"):
+            self._makeBenchColumn()
+
+    def getScores(self):
+        ## the columns of the score summary, the favorable, neutral and unfavorable %s and the deltas.
+        gilead = "Kite" if self.logic == 1 else "Gilead"
+        columns = {
+            "Favorable": self.right_dict['f'], "Neutral": self.right_dict['n'], "Unfavorable": self.right_dict['uf'],
+            "Δ " + self.past_year: self.left_dict['d'], "Δ Ext": self.left_dict['e'], "Δ " + gilead: self.left_dict['f'],
+        }
+        counts = {name: self._participated for name in columns}
+        return get_score_rows({"": columns}, counts)
 
     def makeReport(self):
 
         ## prepare image.
-        img  = Image(self.input_source + "/" + self.image_src)
+        img  = Image(BytesIO(self.logo))
         img.height = 90
         img.width = 110
 
@@ -2429,49 +2261,17 @@ class SSM:
         total_rows = 7 + len(self._item_list)
 
         ## make a workbook and sheet.
-        self.book = openpyxl.Workbook()
+        self.book = StreamingWorkbook() if self.streaming else openpyxl.Workbook()
         sheet = self.book.active
         sheet.title = "Score Summary"
 
         ## set styles like font, color, direction, border...
-        ft = Font(name="Arial", size=10)
-        ft_bold = Font(name="Arial", size=10, bold=True)
-        ft_size_bold = Font(name="Arial", size=11, bold=True)
-        ft_tiny = Font(name="Arial", size=8)
-        side = Side(style='thin', color="CCCCCC")
-        category_border = Border(
-                     top=side,
-                     bottom=side)
-        last_border = Border(bottom=side)
-        white_back = PatternFill("solid", fgColor="FFFFFF")
-        center_alignment = Alignment(horizontal='center', vertical="center")
-        right_alignment = Alignment(horizontal='right', vertical='center')
-
-        ## set empty cells white.
-        for row in range(1, total_rows + 40 + 1):
-            sheet.row_dimensions[row].height = 13
-            for col in range(1, 80):
-                cell = sheet.cell(row=row, column=col)
-                cell.fill = white_back
-                cell.alignment = center_alignment
-                cell.font = ft
-        
-        for col in range(1, 80):
-            sheet.column_dimensions[ce.get_column_letter(col)].width = 6.5
-
-        ## set width and height of columns.
-        # sheet.column_dimensions[ce.get_column_letter(1)].width = 40
-        sheet.column_dimensions[ce.get_column_letter(1)].width = 6
-        sheet.column_dimensions[ce.get_column_letter(2)].width = 4
-        sheet.column_dimensions[ce.get_column_letter(3)].width = 26
-        sheet.column_dimensions[ce.get_column_letter(4)].width = 4
-
-        # sheet.column_dimensions[ce.get_column_letter(2)].width = 40
-        sheet.column_dimensions[ce.get_column_letter(5)].width = 20
-        sheet.column_dimensions[ce.get_column_letter(6)].width = 4
-        sheet.column_dimensions[ce.get_column_letter(7)].width = 16
+        styles = ReportStyles(self.book)
 
-        sheet.column_dimensions[ce.get_column_letter(8)].width = 1
+        ## set empty cells white and the sizes of columns and rows, copied from the template rendered once per run.
+        if ("background", total_rows) not in self._templates:
+            self._templates["background", total_rows] = SheetTemplate(lambda sheet, styles: self._makeBackground(sheet, styles, total_rows))
+        self._templates["background", total_rows].copyTo(sheet, styles)
 
         ## insert image.
         sheet.row_dimensions[2].height = 20
@@ -2493,13 +2293,12 @@ class SSM:
         sheet.merge_cells(start_row=6, end_row=6, start_column=5, end_column=7)
         cell = sheet.cell(row=5, column=4 + 1)
         cell.value = __value
-        cell.alignment = center_alignment
-        cell.font = ft_size_bold
+        styles.apply(cell, alignment=styles.center_alignment, font=styles.summary_title_font)
 
         sheet.merge_cells(start_row=5, start_column=9, end_row=5, end_column=11)
         cell = sheet.cell(row=5, column=9)
         cell.value = "Deltas*"
-        cell.font = ft_size_bold
+        styles.apply(cell, font=styles.summary_title_font)
 
         ## fill sixth row.
         _string = "n = " + f"{self._participated:,d}" + ' / ' + f"{self._invited:,d}" + " ({}% participation)".format(normal_round(self._participated / self._invited * 100))
@@ -2513,26 +2312,25 @@ class SSM:
         sheet.cell(row=6, column=7 + 1 + 3).value = _value
 
         ## fill all data.
-        for index, (criteria, item) in enumerate(tqdm(self._item_list, desc="making contents...")):
+        for index, (criteria, item) in enumerate(progress(self._item_list, desc="making contents...")):
             ## fill the first column.
             row_number = index + 8
             cell = sheet.cell(row=row_number, column=1)
-            cell.alignment = right_alignment
+            styles.apply(cell, alignment=styles.right_alignment)
             cell.value = item
             if criteria == 1:
-                cell.value = self._item_pd[self._item_pd["Item ID"] == item]["Short Text [2020 onward]"].values[0]
-                item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
+                cell.value = self._catalog.getText(item)
+                item = self._catalog.getCode(item)
 
-            cell.font = ft
+            styles.apply(cell, font=styles.summary_font)
             if index == len(self._item_list) - 1:
-                cell.border = last_border
-                sheet.cell(row=row_number, column=4 + 1).border = last_border
+                styles.apply(cell, border=styles.last_border)
+                styles.apply(sheet.cell(row=row_number, column=4 + 1), border=styles.last_border)
 
             if criteria == 0:
-                cell.border = category_border
-                cell.font = ft_bold
+                styles.apply(cell, border=styles.category_border, font=styles.summary_bold_font)
 
-                sheet.cell(row=row_number, column=4 + 1).border = category_border
+                styles.apply(sheet.cell(row=row_number, column=4 + 1), border=styles.category_border)
             
             ## fill the third group columns.
             sub_index = 0
@@ -2543,28 +2341,26 @@ class SSM:
                 except:
                     value = "N/A"
                 cell.value = value if value != "N/A" else "-"
-                cell.number_format = numbers.FORMAT_PERCENTAGE
-                cell.font = ft
-                cell.alignment = center_alignment
+                styles.apply(cell, number_format=styles.percent_format, font=styles.summary_font, alignment=styles.center_alignment)
 
                 try:
                     if value >= 0:
-                        cell.number_format = "+0%"
+                        styles.apply(cell, number_format=styles.plus_format)
                     elif value < 0 and value > -0.005:
-                        cell.number_format = "-0%"
+                        styles.apply(cell, number_format=styles.minus_format)
                 except:
                     pass
 
                 try:
-                    cell.fill = PatternFill("solid", fgColor=self._get_color(round(value * 100)))
+                    styles.apply(cell, fill=self.heatmap_palette.fill(round(value * 100)))
                 except:
                     ## this skip the case of N/A
                     pass
 
                 if index == len(self._item_list) - 1:
-                    cell.border = last_border
+                    styles.apply(cell, border=styles.last_border)
                 if criteria == 0:
-                    cell.border = category_border
+                    styles.apply(cell, border=styles.category_border)
                 sub_index += 1
                 
             ## fill the last group columns.
@@ -2573,22 +2369,19 @@ class SSM:
                 cell = sheet.cell(row=row_number, column=37 + sub_index)
                 value = self.right_dict[key][item][0]
                 cell.value = value if value != "N/A" else "-"
-                cell.number_format = numbers.FORMAT_PERCENTAGE
-                cell.font = ft
-                cell.alignment = center_alignment
+                styles.apply(cell, number_format=styles.percent_format, font=styles.summary_font, alignment=styles.center_alignment)
 
                 if index == len(self._item_list) - 1:
-                    cell.border = last_border
+                    styles.apply(cell, border=styles.last_border)
                 if criteria == 0:
-                    cell.border = category_border
+                    styles.apply(cell, border=styles.category_border)
                 sub_index += 1
 
         ## add caption field.
         sheet.merge_cells(start_row=2, end_row=3, start_column=1, end_column=7)
         cell = sheet.cell(row=2, column=1)
         cell.value = "Global Employee Survey Results"
-        cell.font = Font(name="Arial Black", size=24, color="D9D9D9", bold=True)
-        cell.alignment = Alignment(horizontal="left", vertical="center")
+        styles.apply(cell, font=styles.caption_font, alignment=styles.caption_alignment)
 
         ## merge cells(first step).
         for index in range(total_rows - 7):
@@ -2649,59 +2442,82 @@ class SSM:
         for index, _text in enumerate(_texts):
             cell = sheet.cell(row=46 + index, column=1)
             cell.value = _text
-            cell.alignment = Alignment(shrinkToFit=False)
-            cell.font = ft_tiny
+            styles.apply(cell, alignment=styles.text_alignment, font=styles.font)
 
         # insert legend part.
         cell = sheet.cell(row=total_rows + 2, column=3)
         cell.value = "Favorable (Agree / Strongly Agree)"
-        cell.font = ft_tiny
-        cell.alignment = Alignment(horizontal="left", vertical="center", shrinkToFit=False)
+        styles.apply(cell, font=styles.font, alignment=styles.legend_alignment)
 
         cell = sheet.cell(row=total_rows + 2, column=5)
         cell.value = "Neither Agree Nor Disagree"
-        cell.font = ft_tiny
-        cell.alignment = Alignment(horizontal="left", vertical="center", shrinkToFit=False)
+        styles.apply(cell, font=styles.font, alignment=styles.legend_alignment)
 
         cell = sheet.cell(row=total_rows + 2, column=7)
         cell.value = "Unfavorable (Disagree / Strongly Disagree)"
-        cell.font = ft_tiny
-        cell.alignment = Alignment(horizontal="left", vertical="center", shrinkToFit=False)
+        styles.apply(cell, font=styles.font, alignment=styles.legend_alignment)
+
+        styles.apply(sheet.cell(row=total_rows + 2, column=2), fill=styles.favorable_back)
+        styles.apply(sheet.cell(row=total_rows + 2, column=4), fill=styles.neutral_back)
+        styles.apply(sheet.cell(row=total_rows + 2, column=6), fill=styles.unfavorable_back)
+
+        ## insert how to use sheet, copied from the template rendered once per run.
+        if "how to use" not in self._templates:
+            self._templates["how to use"] = SheetTemplate(self._makeHowToUse)
+        self._templates["how to use"].copyTo(self.book.create_sheet("How to Use"), styles)
+
+    def _makeBackground(self, sheet, styles, total_rows):
+        ## set empty cells white.
+        for row in range(1, total_rows + 40 + 1):
+            sheet.row_dimensions[row].height = 13
+            for col in range(1, 80):
+                cell = sheet.cell(row=row, column=col)
+                styles.apply(cell, fill=styles.white_back, alignment=styles.center_alignment, font=styles.summary_font)
+        
+        for col in range(1, 80):
+            sheet.column_dimensions[ce.get_column_letter(col)].width = 6.5
+
+        ## set width and height of columns.
+        # sheet.column_dimensions[ce.get_column_letter(1)].width = 40
+        sheet.column_dimensions[ce.get_column_letter(1)].width = 6
+        sheet.column_dimensions[ce.get_column_letter(2)].width = 4
+        sheet.column_dimensions[ce.get_column_letter(3)].width = 26
+        sheet.column_dimensions[ce.get_column_letter(4)].width = 4
+
+        # sheet.column_dimensions[ce.get_column_letter(2)].width = 40
+        sheet.column_dimensions[ce.get_column_letter(5)].width = 20
+        sheet.column_dimensions[ce.get_column_letter(6)].width = 4
+        sheet.column_dimensions[ce.get_column_letter(7)].width = 16
 
-        sheet.cell(row=total_rows + 2, column=2).fill = PatternFill("solid", fgColor="7f9ba7")
-        sheet.cell(row=total_rows + 2, column=4).fill = PatternFill("solid", fgColor="d8dada")
-        sheet.cell(row=total_rows + 2, column=6).fill = PatternFill("solid", fgColor="c2bfb5")
+        sheet.column_dimensions[ce.get_column_letter(8)].width = 1
 
-        ## insert 'how to use' sheet
-        how_sheet = self.book.create_sheet("How to Use")
-        how_font = Font(name="Arial", size=10)
-        cell = how_sheet.cell(column=1, row=1)
+    def _makeHowToUse(self, sheet, styles):
+        ## the how to use sheet is the same for every leader.
+        cell = sheet.cell(column=1, row=1)
         cell.value = self.how2use_pd.columns.values[0]
-        cell.alignment = Alignment(wrapText=True, shrinkToFit=False, indent=0)
-        cell.font = how_font
-        how_sheet.row_dimensions[1].height = int(len(self.how2use_pd.columns.values[0]) / 120 * (40 / 3))
+        styles.apply(cell, alignment=styles.how_alignment, font=styles.how_font)
+        sheet.row_dimensions[1].height = int(len(self.how2use_pd.columns.values[0]) / 120 * (40 / 3))
         
 
         for index in range(len(self.how2use_pd.index)):
             _ = 0
             for col_index in range(len(self.how2use_pd.columns)):
-                cell = how_sheet.cell(column=1 + col_index, row=2 + index)
+                cell = sheet.cell(column=1 + col_index, row=2 + index)
 
                 content = self.how2use_pd.iloc[index, col_index]
                 if _ < len(content):
                     _ = len(content)
                 cell.value = content
-                cell.alignment = Alignment(wrapText=True, shrinkToFit=False)
-                cell.font = how_font
-                how_sheet.column_dimensions[ce.get_column_letter(col_index + 1)].width = 135
+                styles.apply(cell, alignment=styles.how_alignment, font=styles.how_font)
+                sheet.column_dimensions[ce.get_column_letter(col_index + 1)].width = 135
 
-            how_sheet.row_dimensions[index + 2].height = int(_ / 110 * (40 / 3))
+            sheet.row_dimensions[index + 2].height = int(_ / 110 * (40 / 3))
 
 
 
         for row in range(1, 41 + len(self.how2use_pd.index)):
             for col in range(1, 41 + len(self.how2use_pd.columns)):
-                how_sheet.cell(row=row, column=col).fill = white_back
+                styles.apply(sheet.cell(row=row, column=col), fill=styles.white_back)
 
     def writeOutput(self):
         ## specify the path of output file
@@ -2721,201 +2537,58 @@ class SSM:
         os.makedirs(self.output_source + self.output_path, exist_ok=True)
 
         ## and write the output file.
-        self.book.save(path)
+        with phase("SSM", "save"):
+            self.book.save(path)
+        return path
 
     def _preProcess(self):
-        ## make a item group and filter the able source.
-        self._item_pd = self.item_code_pd[self.item_code_pd["Type ID"] == "T01"]
-
-        self._benchmark_item_pd = self._item_pd[self._item_pd["External Benchmark"] == "e"]
-        self._item_pd = self._item_pd[self._item_pd["External Benchmark"] == "i"]
-
-        self._rest_item_pd = self._item_pd[~self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
-        self._rest_item_pd = self._rest_item_pd[self._rest_item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
-        self._both_item_pd = self._item_pd[self._item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
+        ## take the shared leader-independent state.
+        survey = self.getSurvey()
+        self._catalog = survey.item_catalog
 
-        self.category_pd = self.origin_category_pd[self.origin_category_pd["Item ID in 2020 Survey"].isin(self._item_pd["Item ID"].tolist())]
-        self.category_pd = self.category_pd.drop_duplicates(subset=["Item ID in 2020 Survey"]).reset_index(drop=True)
-        self.order_category = self.category_pd.drop_duplicates(subset=["2020 Category"]).loc[:, "2020 Category"].tolist()
+        self.order_category = self._catalog.categories
 
-        self._group_dict = self.category_pd.groupby(["2020 Category"]).groups
+        ## favorable responses and the unfavorable, neutral or favorable state of each answer.
+        self.raw_data_pd = survey.raw_data_pd
+        self.response_states = survey.response_states
+        self.state_columns = survey.state_columns
+        self.raw_data_past_pd = survey.raw_data_past_pd
 
-        self.raw_data_pd = self.origin_raw_data_pd.iloc[2:].reset_index(drop=True)
-
-        ## filter the able source from history file.
-        self.raw_data_past_pd = self.origin_raw_data_past_pd.iloc[2:].reset_index(drop=True)
-
-        ## Convert numeric values into favorable, neutral, or not.
-        self.raw_data_n_pd = self.raw_data_pd.copy()
-        self.raw_data_uf_pd = self.raw_data_pd.copy()
-
-        for field in self._item_pd["Unique Item Code"]:
-            new_list = [[], [], []]
-            for item in self.raw_data_pd[field].tolist():
-                if item == 4 or item == 5:
-                    new_list[0].append(1)
-                    new_list[1].append(0)
-                    new_list[2].append(0)
-
-                elif item == 3:
-                    new_list[0].append(0)
-                    new_list[1].append(1)
-                    new_list[2].append(0)
-
-                elif item == 1 or item == 2:
-                    new_list[0].append(0)
-                    new_list[1].append(0)
-                    new_list[2].append(1)
-
-                else:
-                    new_list[0].append('')
-                    new_list[1].append('')
-                    new_list[2].append('')
+        self.demographics_pd = survey.demographics_pd
 
-            self.raw_data_pd[field] = new_list[0]
-            self.raw_data_n_pd[field] = new_list[1]
-            self.raw_data_uf_pd[field] = new_list[2]
-
-            ## do the same process about history data.
-            try:
-                field = self._get_past_field_name_by_current_name(field)
-                new_list_past = []
-                for item in self.raw_data_past_pd[field].tolist():
-                    if item < 4 and item > 0:
-                        new_list_past.append(0)
-                    elif item >= 4 and item <= 5:
-                        new_list_past.append(1)
-                    else:
-                        new_list_past.append('')
-                self.raw_data_past_pd[field] = new_list_past
-            except:
-                pass
-
-        ## new feature -> process A/B pair.
-        pairs = self._item_pd[self._item_pd["AB Code"].isin(["A", "B"])].reset_index(drop=True)
-        pairs_dict = pairs.groupby(["Item ID"]).groups
-
-        for key in pairs_dict:
-
-            _list = pairs_dict[key]
-            pairs_row = pairs.iloc[_list, :]
-            item_list = pairs_row["Unique Item Code"].tolist()
-            text_list = pairs_row["Short Text [2020 onward]"].tolist()
-            new_text = "/".join(text_list)
-            self._item_pd = self._item_pd[~(self._item_pd["Unique Item Code"] == item_list[1])].reset_index(drop=True)
-            _index = self._item_pd[self._item_pd["Unique Item Code"] == item_list[0]].index
-            self._item_pd.loc[_index, "Short Text [2020 onward]"] = new_text
-
-            column_pair = self.raw_data_pd[item_list]
-            column_n_pair = self.raw_data_n_pd[item_list]
-            column_uf_pair = self.raw_data_uf_pd[item_list]
-
-            _list = []
-            for index in range(len(column_pair.index)):
-                _row = column_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                    _list.append('')
-
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_pd = self.raw_data_pd.drop(columns=[item_list[1]])
-            self.raw_data_pd[item_list[0]] = _pd
-
-            _list = []
-            for index in range(len(column_n_pair.index)):
-                _row = column_n_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                    _list.append('')
-
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_n_pd = self.raw_data_n_pd.drop(columns=[item_list[1]])
-            self.raw_data_n_pd[item_list[0]] = _pd
-
-            _list = []
-            for index in range(len(column_uf_pair.index)):
-                _row = column_uf_pair.iloc[index, :].tolist()
-                for val in _row:
-                    if type(val) == type(0):
-                        _list.append(val)
-                        break
-                else:
-                    _list.append('')
-
-            _pd = pd.DataFrame(_list, columns=[item_list[0]])
-            self.raw_data_uf_pd = self.raw_data_uf_pd.drop(columns=[item_list[1]])
-            self.raw_data_uf_pd[item_list[0]] = _pd
-
-        self.demographics_pd = self.origin_demographics_pd
-
-        ## convert the demographics data to include only answered entries.
-        self._invited_demographics_data = self.demographics_pd[self.demographics_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_data = self._invited_demographics_data[self._invited_demographics_data.loc[:, "Worker ID"].isin(self.raw_data_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self._invited_demographics_data = survey.invited_demographics_data
+        self._answered_demographics_data = survey.answered_demographics_data
         self._gilead_org = self._answered_demographics_data
 
-        ## do the same process about history data.
-        self._invited_demographics_past_data = self.demographics_past_pd[self.demographics_past_pd["Invitee Flag"] == 1].reset_index(drop=True)
-        self._answered_demographics_past_data = self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, "Worker ID"].isin(self.raw_data_past_pd['ExternalReference'].tolist())].reset_index(drop=True)
+        self._invited_demographics_past_data = survey.invited_demographics_past_data
+        self._answered_demographics_past_data = survey.answered_demographics_past_data
+        self._respondents = survey.respondents
+        self._past_respondents = survey.past_respondents
+        self._segments = self._respondents.segments
+        self._past_segments = self._past_respondents.segments
+        self._past_cube = survey.past_score_cube
+        self._org_tree = survey.org_tree
+        self._past_org_tree = survey.past_org_tree
 
-        if self.GM:
-            self._gm_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.GM] == 1].reset_index(drop=True)
-            self._gm_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.GM] == 1].reset_index(drop=True)
 
-        if self.site_lead:
-            self._site_demographics_data = self._answered_demographics_data[self._answered_demographics_data[self.site_lead] == 1].reset_index(drop=True)
-            self._site_demographics_past_data = self._answered_demographics_past_data[self._answered_demographics_past_data[self.site_lead] == 1].reset_index(drop=True)      
 
         self.right_dict = {'f':{}, 'n':{}, 'uf':{}}
         self.left_dict = {'d':{}, 'e':{}, 'f':{}}
         self.benchmark_dict = {}
         self.past_dict = {}
 
-    def _get_past_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            new_field_name = self._rest_item_pd[self._rest_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            new_field_name = None
-
-        if new_field_name == None:
-            try:
-                new_field_name = self._both_item_pd[self._both_item_pd["Unique Item Code"] == field_name]["Unique Item Code"].values[0]
-            except:
-                new_field_name = None
-
-        return new_field_name
-
-    def _get_benchmark_field_name_by_current_name(self, field_name):
-        _item_id = self._item_pd[self._item_pd["Unique Item Code"] == field_name]["Item ID"].values[0]
-        try:
-            field_name = self._benchmark_item_pd[self._benchmark_item_pd["Item ID"] == _item_id]["Unique Item Code"].values[0]
-        except:
-            field_name = None
-        
-        return field_name
-
     def _prepareColumnsForID(self):
         ## find the supervisor level of the given leader id.
         self.first_row = {"current": {}, "past": {}}
         _temp = "Supervisor Level {} ID"
 
-        leader_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._leader_id]
+        leader_entry = self._org_tree.entry(self._leader_id)
 
         if self._leader_id == 999999:
             self.logic = 1
             leader_level = 1
         else:
-            for index, level in enumerate(leader_entry.loc[:, _temp.format(2) : _temp.format(10)]):
-                if (leader_entry[level] == self._leader_id).tolist()[0]:
-                    leader_level = index + 2
-                    break
+            leader_level = self._org_tree.level(self._leader_id)
 
         self.output_path = "/" + leader_entry["Worker Name"].values[0]
         self.file_name = leader_entry["Worker Last Name"].values[0]
@@ -2925,7 +2598,7 @@ class SSM:
         if leader_level >= 3:
             self.logic = 3
             self._supervisor_id = leader_entry.loc[:, _temp.format(supervisor_level)].values[0]
-            _supervisor_entry = self.origin_demographics_pd[self.origin_demographics_pd.loc[:, "Worker ID"] == self._supervisor_id]
+            _supervisor_entry = self._org_tree.entry(self._supervisor_id)
             self._supervisor_last_name = _supervisor_entry["Worker Last Name"].values[0]
 
             ## get Parent group.
@@ -2937,50 +2610,51 @@ class SSM:
 
         ## get Your Org data
         if self.logic == 1:
-            self._your_org = self._answered_demographics_data
+            self._your_mask = self._segments.answered()
             self._invited = len(self._invited_demographics_data.index)
             self._invited_past = len(self._invited_demographics_past_data.index)
 
-            self._kite = self._answered_demographics_data[self._answered_demographics_data["Kite Employee Flag"] == "Kite"].reset_index(drop=True)
-            self._no_kite = self._answered_demographics_data[self._answered_demographics_data["Kite Employee Flag"] == "Gilead (No Kite)"].reset_index(drop=True)
+            self._kite_mask = self._segments.mask("Kite Employee Flag", "Kite")
+            self._no_kite_mask = self._segments.mask("Kite Employee Flag", "Gilead (No Kite)")
         else:
             if self.GM:
-                self._your_org = self._gm_demographics_data
+                self._your_mask = self._segments.mask(self.GM, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.GM] == 1].index)
                 self._invited_past = len(self._invited_demographics_past_data[self._invited_demographics_past_data[self.GM] == 1].index)
 
             elif self.site_lead:
-                self._your_org = self._site_demographics_data
+                self._your_mask = self._segments.mask(self.site_lead, 1)
                 self._invited = len(self._invited_demographics_data[self._invited_demographics_data[self.site_lead] == 1].index)
 
             else:
-                self._your_org = self._answered_demographics_data[self._answered_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
-                self._invited = len(self._invited_demographics_data[self._invited_demographics_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
-                self._invited_past = len(self._invited_demographics_past_data[self._invited_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True).iloc[:, 0])
+                self._your_mask = self._segments.org(leader_level, self._leader_id)
+                self._invited = self._org_tree.invited(leader_level, self._leader_id)
+                self._invited_past = self._past_org_tree.invited(leader_level, self._leader_id)
 
-        ## get your history group
+        ## get your history group, its key in the past score cube.
         if self.GM:
-            self._your_past_org = self._gm_demographics_past_data
+            self._your_past_org = self.GM
         elif self.site_lead:
-            self._your_past_org = self._site_demographics_past_data
+            self._your_past_org = self.site_lead
         else:
             if self.logic == 1:
-                self._your_past_org = self._answered_demographics_past_data
+                self._your_past_org = self._past_cube.full_span
             else:
-                self._your_past_org = self._answered_demographics_past_data[self._answered_demographics_past_data.loc[:, _temp.format(leader_level)] == self._leader_id].reset_index(drop=True)
+                self._your_past_org = self._past_org_tree.span(leader_level, self._leader_id)
 
         ## calculate nums of participated
-        self._participated = len(self._your_org.loc[:, "Worker ID"])
-        self._participated_past = len(self._your_past_org.loc[:, "Worker ID"])
+        self._participated = int(self._your_mask.sum())
+        self._participated_past = self._past_cube.org(self._your_past_org).respondents
 
     def _filterResource(self, id_list):
 
-        filter_item = self._item_pd[self._item_pd["Item ID"].isin(id_list)]["Unique Item Code"].tolist()
+        filter_item = self._catalog.getCodes(id_list)
 
         filter_item.insert(0, 'ExternalReference')
         self._filtered_raw_data = self.raw_data_pd[filter_item]
-        self._filtered_raw_n_data = self.raw_data_n_pd[filter_item]
-        self._filtered_raw_uf_data = self.raw_data_uf_pd[filter_item]
+        self._filtered_columns = self._filtered_raw_data.columns.values[1:]
+        self._filtered_values = self._filtered_raw_data.iloc[:, 1:].to_numpy()
+        self._filtered_states = self.response_states[:, [self.state_columns[code] for code in self._filtered_columns]]
 
         ## about history data.
         self._helper_past = False
@@ -2989,13 +2663,14 @@ class SSM:
             if index == 0:
                 filter_past_item.append(item)
             else:
-                new_item = self._get_past_field_name_by_current_name(item)
+                new_item = self._catalog.getPastCode(item)
                 if new_item != None:
                     filter_past_item.append(new_item)
                 else:
                     self._helper_past = True
         
         self._filtered_raw_past_data = self.raw_data_past_pd[filter_past_item]
+        self._filtered_past_columns = self._filtered_raw_past_data.columns.values[1:]
 
         ## about benchmark data.
         self._helper_benchmark = False
@@ -3004,7 +2679,7 @@ class SSM:
             if index == 0:
                 filter_benchmark_item.append(item)
             else:
-                new_item = self._get_benchmark_field_name_by_current_name(item)
+                new_item = self._catalog.getBenchmarkCode(item)
                 if new_item:
                     filter_benchmark_item.append(new_item)
                 else:
@@ -3015,18 +2690,12 @@ class SSM:
     def _calculateEachRow(self, item):
 
         ## calculate the right columns.
-        _dict, lens = self._calculateOverall(self._your_org, item)
-        self.right_dict['f'].update(_dict)
-
-        _dict, lens = self._calculateOverall(self._your_org, item, f=1)
-        self.right_dict['n'].update(_dict)
-
-        _dict, lens = self._calculateOverall(self._your_org, item, f=2)
-        self.right_dict['uf'].update(_dict)
+        for key, _dict in zip(['f', 'n', 'uf'], self._calculateDistribution(self._your_mask, item)):
+            self.right_dict[key].update(_dict)
 
         ## calculate D %s
         if len(self._filtered_raw_past_data.columns) > 1:
-            _dict, lens = self._calculateOverall(self._your_past_org, item, history=True)
+            _dict, lens = self._calculateHistory(self._past_cube.org(self._your_past_org), item)
             # for key in _dict:
             #     try:
             #         _dict[key][0] = self.right_dict['f'][key][0] - _dict[key][0]
@@ -3047,8 +2716,8 @@ class SSM:
 
         ## calculate F %s
         if self.logic == 1:
-            _dict, lens = self._calculateOverall(self._kite, item)
-            __dict, lens = self._calculateOverall(self._no_kite, item)
+            _dict, lens = self._calculateOverall(self._kite_mask, item)
+            __dict, lens = self._calculateOverall(self._no_kite_mask, item)
 
             for key in _dict:
                 try:
@@ -3056,7 +2725,7 @@ class SSM:
                 except:
                     _dict[key][0] = "N/A"
         else:
-            _dict, lens = self._calculateOverall(self._gilead_org, item)
+            _dict, lens = self._calculateOverall(self._respondents.answered, item)
             for key in _dict:
                 try:
                     _dict[key][0] = self.right_dict['f'][key][0] - _dict[key][0]
@@ -3065,88 +2734,29 @@ class SSM:
         self.left_dict['f'].update(_dict)            
 
 
-    def _calculateOverall(self, dataframe, item, history=False, f=0):
+    def _calculateOverall(self, mask, item):
 
         ## calcualte overall fields.
-        ids = dataframe.iloc[:, 0]
-        if history:
-            working_pd = self._filtered_raw_past_data[self._filtered_raw_past_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-        else:
-            if f == 0:
-                working_pd = self._filtered_raw_data[self._filtered_raw_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-            elif f == 1:
-                working_pd = self._filtered_raw_n_data[self._filtered_raw_n_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-            elif f == 2:
-                working_pd = self._filtered_raw_uf_data[self._filtered_raw_uf_data["ExternalReference"].isin(ids)].reset_index(drop=True)
-
-        nums = len(working_pd.iloc[:, 0])
-        return self._get_sum(working_pd.iloc[:, 1:], nums, item, history), len(ids)
-
-    def _get_sum(self, data, nums, item, implicity=False):
-
-        ## calculate the sum of favorable scores.
-        _dict = {}
-        determine_parent_na = False
-
-        for ind in range(len(data.columns)):
-            _ = data.iloc[:, ind]
-            is_empty_column = True
-            lens = nums
-            sub = 0
-            count_valid = 0
-            for __ in _:
-                if __ != '':
-                    is_empty_column = False
-                    sub += __
-                    count_valid += 1
-                else:
-                    lens -= 1
-            if is_empty_column:
-                _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                determine_parent_na = True
-            else:
-                if count_valid >= 4:
-                    _dict.update({data.columns.values[ind]: [sub / lens, 1]})
-                else:
-                    _dict.update({data.columns.values[ind]: ["N/A", 1]})
-                    determine_parent_na = True
-        
-        if determine_parent_na:
-            _dict.update({item: ["N/A", 0]})
-        else:
-            total_lens = nums
-            total = 0
-            cols = len(data.columns)
-            for ind in range(nums):
-                _series = data.iloc[ind, :]
-                sub_sum = 0
-                _is_nan = False
-                for val in _series:
-                    if val != '':
-                        sub_sum += val
-                    else:
-                        _is_nan = True
-                        total_lens -= 1
-                        break
+        nums = int(mask.sum())
+        return get_scores(self._filtered_columns, self._filtered_values[mask], nums, item), nums
 
-                if not _is_nan:
-                    total += sub_sum / cols
+    def _calculateDistribution(self, mask, item):
 
-            if total_lens < 4:
-                _dict.update({item: ["N/A", 0]})
-            else:
-                _dict.update({item: [total / total_lens, 0]})
+        ## the favorable, neutral and unfavorable fields from one count of the answer states.
+        return get_state_scores(self._filtered_columns, self._filtered_states[mask], item)
 
-        if implicity:
-                _dict.update({item: ["N/A", 0]})
-        return _dict
+    def _calculateHistory(self, counts, item):
+
+        ## calcualte the past fields of an org from its counts, the category is N/A.
+        columns = self._filtered_past_columns
+        return get_count_scores(columns, counts.get("favorable", columns), counts.get("valid", columns), item), counts.respondents
 
     def _makeBenchColumn(self):
         for criteria, item in self._item_list:
             origin_item = item
             if criteria == 1:
-                origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                item = self._get_benchmark_field_name_by_current_name(origin_item)
+                origin_item = self._catalog.getCode(item)
+                item = self._catalog.getBenchmarkCode(origin_item)
             _ = ["N/A", 1 if criteria else 0]
             try:
                 _ = self.benchmark_dict[item]
@@ -3159,8 +2769,8 @@ class SSM:
         for criteria, item in self._item_list:
             origin_item = item
             if criteria == 1:
-                origin_item = self._item_pd[self._item_pd["Item ID"] == item]["Unique Item Code"].values[0]
-                item = self._get_past_field_name_by_current_name(origin_item)
+                origin_item = self._catalog.getCode(item)
+                item = self._catalog.getPastCode(origin_item)
             _ = ["N/A", 1 if criteria else 0]
             try:
                 _ = self.past_dict[item]
@@ -3170,13 +2780,6 @@ class SSM:
                 _ = ["N/A", 1 if criteria else 0]
             self.left_dict['d'].update({origin_item: _})
 
-
-    def _get_color(self, delta):
-        if abs(delta) > 25:
-            delta = delta // abs(delta) * 25
-        series = self.heatmap_color_pd[self.heatmap_color_pd["Delta"] == delta]
-        return str(hex(series["R"].values[0]))[2:] + str(hex(series["G"].values[0]))[2:] + str(hex(series["B"].values[0]))[2:]
-
 if __name__ == "__main__":
 
     ## Create a object.
@@ -3194,13 +2797,33 @@ if __name__ == "__main__":
         'output_folder': "./output",
         'input_folder': "./input",
         'image': "image.png",
+        ## number of worker processes, all the cpus if None.
+        'workers': None,
+        ## write the reports with the streaming backend, the cells are styled once per style and written as text, on a tested openpyxl.
+        'streaming': True,
+        ## skip the leaders whose reports were already built from the same inputs.
+        'incremental': True,
+        ## keep every score of the run in the output folder, to query it later with ScoreStore.
+        'score_store': True,
+        ## port of the local report service building single leaders on request, the batch runs if None.
+        'serve': None,
+        ## file of the time, CPU and peak memory of each phase of each leader in the output folder, .csv or .jsonl, None to skip it.
+        'trace': TRACE_FILE,
+        ## show the progress bars.
+        'progress': True,
     }
 
-    dfm = DemographicFileMaker(**init_data)
+    set_progress(init_data["progress"])
+    start_trace(init_data["output_folder"] + "/" + init_data["trace"] if init_data["trace"] else None)
+
+    ## the input workbooks are read once and shared by all makers.
+    inputs = SurveyInputs(**init_data)
+
+    dfm = DemographicFileMaker(inputs, **init_data)
     ## you can change GM_region_human_parentorg here.
     # dfm.setGMParentFlag(0)
 
-    ltm = LTMaker(**init_data)
+    ltm = LTMaker(inputs, **init_data)
     ## set GM_region_human_parentorg = 0.
     # ltm.setGMParentFlag(1)
 
@@ -3215,49 +2838,37 @@ Gilead column compares {}'s scores to Gilead Overall (negative indicates {} less
 """
         }
     )
-    ssm = SSM(**init_data)
+    ssm = SSM(inputs, **init_data)
 
 
     ## read all needed files.
-    dfm.readAllFiles()
-    ltm.readAllFiles()
-    ssm.readAllFiles()
+    with phase("inputs", "read"):
+        dfm.readAllFiles()
+        ltm.readAllFiles()
+        ssm.readAllFiles()
+
+    ## preprocess the survey once and share it between all makers.
+    with phase("PreprocessedSurvey", "preprocess"):
+        survey = dfm.getSurvey()
+    ltm.setSurvey(survey)
+    ssm.setSurvey(survey)
+
+    def build(job):
+        ## build the reports of a job, returns the result and the files written.
+        dfm.setLeader(*job)
+        ltm.setLeader(*job)
+        ssm.setLeader(*job)
 
-    total_ids = len(dfm.leaders.index) + len(dfm.GMs.index) + len(dfm.site_leads.index)
-
-    victims = []
-
-    for index in tqdm(range(total_ids), desc="total process"):
-        if index < len(dfm.leaders.index):
-            dfm.setLeader(dfm.leaders.iloc[index, :].values[0])
-            ltm.setLeader(ltm.leaders.iloc[index, :].values[0])
-            ssm.setLeader(ssm.leaders.iloc[index, :].values[0])
-
-        elif index < len(dfm.leaders.index) + len(dfm.GMs.index):
-            row = dfm.GMs.iloc[index - len(dfm.leaders.index), :]
-            dfm.setLeader(row["GM ID"], row["GM Org"])
-
-            row = ltm.GMs.iloc[index - len(ltm.leaders.index), :]
-            ltm.setLeader(row["GM ID"], row["GM Org"])
-
-            row = ssm.GMs.iloc[index - len(ssm.leaders.index), :]
-            ssm.setLeader(row["GM ID"], row["GM Org"])
-
-        else:
-            row = dfm.site_leads.iloc[index - len(dfm.leaders.index) - len(dfm.GMs.index), :]
-            dfm.setLeader(row["Site Leader ID"], False, row["Site Name"])
-
-            row = ltm.site_leads.iloc[index - len(ltm.leaders.index) - len(ltm.GMs.index), :]
-            ltm.setLeader(row["Site Leader ID"], False, row["Site Name"])
-
-            row = ssm.site_leads.iloc[index - len(ssm.leaders.index) - len(ssm.GMs.index), :]
-            ssm.setLeader(row["Site Leader ID"], False, row["Site Name"])
-    
         ## do main process to calculate report.
         result = dfm.calculateValues()
+        files = []
+        scores = {}
         if not result:
+            scores["Demographic Trends"] = dfm.getScores()
+
             ## make report dataframe to output.
-            dfm.makeReport()
+            with phase("DemographicFileMaker", "makeReport"):
+                dfm.makeReport()
 
             ## write output file (Mockup STAR.xlsx)
             book = dfm.getWorkBook()
@@ -3265,21 +2876,64 @@ Gilead column compares {}'s scores to Gilead Overall (negative indicates {} less
             ltm.setWorkBook(book)
 
             ltm.calculateValues()
+            scores["Score Details"] = ltm.getScores()
 
-            ltm.makeReport()
+            with phase("LTMaker", "makeReport"):
+                ltm.makeReport()
 
-            ltm.writeOutput()
+            files.append(ltm.writeOutput())
 
             ssm.calculateValues()
+            scores["Score Summary"] = ssm.getScores()
 
-            ssm.makeReport()
+            with phase("SSM", "makeReport"):
+                ssm.makeReport()
 
-            ssm.writeOutput()
+            files.append(ssm.writeOutput())
         else:
-            victims.append([result[0], result[1]])
-    
+            result = [result[0], result[1]]
+
+        if store is not None:
+            with phase("ScoreStore", "record"):
+                store.record(job, scores)
+            files.append(store.path)
+        return result, files
+
+    def process(job):
+        with trace_job(job):
+            ## keep the reports of a leader whose inputs did not change.
+            if manifest is not None:
+                key = manifest.getKey(job)
+                entry = manifest.lookup(job, key)
+                if entry is not None:
+                    return entry["result"]
+
+            result, files = build(job)
+            if manifest is not None:
+                manifest.record(job, key, files, result)
+            return result
+
+    ## count every org of the batch at once, the GM orgs and sites are flag columns.
+    with phase("PreprocessedSurvey", "load"):
+        survey.load(flags=list(dfm.GM_levels["GM Org"]) + list(dfm.site_leads["Site Name"]))
+    manifest = BuildManifest(survey, **init_data) if init_data["incremental"] else None
+    store = ScoreStore(init_data["output_folder"] + "/" + STORE_FILE) if init_data["score_store"] else None
+
+    ## keep the survey loaded and build the leaders asked for, e.g. python report_service.py 112372
+    if init_data["serve"]:
+        ReportService(build, port=init_data["serve"]).serve()
+        sys.exit()
+
+    ## fan the leaders out over the worker processes, the makers are forked with the survey.
+    jobs = leader_jobs(dfm.leaders, dfm.GMs, dfm.site_leads)
+    results = run_batch(process, jobs, init_data["workers"])
+    victims = [result[0] for result in results if result[0]]
+
     if len(victims) > 0:
         df = pd.DataFrame(victims, columns=["ID", "Org"])
         df.to_excel(init_data["output_folder"] + "/rest.xlsx", index=False)
 
+    print_timings(jobs, results, top=0 if init_data["trace"] else 5)
+    if init_data["trace"]:
+        print_trace_summary(init_data["output_folder"] + "/" + init_data["trace"])
     print("complete!")
\ No newline at end of file
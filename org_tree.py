@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+
+
+SUPERVISOR_LEVEL = "Supervisor Level {} ID"
+
+
+def is_span(key):
+    ## whether a key of OrgTree.span is a range of positions rather than the bitmap key of a broken supervisor.
+    return not isinstance(key[0], str)
+
+
+class OrgTree:
+    """
+    The supervisor hierarchy of one demographics file, built once per year.
+    A node is a (level, Worker ID) pair of the Supervisor Level N ID columns and the rows are numbered
+    in Euler-tour order, so the org of a leader is the range of positions [start, stop) of its node.
+    A supervisor listed under two chains of supervisors, e.g. in a stale row, is linked under the first one,
+    so its org and those of the supervisors above it are not one range. They are kept in broken and their
+    key is the (Supervisor Level N ID column, Worker ID) of SegmentIndex.mask instead of a span.
+    """
+
+    def __init__(self, demographics, levels=10):
+        self.demographics = demographics
+        levels = [level for level in range(1, levels + 1) if SUPERVISOR_LEVEL.format(level) in demographics.columns]
+        chains = demographics[[SUPERVISOR_LEVEL.format(level) for level in levels]].to_numpy().tolist()
+        worker_ids = demographics["Worker ID"].tolist()
+
+        self._rows = {}
+        self._levels = {}
+        self._children = {}
+        self._parents = {}
+        self.broken = set()
+        nodes = []
+        deepest = []
+        for index, (worker_id, chain) in enumerate(zip(worker_ids, chains)):
+            self._rows.setdefault(worker_id, index)
+
+            ## link each supervisor to the one above it, the row hangs under its deepest supervisor.
+            parent = None
+            nodes.append([])
+            for level, value in zip(levels, chain):
+                if pd.isna(value):
+                    continue
+                node = (level, value)
+                nodes[-1].append(node)
+                if node not in self._parents:
+                    self._parents[node] = parent
+                    self._children.setdefault(node, [])
+                    self._children.setdefault(parent, []).append(node)
+                if value == worker_id and level >= 2:
+                    self._levels.setdefault(index, level)
+                parent = node
+            deepest.append(parent)
+
+        self._prepareTour(deepest)
+        self._prepareBroken(nodes)
+
+        ## the first row of each worker, to find the workers of the responses.
+        self._index = pd.Index(list(self._rows))
+        self._first_rows = np.array(list(self._rows.values()), dtype=np.int64)
+
+        invited = self.positions[demographics["Invitee Flag"].to_numpy() == 1]
+        self._invited_positions = np.sort(invited)
+
+        ## the demographics row at each position.
+        self._tour_rows = np.argsort(self.positions)
+
+    def _prepareTour(self, deepest):
+
+        ## number the rows in depth-first order of the nodes, children in ascending Worker ID.
+        hanging = {}
+        for index, node in enumerate(deepest):
+            hanging.setdefault(node, []).append(index)
+
+        self.positions = np.zeros(len(deepest), dtype=np.int64)
+        self._spans = {}
+
+        ## the first position of the node each position hangs under, i.e. the leaf manager of the row.
+        self.leaves = np.zeros(len(deepest), dtype=np.int64)
+        position = 0
+        stack = [(None, False)]
+        while stack:
+            node, finished = stack.pop()
+            if finished:
+                self._spans[node] = (self._spans[node], position)
+                continue
+
+            self._spans[node] = position
+            for index in hanging.get(node, []):
+                self.positions[index] = position
+                self.leaves[position] = self._spans[node]
+                position += 1
+            stack.append((node, True))
+            for child in sorted(self._children.get(node, []), reverse=True):
+                stack.append((child, False))
+
+    def _prepareBroken(self, nodes):
+
+        ## a supervisor is broken if a row listing it is out of its span, or its span holds a row not listing it.
+        counts = {}
+        for index, row_nodes in enumerate(nodes):
+            position = self.positions[index]
+            for node in row_nodes:
+                counts[node] = counts.get(node, 0) + 1
+                start, stop = self._spans[node]
+                if not start <= position < stop:
+                    self.broken.add(node)
+        for node, (start, stop) in self._spans.items():
+            if node is not None and counts[node] != stop - start:
+                self.broken.add(node)
+
+    def _getColumnMask(self, level, worker_id):
+        ## the demographics rows whose Supervisor Level N ID is worker_id.
+        return (self.demographics[SUPERVISOR_LEVEL.format(level)] == worker_id).to_numpy()
+
+    def entry(self, worker_id):
+        ## the demographics row of a worker, empty if there is none.
+        if worker_id in self._rows:
+            return self.demographics.iloc[[self._rows[worker_id]]]
+        return self.demographics.iloc[[]]
+
+    def level(self, worker_id):
+        ## the first Supervisor Level N ID column, from 2, holding the worker itself.
+        return self._levels[self._rows[worker_id]]
+
+    def span(self, level, worker_id):
+        ## the positions of the org of a supervisor, or the (column, worker_id) key of its bitmap if it is broken.
+        if (level, worker_id) in self.broken:
+            return (SUPERVISOR_LEVEL.format(level), worker_id)
+        return self._spans.get((level, worker_id), (0, 0))
+
+    def spans(self):
+        ## the span of every node, the whole tree first.
+        return list(self._spans.values())
+
+    def children(self, level, worker_id):
+        ## the direct reports of a supervisor, ascending.
+        if (level, worker_id) in self.broken:
+            column = SUPERVISOR_LEVEL.format(level + 1)
+            if column not in self.demographics.columns:
+                return []
+            return sorted(self.demographics.loc[self._getColumnMask(level, worker_id), column].dropna().unique().tolist())
+        return sorted(value for child_level, value in self._children.get((level, worker_id), []) if child_level == level + 1)
+
+    def rows(self, level, worker_id):
+        ## the demographics rows of the org of a supervisor, in tour order.
+        if (level, worker_id) in self.broken:
+            return np.flatnonzero(self._getColumnMask(level, worker_id))
+        start, stop = self.span(level, worker_id)
+        return self._tour_rows[start:stop]
+
+    def invited(self, level, worker_id):
+        ## the number of invited rows whose Supervisor Level N ID is worker_id.
+        if (level, worker_id) in self.broken:
+            return int((self._getColumnMask(level, worker_id) & (self.demographics["Invitee Flag"].to_numpy() == 1)).sum())
+        start, stop = self.span(level, worker_id)
+        return int(np.searchsorted(self._invited_positions, stop) - np.searchsorted(self._invited_positions, start))
+
+    def locate(self, worker_ids):
+        ## the tree position of each worker, -1 if it is not in the demographics.
+        rows = self._index.get_indexer(worker_ids)
+        return np.where(rows >= 0, self.positions[self._first_rows[rows]], -1)
@@ -0,0 +1,15 @@
+import numpy as np
+
+
+def to_python(value):
+    ## numpy scalars of the leader file, e.g. the Worker IDs, as Python values, the other values are kept.
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def json_default(value):
+    """
+    The default of json.dump for the numpy scalars, e.g. json.dumps(job, default=json_default).
+    """
+    if isinstance(value, np.generic):
+        return to_python(value)
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value).__name__))
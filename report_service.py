@@ -0,0 +1,102 @@
+import json
+import sys
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.request import urlopen
+from urllib.error import HTTPError
+from python_values import json_default
+
+
+## the address of the local report service.
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class ReportService:
+    """
+    A long-lived local HTTP service building the reports of one leader on request, e.g. the re-cut of a report after the batch.
+    The survey is read and preprocessed once when the service starts, so a request only pays for the leader itself.
+    GET /report?leader=112372 builds the reports of the leader, &gm=France Org of a GM org and &site=Foster City / CA of a site lead,
+    and answers {"job": ..., "result": ..., "files": [...], "seconds": ...}.
+    The requests are served one at a time, the makers keep the state of the leader they are building.
+    build: function of one job, the setLeader arguments, returning the result and the files written
+    """
+
+    def __init__(self, build, host=HOST, port=PORT):
+        self.build = build
+        self.server = HTTPServer((host, port), self._makeHandler())
+
+    def serve(self):
+        host, port = self.server.server_address[:2]
+        print("serving the reports on http://{}:{}/report?leader=...".format(host, port))
+        try:
+            self.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.server.server_close()
+
+    def _makeHandler(self):
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/report":
+                    return self._answer(404, {"error": "unknown path " + url.path})
+                try:
+                    job = get_job(parse_qs(url.query))
+                except (KeyError, ValueError) as error:
+                    return self._answer(400, {"error": "bad request: " + str(error)})
+
+                start = time.perf_counter()
+                try:
+                    result, files = service.build(job)
+                except Exception as error:
+                    return self._answer(500, {"job": job, "error": repr(error)})
+                self._answer(200, {"job": job, "result": result, "files": files, "seconds": time.perf_counter() - start})
+
+            def _answer(self, status, content):
+                body = json.dumps(content, default=json_default).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def get_job(query):
+    ## the setLeader arguments of a request, like the jobs of leader_jobs.
+    leader = int(query["leader"][0])
+    if "gm" in query:
+        return [leader, query["gm"][0]]
+    if "site" in query:
+        return [leader, False, query["site"][0]]
+    return [leader]
+
+
+def request_report(leader, gm=None, site=None, host=HOST, port=PORT):
+    """
+    Asks the running service for the reports of a leader and returns its answer.
+    """
+    query = {"leader": leader}
+    if gm:
+        query["gm"] = gm
+    if site:
+        query["site"] = site
+    try:
+        with urlopen("http://{}:{}/report?{}".format(host, port, urlencode(query))) as response:
+            return json.load(response)
+    except HTTPError as error:
+        return json.load(error)
+
+
+if __name__ == "__main__":
+
+    ## e.g. python report_service.py 112372, python report_service.py 100092 gm="France Org"
+    args = dict(arg.split("=", 1) for arg in sys.argv[2:])
+    print(json.dumps(request_report(sys.argv[1], **args), indent=2))
@@ -0,0 +1,105 @@
+import openpyxl
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, numbers
+from openpyxl.styles.cell_style import StyleArray
+
+
+## the openpyxl versions the streaming backend and the style registry are tested with by tests/test_reports.py,
+## they use the private style tables and cell writer of openpyxl, so the reports use its public API on other versions.
+TESTED_OPENPYXL = ("3.1.",)
+
+
+def is_tested_openpyxl():
+    return openpyxl.__version__.startswith(TESTED_OPENPYXL)
+
+
+## the style table of the workbook and the field of the cell style array of each style.
+STYLE_FIELDS = {
+    "font": ("_fonts", "fontId"),
+    "fill": ("_fills", "fillId"),
+    "border": ("_borders", "borderId"),
+    "alignment": ("_alignments", "alignmentId"),
+    "number_format": ("_number_formats", "numFmtId"),
+}
+
+
+class ReportStyles:
+    """
+    The named cell styles of the reports, built once and shared by DemographicFileMaker, LTMaker and SSM.
+    A ReportStyles of a workbook adds each style to the style table of the workbook on its first use,
+    and then sets it on the cells by its index, instead of openpyxl hashing the style on every assignment.
+    """
+
+    side = Side(style='thin', color="CCCCCC")
+
+    ## the trend sheets.
+    font = Font(name="Arial", size=8)
+    bold_font = Font(name="Arial", size=8, bold=True)
+    na_font = Font(name="Arial", size=8, color="999999")
+    bold_na_font = Font(name="Arial", size=8, color="999999", bold=True)
+    vertical_alignment = Alignment(textRotation=90, horizontal='center')
+    right_alignment = Alignment(horizontal='right', vertical='center')
+    left_alignment = Alignment(horizontal='left', vertical='center')
+    picture_alignment = Alignment(horizontal='right', vertical='bottom', wrapText=True)
+    grey_back = PatternFill("solid", fgColor="EEEEEE")
+    white_back = PatternFill("solid", fgColor="FFFFFF")
+    thin_border = Border(left=side, right=side, top=side, bottom=side)
+
+    ## the score summary sheet.
+    summary_font = Font(name="Arial", size=10)
+    summary_bold_font = Font(name="Arial", size=10, bold=True)
+    summary_title_font = Font(name="Arial", size=11, bold=True)
+    caption_font = Font(name="Arial Black", size=24, color="D9D9D9", bold=True)
+    center_alignment = Alignment(horizontal='center', vertical="center")
+    caption_alignment = Alignment(horizontal="left", vertical="center")
+    legend_alignment = Alignment(horizontal="left", vertical="center", shrinkToFit=False)
+    text_alignment = Alignment(shrinkToFit=False)
+    category_border = Border(top=side, bottom=side)
+    last_border = Border(bottom=side)
+    favorable_back = PatternFill("solid", fgColor="7f9ba7")
+    neutral_back = PatternFill("solid", fgColor="d8dada")
+    unfavorable_back = PatternFill("solid", fgColor="c2bfb5")
+
+    ## the how to use sheet.
+    how_font = Font(name="Arial", size=10)
+    wrap_alignment = Alignment(wrapText=True)
+    how_alignment = Alignment(wrapText=True, shrinkToFit=False)
+
+    ## the number formats.
+    count_format = numbers.BUILTIN_FORMATS[3]
+    percent_format = numbers.FORMAT_PERCENTAGE
+    plus_format = "+0%"
+    minus_format = "-0%"
+
+    def __init__(self, book):
+        self.book = book
+        self._ids = {}
+
+        ## the streaming workbook finds the style ids itself when it is saved, and an untested openpyxl sets the styles itself.
+        self._indexed = isinstance(book, openpyxl.Workbook) and is_tested_openpyxl()
+
+    def apply(self, cell, **styles):
+        """
+        Sets the given font, fill, border, alignment and number_format of the cell, e.g.
+        styles.apply(cell, font=styles.font, border=styles.thin_border)
+        """
+        if not self._indexed:
+            for name, style in styles.items():
+                setattr(cell, name, style)
+            return
+
+        if not cell._style:
+            cell._style = StyleArray()
+        for name, style in styles.items():
+            key = (name, style) if name == "number_format" else (name, id(style))
+            if key not in self._ids:
+                self._ids[key] = self._addStyle(name, style)
+            setattr(cell._style, STYLE_FIELDS[name][1], self._ids[key][0])
+
+    def _addStyle(self, name, style):
+        ## the same ids as openpyxl, the style is kept so its id is not reused.
+        table = getattr(self.book, STYLE_FIELDS[name][0])
+        if name != "number_format":
+            return table.add(style), style
+        if style in numbers.BUILTIN_FORMATS_REVERSE:
+            return numbers.BUILTIN_FORMATS_REVERSE[style], style
+        return table.add(style) + numbers.BUILTIN_FORMATS_MAX_SIZE, style
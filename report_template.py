@@ -0,0 +1,44 @@
+from copy import copy
+import openpyxl
+
+from report_styles import ReportStyles
+
+
+class SheetTemplate:
+    """
+    The static part of a report sheet, like the "How to Use" sheet or the white background.
+    It is rendered once per run into a workbook of its own, and then copied into the sheet of each report
+    with its values, styles, column widths and row heights, instead of being rendered again for every leader.
+    render: function of (sheet, styles) writing the static part
+    """
+
+    def __init__(self, render):
+        self.book = openpyxl.Workbook()
+        self.sheet = self.book.active
+        render(self.sheet, ReportStyles(self.book))
+
+        ## the value and the style objects of each cell of the template, read through the public cell attributes.
+        ## the cells of the same style share the same objects, so the registry of the report adds each style once.
+        self._cells = []
+        styles = {}
+        for row in self.sheet.iter_rows():
+            for cell in row:
+                if cell.value is None and not cell.has_style:
+                    continue
+                style = (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment), cell.number_format)
+                if style not in styles:
+                    styles[style] = dict(zip(["font", "fill", "border", "alignment", "number_format"], style))
+                self._cells.append((cell.row, cell.column, cell.value, styles[style]))
+
+    def copyTo(self, sheet, styles):
+        for row, column, value, style in self._cells:
+            cell = sheet.cell(row=row, column=column)
+            if value is not None:
+                cell.value = value
+            styles.apply(cell, **style)
+
+        for key, dimension in self.sheet.column_dimensions.items():
+            sheet.column_dimensions[key].width = dimension.width
+        for key, dimension in self.sheet.row_dimensions.items():
+            if dimension.height is not None:
+                sheet.row_dimensions[key].height = dimension.height
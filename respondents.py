@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+from segments import SegmentIndex
+
+
+class RespondentTable:
+    """
+    The responses of one survey year joined once with the demographics of the answered workers.
+    Row i is the i-th response, so every org or segment is a bitmap over the same rows
+    and the response arrays are scored without looking the Worker IDs up again.
+    """
+
+    def __init__(self, responses, demographics, org_tree):
+        self.demographics = demographics
+        self.org_tree = org_tree
+        self.worker_ids = responses["ExternalReference"].to_numpy()
+
+        ## the row of each response in the demographics, -1 if there is none.
+        ## a worker listed twice keeps the first row, like in the org tree.
+        first = np.flatnonzero(~demographics["Worker ID"].duplicated(keep="first").to_numpy())
+        rows = pd.Index(demographics["Worker ID"].to_numpy()[first]).get_indexer(self.worker_ids)
+        self.rows = np.full(len(rows), -1, dtype=np.intp)
+        self.rows[rows >= 0] = first[rows[rows >= 0]]
+        self.answered = self.rows >= 0
+
+        ## the Euler-tour position of each response in the org tree.
+        self.positions = org_tree.locate(self.worker_ids)
+
+        self.segments = SegmentIndex(self)
+
+    def __len__(self):
+        return len(self.rows)
@@ -0,0 +1,208 @@
+import numpy as np
+from org_tree import is_span
+
+
+## the respondents multiplied at once by flags, well under the 2 ** 24 counts a float32 holds exactly.
+CHUNK = 65536
+
+
+class Counts:
+    """
+    The summed counts of a group of respondents of a ScoreCube.
+    respondents: the number of respondents of the group
+    """
+
+    def __init__(self, cube, respondents, sums):
+        self._cube = cube
+        self.respondents = respondents
+        self._sums = sums
+
+    def get(self, measure, columns):
+        ## the counts of a measure, e.g. "favorable", for each of the given item columns.
+        return self._sums[self._cube.getIndexes(measure, columns)]
+
+
+class ScoreCube:
+    """
+    The sufficient statistics of the responses of one survey year, built once per run.
+    The counts of each measure (favorable, valid, ... answers) of each item are summed per cell of
+    (the org tree node a respondent hangs under, i.e. its leaf manager, segment value), for each segment column on first use.
+    The org of a leader is a range of positions of the org tree, so its counts, and the counts of its segments,
+    are the sums of the cells of the nodes in that range instead of another scan of the respondents.
+    A supervisor whose org is not one range, see OrgTree.broken, is counted on its bitmap instead.
+    The cells are kept as prefix sums in depth-first order, so the sum of a range is the difference of two rows.
+    table: RespondentTable of the year
+    columns: the item columns of the measures
+    measures: {name: respondents x columns array of 0/1}
+    """
+
+    def __init__(self, table, columns, measures):
+        self._table = table
+        self._org_tree = table.org_tree
+        self.columns = list(columns)
+        self.measures = list(measures)
+
+        ## the span of the whole org tree, the org of the overall report.
+        self.full_span = (0, len(self._org_tree.positions))
+
+        self._index = {column: index for index, column in enumerate(self.columns)}
+        self._values = np.hstack([np.asarray(measures[name], dtype=np.int8) for name in self.measures])
+
+        ## only the answered responses are counted, like the bitmaps of SegmentIndex.
+        self._rows = np.flatnonzero(table.answered)
+        self._leaves = self._org_tree.leaves[table.positions[self._rows]]
+
+        self._cells = {}
+        self._totals = {}
+        self._flags = {}
+
+    def getIndexes(self, measure, columns):
+        offset = self.measures.index(measure) * len(self.columns)
+        return np.array([offset + self._index[column] for column in columns], dtype=np.int64)
+
+    def empty(self):
+        return Counts(self, 0, np.zeros(self._values.shape[1], dtype=np.int64))
+
+    def total(self, span):
+        ## the counts of all the respondents of an org, kept since the overall and parent orgs come back for many leaders.
+        if not is_span(span):
+            return self.org(span)
+        if span not in self._totals:
+            self._totals[span] = self.groups(None, span).get(None, self.empty())
+        return self._totals[span]
+
+    def org(self, key):
+        """
+        The Counts of an org, key is its org tree span or the flag column of a GM org or site.
+        """
+        if isinstance(key, str) or not is_span(key):
+            if key not in self._flags:
+                self.flags([key])
+            return self._flags[key]
+        return self.total(key)
+
+    def orgs(self):
+        """
+        Counts every node of the org tree at once, as the product of the org x respondent membership matrix
+        and the respondent x measure matrix. The org of a node is a range of positions, so its row of the membership
+        is a range of the cells sorted by leaf, and the product is the difference of the prefix sums at the ends of the ranges.
+        The counts only give the item scores of an org and the N/A categories of the trends. The category score is the mean
+        of the complete respondents summed in the order of the responses, and a float sum in the order of the org tree
+        differs in the last bits. So the current year columns of DemographicFileMaker, SSM and DFM.py, which report the
+        category, still score the bitmap of the org.
+        """
+        cells = self._getCells(None)
+        spans = self._org_tree.spans()
+        starts = np.array([span[0] for span in spans], dtype=np.int64)
+        stops = np.array([span[1] for span in spans], dtype=np.int64)
+
+        org_respondents, org_sums = self._getRanges(cells, starts, stops)
+        for span, count, row in zip(spans, org_respondents, org_sums):
+            self._totals[span] = Counts(self, int(count), row)
+
+    def flags(self, columns):
+        """
+        Counts the respondents flagged 1 in each of the given columns, e.g. the GM orgs and sites, at once
+        as the product of the flag x respondent 0/1 matrix and the respondent x measure matrix.
+        The columns missing from the demographics of the year are left out.
+        A column can also be the (column, value) key of a broken supervisor.
+        """
+        columns = [column for column in columns if column not in self._flags and self._getColumn(column) in self._table.demographics.columns]
+        if not columns:
+            return
+        membership = np.array([self._getMask(column)[self._rows] for column in columns], dtype=np.float32)
+
+        ## a float32 product is exact for the counts of a chunk, the chunks keep the copy of the values small.
+        sums = np.zeros((len(columns), self._values.shape[1]), dtype=np.int64)
+        for start in range(0, len(self._rows), CHUNK):
+            values = self._values[self._rows[start:start + CHUNK]].astype(np.float32)
+            sums += np.rint(membership[:, start:start + CHUNK] @ values).astype(np.int64)
+        for column, count, row in zip(columns, membership.sum(axis=1), sums):
+            self._flags[column] = Counts(self, int(count), row)
+
+    def groups(self, columns, span):
+        """
+        The Counts of each value of the columns present in the org of the given span,
+        in the same order as SegmentIndex.groups. columns None counts the org as one group.
+        """
+        if not is_span(span):
+            groups = self._table.segments.groups(columns, self._getMask(span))
+            return {key: self._getCounts(bitmap) for key, bitmap in groups.items() if bitmap.any()}
+
+        cells = self._getCells(columns)
+        values, keys, width = cells[3:]
+        start, stop = span
+
+        ## the cells of a value are sorted by leaf, the org of a node is the range [value * width + start, value * width + stop).
+        respondents, sums = self._getRanges(cells, values * width + start, values * width + stop)
+
+        _dict = {}
+        for value, count, row in zip(values, respondents, sums):
+            if count > 0:
+                _dict.update({keys[value]: Counts(self, int(count), row)})
+        return _dict
+
+    def directs(self, level, worker_id):
+        ## the counts of the org of each direct report of a supervisor with respondents, ascending.
+        _dict = {}
+        parent = self._org_tree.span(level, worker_id)
+        for child in self._org_tree.children(level, worker_id):
+            span = self._org_tree.span(level + 1, child)
+            if is_span(parent) and is_span(span):
+                counts = self.total(span)
+            else:
+                ## the org of a broken child may reach out of the org of its parent.
+                segments = self._table.segments
+                counts = self._getCounts(segments.org(level, worker_id) & segments.org(level + 1, child))
+            if counts.respondents:
+                _dict.update({child: counts})
+        return _dict
+
+    def _getColumn(self, key):
+        return key if isinstance(key, str) else key[0]
+
+    def _getMask(self, key):
+        ## the bitmap of a flag column, or of the (column, value) key of a broken supervisor.
+        if isinstance(key, str):
+            return self._table.segments.mask(key, 1)
+        return self._table.segments.mask(*key)
+
+    def _getCounts(self, bitmap):
+        return Counts(self, int(bitmap.sum()), self._values[bitmap].sum(axis=0, dtype=np.int64))
+
+    def _getRanges(self, cells, starts, stops):
+        ## the respondents and the counts of the cells with a key in each [start, stop).
+        cell_keys, respondents, sums = cells[:3]
+        lows = np.searchsorted(cell_keys, starts)
+        highs = np.searchsorted(cell_keys, stops)
+        return respondents[highs] - respondents[lows], sums[highs] - sums[lows]
+
+    def _getCells(self, columns):
+        key = columns if columns is None or isinstance(columns, str) else tuple(columns)
+        if key not in self._cells:
+            if columns is None:
+                codes, keys = np.zeros(len(self._table), dtype=np.int64), [None]
+            else:
+                codes, keys = self._table.segments.codes(columns)
+
+            codes = codes[self._rows]
+            present = codes >= 0
+            rows, leaves, codes = self._rows[present], self._leaves[present], codes[present]
+
+            ## one key per cell, sorted by value and then by leaf.
+            width = self.full_span[1] + 1
+            order = np.lexsort((leaves, codes))
+            row_keys = codes[order] * width + leaves[order]
+            starts = np.flatnonzero(np.r_[True, row_keys[1:] != row_keys[:-1]]) if len(row_keys) else np.zeros(0, dtype=np.int64)
+
+            respondents = np.diff(np.r_[starts, len(row_keys)])
+            if len(starts):
+                sums = np.add.reduceat(self._values[rows[order]], starts, axis=0, dtype=np.int64)
+            else:
+                sums = np.zeros((0, self._values.shape[1]), dtype=np.int64)
+
+            ## the prefix sums of the cells, row i sums the cells before i.
+            respondents = np.r_[0, np.cumsum(respondents)]
+            sums = np.vstack([np.zeros((1, sums.shape[1]), dtype=np.int64), np.cumsum(sums, axis=0)])
+            self._cells[key] = (row_keys[starts], respondents, sums, np.unique(codes), keys, width)
+        return self._cells[key]
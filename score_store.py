@@ -0,0 +1,106 @@
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from python_values import to_python
+
+
+## file of the store, next to the reports.
+STORE_FILE = "scores.sqlite"
+
+COLUMNS = ["leader", "gm", "site", "report", "section", "segment", "item", "level", "value", "n", "n_past"]
+
+
+class ScoreStore:
+    """
+    Every score computed for the reports of a run, kept in a SQLite file in the output folder,
+    so the numbers can be looked up after the batch without computing them again, e.g.
+    ScoreStore("./output/scores.sqlite").query(leader=112372, report="Score Details", section="Gender")
+    A row is one value of a report: the leader (and GM org or site of the job), the report, the section and segment
+    of the column, the item code (or the category name for level 0), the value (None for N/A) and the respondents n.
+    Each job replaces its own rows in one transaction, so the forked workers can write to the same file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores (leader INTEGER, gm TEXT, site TEXT, report TEXT, section TEXT, "
+                "segment TEXT, item TEXT, level INTEGER, value REAL, n INTEGER, n_past INTEGER)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS scores_leader ON scores (leader, report)")
+
+    def _connect(self):
+        ## a connection per call, the workers must not share one over the fork.
+        return sqlite3.connect(self.path, timeout=60)
+
+    def record(self, job, scores):
+        """
+        Replaces the rows of a job.
+        job: [leader ID], [leader ID, GM org] or [leader ID, False, site]
+        scores: {report: [(section, segment, item, level, value, n, n_past), ...]}
+        """
+        leader, gm, site = _get_job_key(job)
+        with self._connect() as connection:
+            connection.execute("DELETE FROM scores WHERE leader = ? AND gm IS ? AND site IS ?", (leader, gm, site))
+            for report, rows in scores.items():
+                connection.executemany(
+                    "INSERT INTO scores VALUES ({})".format(", ".join(["?"] * len(COLUMNS))),
+                    [(leader, gm, site, report) + tuple(row) for row in rows],
+                )
+
+    def query(self, leader=None, gm=None, site=None, report=None, section=None, segment=None, item=None):
+        """
+        The rows matching all the given values as a DataFrame, e.g. query(report="Score Summary", item="Q12").
+        """
+        conditions = []
+        values = []
+        for column, value in [("leader", leader), ("gm", gm), ("site", site), ("report", report),
+                              ("section", section), ("segment", segment), ("item", item)]:
+            if value is not None:
+                conditions.append("{} = ?".format(column))
+                values.append(to_python(value))
+
+        sql = "SELECT * FROM scores"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        with self._connect() as connection:
+            return pd.read_sql_query(sql, connection, params=values)
+
+
+def get_score_rows(precious_dict, counts, past_counts=None):
+    """
+    The score rows of the precious_dict of a maker, {section: {segment: {item: [value, level]}}}.
+    counts: {section + segment: respondents}, past_counts the same for the past year if any
+    The segments of less than 4 respondents are left out, like in the reports.
+    """
+    rows = []
+    for section, segments in precious_dict.items():
+        for segment, scores in segments.items():
+            n = counts.get(section + segment)
+            n_past = None if past_counts is None else past_counts.get(section + segment)
+            if section != "" and (_is_small(n) or (past_counts is not None and _is_small(n_past))):
+                continue
+            for item, (value, level) in scores.items():
+                rows.append((section, segment, item, level, _to_value(value), _to_value(n), _to_value(n_past)))
+    return rows
+
+
+def _is_small(n):
+    return n is None or (isinstance(n, (int, np.integer)) and n < 4)
+
+
+def _get_job_key(job):
+    leader = to_python(job[0])
+    gm = job[1] if len(job) > 1 and job[1] else None
+    site = job[2] if len(job) > 2 and job[2] else None
+    return leader, gm, site
+
+
+def _to_value(value):
+    ## "N/A" and the other texts are kept as NULL.
+    if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+        return to_python(value)
+    return None
@@ -0,0 +1,118 @@
+import numpy as np
+from survey_data import MISSING, UNFAVORABLE, NEUTRAL, FAVORABLE
+
+
+def get_scores(columns, values, nums, item, implicity=False, category=True, ndigits=None):
+    """
+    Calculates the favorable scores of a segment.
+    columns: the item names
+    values: respondents x items array of 0/1 values (MISSING if not counted)
+    nums: the number of respondents of the segment
+    item: the name of the category row
+    implicity: report the category as "N/A" anyway
+    category: calculate the category score from the complete respondents
+    ndigits: the number of digits to round the scores to, if any
+    Returns {name: [value, level]}, level 1 for the items and 0 for the category.
+    An empty segment scores "N/A" everywhere, and so does the category of a segment without items.
+    """
+    def _round(value):
+        return value if ndigits is None else round(value, ndigits)
+
+    if nums != len(values):
+        raise ValueError("nums is {} but the segment has {} respondents".format(nums, len(values)))
+    valid = values != MISSING
+
+    ## an item needs at least 4 valid answers, unanswered rows are not counted.
+    count_valid = valid.sum(axis=0)
+    sub = np.where(valid, values, 0).sum(axis=0)
+
+    _dict = {}
+    determine_parent_na = False
+    for ind in range(len(columns)):
+        if count_valid[ind] >= 4:
+            _dict.update({columns[ind]: [_round(int(sub[ind]) / int(count_valid[ind])), 1]})
+        else:
+            _dict.update({columns[ind]: ["N/A", 1]})
+            determine_parent_na = True
+
+    if not category:
+        if len(columns) > 0:
+            _dict.update({item: ["N/A", 0]})
+        return _dict
+
+    if determine_parent_na:
+        _dict.update({item: ["N/A", 0]})
+    else:
+        ## the category score is the mean over the respondents who answered every item.
+        complete = valid.all(axis=1)
+        total_lens = int(complete.sum())
+
+        ## cumulate in row order to keep the same floating point result as a running sum.
+        total = 0
+        if total_lens > 0 and len(columns) > 0:
+            means = values[complete].sum(axis=1) / len(columns)
+            total = float(np.cumsum(means)[-1])
+
+        ## a category without items has no score.
+        if total_lens < 4 or len(columns) == 0:
+            _dict.update({item: ["N/A", 0]})
+        else:
+            _dict.update({item: [_round(total / total_lens), 0]})
+
+    if implicity:
+        _dict.update({item: ["N/A", 0]})
+    return _dict
+
+
+def get_count_scores(columns, favorable, valid, item):
+    """
+    Same as get_scores(..., category=False), from the favorable and valid counts of each item of a segment,
+    e.g. the Counts of a ScoreCube.
+    """
+    _dict = {}
+    for ind in range(len(columns)):
+        if valid[ind] >= 4:
+            _dict.update({columns[ind]: [int(favorable[ind]) / int(valid[ind]), 1]})
+        else:
+            _dict.update({columns[ind]: ["N/A", 1]})
+
+    if len(columns) > 0:
+        _dict.update({item: ["N/A", 0]})
+    return _dict
+
+
+def get_state_scores(columns, states, item, codes=(FAVORABLE, NEUTRAL, UNFAVORABLE)):
+    """
+    Same as get_scores for each state of codes, from the respondents x items state matrix of a segment
+    (UNFAVORABLE, NEUTRAL, FAVORABLE or MISSING), e.g. the favorable, neutral and unfavorable columns of the score summary.
+    Returns one {name: [value, level]} per code.
+    """
+    valid = states != MISSING
+
+    ## the answers of every state of every item are counted at once.
+    keys = (np.arange(len(columns)) * 3 + states)[valid]
+    counts = np.bincount(keys, minlength=len(columns) * 3).reshape(len(columns), 3)
+    count_valid = counts.sum(axis=1)
+    determine_parent_na = bool((count_valid < 4).any())
+
+    if not determine_parent_na:
+        complete = valid.all(axis=1)
+        total_lens = int(complete.sum())
+
+    dicts = []
+    for code in codes:
+        _dict = {}
+        for ind in range(len(columns)):
+            if count_valid[ind] >= 4:
+                _dict.update({columns[ind]: [int(counts[ind, code]) / int(count_valid[ind]), 1]})
+            else:
+                _dict.update({columns[ind]: ["N/A", 1]})
+
+        if determine_parent_na or total_lens < 4 or len(columns) == 0:
+            _dict.update({item: ["N/A", 0]})
+        else:
+            ## cumulate in row order to keep the same floating point result as get_scores.
+            means = (states[complete] == code).sum(axis=1) / len(columns)
+            _dict.update({item: [float(np.cumsum(means)[-1]) / total_lens, 0]})
+        dicts.append(_dict)
+    return dicts
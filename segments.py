@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from org_tree import is_span
+
+
+class SegmentIndex:
+    """
+    Bitmaps of the demographic values over the rows of a RespondentTable, built once per year.
+    Rows without an answered worker are never set.
+    """
+
+    def __init__(self, table):
+        self._demographics = table.demographics
+        self._rows = table.rows
+        self._matched = table.answered
+        self._org_tree = table.org_tree
+        self._positions = table.positions
+
+        self._codes = {}
+        self._bitmaps = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def answered(self):
+        return self._matched.copy()
+
+    def empty(self):
+        return np.zeros(len(self._rows), dtype=bool)
+
+    def mask(self, column, value):
+        ## the responses whose column equals value, e.g. ("Supervisor Level 3 ID", leader ID) or (GM org, 1).
+        key = (column, value)
+        if key not in self._bitmaps:
+            values = self._demographics[column].to_numpy()
+            bitmap = np.zeros(len(self._rows), dtype=bool)
+            bitmap[self._matched] = values[self._rows[self._matched]] == value
+            self._bitmaps[key] = bitmap
+        return self._bitmaps[key]
+
+    def org(self, level, worker_id):
+        ## the responses under a supervisor, the same as mask("Supervisor Level {level} ID", worker_id).
+        key = ("org", level, worker_id)
+        if key not in self._bitmaps:
+            span = self._org_tree.span(level, worker_id)
+            if not is_span(span):
+                return self.mask(*span)
+            start, stop = span
+            self._bitmaps[key] = self._matched & (self._positions >= start) & (self._positions < stop)
+        return self._bitmaps[key]
+
+    def directs(self, level, worker_id, within):
+        ## the responses under each direct report of a supervisor present in within, ascending.
+        _dict = {}
+        for child in self._org_tree.children(level, worker_id):
+            bitmap = within & self.org(level + 1, child)
+            if bitmap.any():
+                _dict.update({child: bitmap})
+        return _dict
+
+    def groups(self, columns, within):
+        ## the bitmap of each value present in a segment, in the same order as groupby(columns).groups.
+        codes, keys = self._getCodes(columns)
+        present = np.unique(codes[within & (codes >= 0)])
+
+        _dict = {}
+        for code in present:
+            key = (self._getKey(columns), code)
+            if key not in self._bitmaps:
+                self._bitmaps[key] = codes == code
+            _dict.update({keys[code]: within & self._bitmaps[key]})
+        return _dict
+
+    def codes(self, columns):
+        ## the code of the value of each row, -1 if there is none, and the value of each code.
+        return self._getCodes(columns)
+
+    def _getKey(self, columns):
+        return columns if isinstance(columns, str) else tuple(columns)
+
+    def _getCodes(self, columns):
+        key = self._getKey(columns)
+        if key not in self._codes:
+            if isinstance(columns, str):
+                codes, uniques = pd.factorize(self._demographics[columns], sort=True)
+                keys = uniques.tolist()
+            else:
+                ## combine the sorted codes of each column, which keeps the lexicographic order of the keys.
+                codes = np.zeros(len(self._demographics), dtype=np.int64)
+                keys = [()]
+                for column in columns:
+                    _codes, uniques = pd.factorize(self._demographics[column], sort=True)
+                    codes = np.where((codes >= 0) & (_codes >= 0), codes * len(uniques) + _codes, -1)
+                    keys = [_key + (value,) for _key in keys for value in uniques.tolist()]
+
+            aligned = np.full(len(self._rows), -1, dtype=np.int64)
+            aligned[self._matched] = codes[self._rows[self._matched]]
+            self._codes[key] = (aligned, keys)
+        return self._codes[key]
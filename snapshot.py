@@ -0,0 +1,43 @@
+import hashlib
+import os
+import pandas as pd
+
+
+## folder of the snapshots, next to the input workbooks.
+SNAPSHOT_FOLDER = ".snapshot"
+
+
+def read_excel(path, engine="openpyxl", sheet_name=0):
+    """
+    Same as pd.read_excel, through a binary snapshot of the sheet.
+    The snapshot is keyed by the path, size and modification time of the workbook,
+    so it is parsed again only after the workbook changes.
+    """
+    folder = os.path.join(os.path.dirname(path), SNAPSHOT_FOLDER)
+    prefix = "{}-{}-".format(os.path.basename(path), sheet_name)
+    snapshot = os.path.join(folder, prefix + _get_key(path, sheet_name) + ".pkl")
+
+    try:
+        return pd.read_pickle(snapshot)
+    except:
+        pass
+
+    data = pd.read_excel(path, engine=engine, sheet_name=sheet_name)
+
+    ## drop the stale snapshots of the sheet and write the new one in place at once.
+    try:
+        os.makedirs(folder, exist_ok=True)
+        for name in os.listdir(folder):
+            if name.startswith(prefix):
+                os.remove(os.path.join(folder, name))
+        data.to_pickle(snapshot + ".tmp")
+        os.replace(snapshot + ".tmp", snapshot)
+    except:
+        pass
+    return data
+
+
+def _get_key(path, sheet_name):
+    stat = os.stat(path)
+    key = "|".join([os.path.abspath(path), str(sheet_name), str(stat.st_size), str(stat.st_mtime_ns), pd.__version__])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
@@ -0,0 +1,275 @@
+from copy import copy
+from io import BytesIO
+from xml.sax.saxutils import escape
+from zipfile import ZipFile, ZIP_DEFLATED, ZIP_STORED
+import openpyxl
+from openpyxl.cell import Cell, WriteOnlyCell
+from openpyxl.cell._writer import etree_write_cell
+from openpyxl.compat import safe_string
+from openpyxl.styles import Alignment, Border
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.styles.proxy import StyleProxy
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+from openpyxl.writer.excel import ExcelWriter
+from openpyxl.xml.functions import tostring
+
+
+## the same defaults as the style tables of a new workbook.
+DEFAULT_ALIGNMENT = Alignment()
+
+## the characters escaped in the attributes besides &, < and >.
+ATTRIBUTE_ENTITIES = {'"': "&quot;", "\n": "&#10;"}
+
+
+class StyleAttribute:
+    """
+    A style of a StreamingCell kept as the object itself, read through a StyleProxy like openpyxl
+    so cell.alignment.copy(...) and cell.border += ... keep working.
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = "_" + name
+
+    def __get__(self, cell, owner):
+        if cell is None:
+            return self
+        return StyleProxy(getattr(cell, self.name))
+
+    def __set__(self, cell, value):
+        if isinstance(value, StyleProxy):
+            value = copy(value)
+        setattr(cell, self.name, value)
+
+
+class StreamingCell(Cell):
+    """
+    A cell of a StreamingSheet. The style objects are only kept here and turned into
+    the style ids of the workbook once per combination when the sheet is written.
+    """
+
+    font = StyleAttribute()
+    fill = StyleAttribute()
+    border = StyleAttribute()
+    alignment = StyleAttribute()
+    ## a plain attribute in place of the number format descriptor of openpyxl.
+    number_format = None
+
+    def __init__(self, worksheet, row, column, merged=False):
+        super().__init__(worksheet, row=row, column=column)
+        self.merged = merged
+        self.font = DEFAULT_FONT
+        self.fill = DEFAULT_EMPTY_FILL
+        self.border = DEFAULT_BORDER
+        self.alignment = DEFAULT_ALIGNMENT
+        self.number_format = "General"
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        ## the same as openpyxl, only the top-left cell of a merged range has a value.
+        if self.merged:
+            raise AttributeError("'MergedCell' object attribute 'value' is read-only")
+        self._bind_value(value)
+
+    def getStyleKey(self):
+        return (id(self._font), id(self._fill), id(self._border), id(self._alignment), self.number_format)
+
+
+class StreamingSheet:
+    """
+    A worksheet of a StreamingWorkbook with the part of the openpyxl Worksheet used by the makers.
+    The cells are buffered and written as the text of the sheet data on save.
+    """
+
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+        self._cells = {}
+
+    def __getattr__(self, name):
+        ## column_dimensions, row_dimensions, add_image, add_chart, ... of the write-only worksheet.
+        return getattr(self._worksheet, name)
+
+    @property
+    def title(self):
+        return self._worksheet.title
+
+    @title.setter
+    def title(self, value):
+        self._worksheet.title = value
+
+    @property
+    def freeze_panes(self):
+        return self._worksheet.freeze_panes
+
+    @freeze_panes.setter
+    def freeze_panes(self, value):
+        self._worksheet.freeze_panes = value
+
+    def cell(self, row, column, value=None):
+        if (row, column) not in self._cells:
+            self._cells[row, column] = StreamingCell(self, row, column)
+        cell = self._cells[row, column]
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def __getitem__(self, coordinate):
+        column, row = coordinate_from_string(coordinate)
+        return self.cell(row, column_index_from_string(column))
+
+    def merge_cells(self, range_string=None, start_row=None, start_column=None, end_row=None, end_column=None):
+        merged = CellRange(range_string=range_string, min_col=start_column, min_row=start_row, max_col=end_column, max_row=end_row)
+        self._worksheet.merged_cells.add(merged)
+
+        ## the same borders as openpyxl: the top-left cell takes the bottom-right borders,
+        ## the rest become merged cells and the edges take the borders of the top-left cell.
+        start_cell = self.cell(merged.min_row, merged.min_col)
+        end_cell = self._cells.get((merged.max_row, merged.max_col))
+        if end_cell is not None:
+            start_cell.border += Border(right=end_cell.border.right, bottom=end_cell.border.bottom)
+
+        cells = merged.cells
+        next(cells)
+        for row, column in cells:
+            self._cells[row, column] = StreamingCell(self, row, column, merged=True)
+
+        for name in ['top', 'left', 'right', 'bottom']:
+            side = getattr(start_cell.border, name)
+            if side and side.style is None:
+                continue
+            border = Border(**{name: side})
+            for row, column in getattr(merged, name):
+                self._cells[row, column].border += border
+
+    def getSheetData(self, styles):
+        """
+        The <sheetData> of the sheet written as text, the rows with a cell or a row height in order.
+        """
+        rows = {}
+        for (row, column), cell in self._cells.items():
+            rows.setdefault(row, {})[column] = cell
+        dimensions = self._worksheet.row_dimensions
+        letters = {}
+
+        parts = ["<sheetData>"]
+        for row in sorted(set(rows) | set(dimensions)):
+            attributes = {"r": str(row)}
+            attributes.update(dimensions.get(row, {}))
+            parts.append("<row{}>".format("".join(' {}="{}"'.format(key, escape(value, ATTRIBUTE_ENTITIES)) for key, value in attributes.items())))
+            cells = rows.get(row, {})
+            for column in sorted(cells):
+                cell = cells[column]
+                key = (id(cell._font), id(cell._fill), id(cell._border), id(cell._alignment), cell.number_format)
+                style = styles.get(key) or self._addStyle(cell, key, styles)
+                if style[0] is None and cell._value is None:
+                    continue
+
+                if column not in letters:
+                    letters[column] = '<c r="' + get_column_letter(column)
+                if cell._value is None:
+                    ## most cells of the reports are only a background.
+                    parts.append(letters[column] + attributes["r"] + style[2])
+                else:
+                    parts.append(self._getCellXml(cell, letters[column][6:] + attributes["r"], style[1]))
+            parts.append("</row>")
+        parts.append("</sheetData>")
+
+        ## the row heights are in the text, openpyxl would write their rows again.
+        dimensions.clear()
+        return "".join(parts)
+
+    def _addStyle(self, cell, key, styles):
+        ## the style id of a combination is found once, the objects are kept so the ids stay unique.
+        scratch = WriteOnlyCell(self._worksheet)
+        scratch.font = cell._font
+        scratch.fill = cell._fill
+        scratch.border = cell._border
+        scratch.alignment = cell._alignment
+        scratch.number_format = cell.number_format
+        style_id = scratch.style_id if scratch.has_style else None
+        style = "" if style_id is None else ' s="{}"'.format(style_id)
+        styles[key] = (style_id, style, '"{} t="n" />'.format(style), [cell._font, cell._fill, cell._border, cell._alignment])
+        return styles[key]
+
+    def _getCellXml(self, cell, coordinate, style):
+        value = cell._value
+        if value == "":
+            return '<c r="{}"{} t="{}" />'.format(coordinate, style, "inlineStr" if cell.data_type == "s" else cell.data_type)
+        if cell.data_type in ("n", "b"):
+            return '<c r="{}"{} t="{}"><v>{}</v></c>'.format(coordinate, style, cell.data_type, safe_string(value))
+        if cell.data_type == "s" and isinstance(value, str):
+            space = ' xml:space="preserve"' if value.strip() and value != value.strip() else ""
+            return '<c r="{}"{} t="inlineStr"><is><t{}>{}</t></is></c>'.format(coordinate, style, space, escape(value))
+
+        ## formulas, dates and rich text are written by openpyxl itself.
+        write_only_cell = WriteOnlyCell(self._worksheet)
+        write_only_cell._value = value
+        write_only_cell.data_type = cell.data_type
+        write_only_cell.row = cell.row
+        write_only_cell.column = cell.column
+        fragment = _Fragment()
+        etree_write_cell(fragment, self._worksheet, write_only_cell)
+        return fragment.text.replace("<c ", "<c{} ".format(style), 1) if style else fragment.text
+
+
+class _Fragment:
+    ## the xmlfile of openpyxl's cell writer, keeping the element as text.
+
+    def write(self, element):
+        self.text = tostring(element).decode("utf-8")
+
+
+class StreamingWorkbook:
+    """
+    Drop-in for openpyxl.Workbook() in makeReport. openpyxl's write-only mode writes the workbook
+    without the cells, which are written as text in place of its empty sheet data.
+    Styles are only turned into ids once per combination, instead of on every assignment.
+    """
+
+    def __init__(self):
+        self._book = openpyxl.Workbook(write_only=True)
+        self._sheets = []
+        self.create_sheet("Sheet")
+
+    @property
+    def active(self):
+        return self._sheets[0]
+
+    @property
+    def worksheets(self):
+        return list(self._sheets)
+
+    def create_sheet(self, title=None):
+        sheet = StreamingSheet(self._book.create_sheet(title))
+        self._sheets.append(sheet)
+        return sheet
+
+    def save(self, filename):
+        ## openpyxl writes the workbook with empty sheets, their cells are then put in as text.
+        styles = {}
+        sheet_data = [sheet.getSheetData(styles) for sheet in self._sheets]
+        buffer = BytesIO()
+        ExcelWriter(self._book, ZipFile(buffer, "w", ZIP_STORED)).save()
+        sheet_data = {sheet._worksheet.path[1:]: data.encode("utf-8") for sheet, data in zip(self._sheets, sheet_data)}
+
+        ## each part is compressed once, when it is copied into the file.
+        with ZipFile(buffer) as source, ZipFile(filename, "w", ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                content = source.read(info)
+                if info.filename in sheet_data:
+                    content = _replaceSheetData(content, sheet_data[info.filename])
+                target.writestr(info.filename, content)
+
+
+def _replaceSheetData(content, sheet_data):
+    start = content.index(b"<sheetData")
+    end = content.index(b">", start) + 1
+    if content[end - 2:end] != b"/>":
+        end = content.index(b"</sheetData>", start) + len(b"</sheetData>")
+    return content[:start] + sheet_data + content[end:]
@@ -0,0 +1,263 @@
+import numpy as np
+import pandas as pd
+from respondents import RespondentTable
+from org_tree import OrgTree
+from item_catalog import ItemCatalog
+from score_cube import ScoreCube
+
+
+## value of a response which is not counted (blank, 6 = "don't know", -99 = skipped, ...).
+MISSING = -1
+
+## states of an answer in the response state matrix of the score summary, besides MISSING.
+UNFAVORABLE = 0
+NEUTRAL = 1
+FAVORABLE = 2
+
+
+def convert_responses(frame, fields):
+    """
+    Convert the 1-5 answer codes of the given columns in one pass.
+    Returns the favorable int8 matrix holding 0/1, or MISSING,
+    and the int8 state matrix holding UNFAVORABLE, NEUTRAL, FAVORABLE or MISSING.
+    """
+    values = frame[fields].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+    ## [1, 2, 3] -> 0, [4, 5] -> 1, [all others] -> MISSING
+    favorable = np.full(values.shape, MISSING, dtype=np.int8)
+    favorable[(values > 0) & (values < 4)] = 0
+    favorable[(values >= 4) & (values <= 5)] = 1
+
+    ## the score summary only counts the exact answer codes, [1, 2] -> UNFAVORABLE, [3] -> NEUTRAL, [4, 5] -> FAVORABLE.
+    states = np.full(values.shape, MISSING, dtype=np.int8)
+    states[np.isin(values, [1, 2])] = UNFAVORABLE
+    states[values == 3] = NEUTRAL
+    states[np.isin(values, [4, 5])] = FAVORABLE
+
+    return favorable, states
+
+
+class PreprocessedSurvey:
+    """
+    Leader-independent survey state, built once per run and shared read-only
+    by DemographicFileMaker, LTMaker and SSM.
+    """
+
+    def __init__(self, raw_data, raw_data_past, item_code, category, demographics, demographics_past):
+        self.origin_raw_data_pd = raw_data
+        self.origin_raw_data_past_pd = raw_data_past
+        self.item_code_pd = item_code
+        self.origin_category_pd = category
+        self.origin_demographics_pd = demographics
+        self.demographics_past_pd = demographics_past
+
+        self._response_states = None
+        self._respondents = None
+        self._past_respondents = None
+        self._org_tree = None
+        self._past_org_tree = None
+        self._score_cube = None
+        self._past_score_cube = None
+        self._aligned_items = {}
+
+        self._prepareItems()
+        self._prepareResponses()
+        self._prepareDemographics()
+
+    def _prepareItems(self):
+
+        ## make a item group and filter the able source.
+        self.item_pd = self.item_code_pd[self.item_code_pd["Type ID"] == "T01"]
+
+        self.benchmark_item_pd = self.item_pd[self.item_pd["External Benchmark"] == "e"]
+        self.item_pd = self.item_pd[self.item_pd["External Benchmark"] == "i"]
+
+        self.rest_item_pd = self.item_pd[~self.item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
+        self.item_pd = self.item_pd[self.item_pd["Unique Item Code"].isin(self.origin_raw_data_pd.columns.values)].reset_index(drop=True)
+        self.rest_item_pd = self.rest_item_pd[self.rest_item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
+        self.both_item_pd = self.item_pd[self.item_pd["Unique Item Code"].isin(self.origin_raw_data_past_pd.columns.values)].reset_index(drop=True)
+
+        self.category_pd = self.origin_category_pd[self.origin_category_pd["Item ID in 2020 Survey"].isin(self.item_pd["Item ID"].tolist())]
+        self.category_pd = self.category_pd.drop_duplicates(subset=["Item ID in 2020 Survey"]).reset_index(drop=True)
+        self.order_category = self.category_pd.drop_duplicates(subset=["2020 Category"]).loc[:, "2020 Category"].tolist()
+
+        self.group_dict = self.category_pd.groupby(["2020 Category"]).groups
+
+        ## A/B pairs are merged into the A item, keep the unmerged table for the SSM distribution.
+        self._unmerged_item_pd = self.item_pd
+
+    def _prepareResponses(self):
+
+        self.raw_data_pd = self.origin_raw_data_pd.iloc[2:].reset_index(drop=True)
+
+        ## filter the able source from history file.
+        self.raw_data_past_pd = self.origin_raw_data_past_pd.iloc[2:].reset_index(drop=True)
+
+        ## Convert numeric values into favorable or not, neutral or not and unfavorable or not.
+        fields = self.item_pd["Unique Item Code"].tolist()
+        favorable, self._states = convert_responses(self.raw_data_pd, fields)
+        self.raw_data_pd = self._replaceColumns(self.raw_data_pd, fields, favorable)
+
+        ## new feature -> process A/B pair.
+        pairs = self.item_pd[self.item_pd["AB Code"].isin(["A", "B"])].reset_index(drop=True)
+        pairs_dict = pairs.groupby(["Item ID"]).groups
+
+        self._pairs = []
+        for key in pairs_dict:
+
+            _list = pairs_dict[key]
+            pairs_row = pairs.iloc[_list, :]
+            item_list = pairs_row["Unique Item Code"].tolist()
+            text_list = pairs_row["Short Text [2020 onward]"].tolist()
+            new_text = "/".join(text_list)
+            self.item_pd = self.item_pd[~(self.item_pd["Unique Item Code"] == item_list[1])].reset_index(drop=True)
+            _index = self.item_pd[self.item_pd["Unique Item Code"] == item_list[0]].index
+            self.item_pd.loc[_index, "Short Text [2020 onward]"] = new_text
+
+            self.raw_data_pd = self._mergePair(self.raw_data_pd, item_list)
+            self._pairs.append(item_list)
+
+        ## the item codes are looked up from here on, the B items of the pairs keep their past codes.
+        self.item_catalog = ItemCatalog(self.item_pd, self._unmerged_item_pd, self.rest_item_pd,
+            self.both_item_pd, self.benchmark_item_pd, self.category_pd)
+
+        ## do the same process about history data, each past column is converted once.
+        past_fields = []
+        for field in fields:
+            past_field = self.item_catalog.getPastCode(field)
+            if past_field in self.raw_data_past_pd.columns and past_field not in past_fields:
+                past_fields.append(past_field)
+        favorable_past = convert_responses(self.raw_data_past_pd, past_fields)[0]
+        self.raw_data_past_pd = self._replaceColumns(self.raw_data_past_pd, past_fields, favorable_past)
+        self._past_fields = past_fields
+
+    def _replaceColumns(self, data, fields, matrix):
+        for index, field in enumerate(fields):
+            data[field] = matrix[:, index]
+        return data
+
+    def _mergePair(self, data, item_list):
+
+        ## keep the answered one of A/B pair in the A column.
+        first = data[item_list[0]].to_numpy()
+        second = data[item_list[1]].to_numpy()
+        data = data.drop(columns=[item_list[1]])
+        data[item_list[0]] = np.where(first != MISSING, first, second)
+        return data
+
+    def _prepareDistribution(self):
+
+        ## one state matrix for the score summary, the answered one of an A/B pair is kept in the A column.
+        fields = self._unmerged_item_pd["Unique Item Code"].tolist()
+        index = {field: position for position, field in enumerate(fields)}
+        states = self._states.copy()
+        for item_list in self._pairs:
+            first, second = index[item_list[0]], index[item_list[1]]
+            states[:, first] = np.where(states[:, first] != MISSING, states[:, first], states[:, second])
+
+        codes = self.item_pd["Unique Item Code"].tolist()
+        self._response_states = states[:, [index[code] for code in codes]]
+        self.state_columns = {code: position for position, code in enumerate(codes)}
+
+    @property
+    def response_states(self):
+        """
+        The responses x items int8 matrix of UNFAVORABLE, NEUTRAL, FAVORABLE or MISSING, in the rows of raw_data_pd,
+        the column of an item is state_columns[code].
+        """
+        if self._response_states is None:
+            self._prepareDistribution()
+        return self._response_states
+
+    def _prepareDemographics(self):
+
+        self.demographics_pd = self.origin_demographics_pd
+
+        ## convert the demographics data to include only answered entries.
+        self.invited_demographics_data = self.demographics_pd[self.demographics_pd["Invitee Flag"] == 1].reset_index(drop=True)
+        self.answered_demographics_data = self.invited_demographics_data[self.invited_demographics_data.loc[:, "Worker ID"].isin(self.raw_data_pd['ExternalReference'].tolist())].reset_index(drop=True)
+
+        ## do the same process about history data.
+        self.invited_demographics_past_data = self.demographics_past_pd[self.demographics_past_pd["Invitee Flag"] == 1].reset_index(drop=True)
+        self.answered_demographics_past_data = self.invited_demographics_past_data[self.invited_demographics_past_data.loc[:, "Worker ID"].isin(self.raw_data_past_pd['ExternalReference'].tolist())].reset_index(drop=True)
+
+    @property
+    def org_tree(self):
+        if self._org_tree is None:
+            self._org_tree = OrgTree(self.demographics_pd)
+        return self._org_tree
+
+    @property
+    def past_org_tree(self):
+        if self._past_org_tree is None:
+            self._past_org_tree = OrgTree(self.demographics_past_pd)
+        return self._past_org_tree
+
+    @property
+    def respondents(self):
+        if self._respondents is None:
+            self._respondents = RespondentTable(self.raw_data_pd, self.answered_demographics_data, self.org_tree)
+        return self._respondents
+
+    @property
+    def past_respondents(self):
+        if self._past_respondents is None:
+            self._past_respondents = RespondentTable(self.raw_data_past_pd, self.answered_demographics_past_data, self.past_org_tree)
+        return self._past_respondents
+
+    @property
+    def score_cube(self):
+        if self._score_cube is None:
+            fields = self.item_pd["Unique Item Code"].tolist()
+            values = self.raw_data_pd[fields].to_numpy()
+            self._score_cube = ScoreCube(self.respondents, fields, {
+                "favorable": values == 1,
+                "valid": values != MISSING,
+                "neutral": self.response_states[:, [self.state_columns[field] for field in fields]] == NEUTRAL,
+                "unfavorable": self.response_states[:, [self.state_columns[field] for field in fields]] == UNFAVORABLE,
+            })
+        return self._score_cube
+
+    @property
+    def past_score_cube(self):
+        if self._past_score_cube is None:
+            values = self.raw_data_past_pd[self._past_fields].to_numpy()
+            self._past_score_cube = ScoreCube(self.past_respondents, self._past_fields, {
+                "favorable": values == 1,
+                "valid": values != MISSING,
+            })
+        return self._past_score_cube
+
+    def getAlignedItems(self, codes):
+        """
+        The given current items asked in both years, with their current and past response matrices
+        whose columns are in the same item order, so a past score is next to its current one.
+        Built once per run for each list of items, e.g. the items of a category.
+        Returns the current codes, the current values, the past codes and the past values.
+        """
+        key = tuple(codes)
+        if key not in self._aligned_items:
+            columns = []
+            past_columns = []
+            for code in codes:
+                past_code = self.item_catalog.getPastCode(code)
+                if past_code is not None:
+                    columns.append(code)
+                    past_columns.append(past_code)
+            self._aligned_items[key] = (columns, self.raw_data_pd[columns].to_numpy(),
+                                        past_columns, self.raw_data_past_pd[past_columns].to_numpy())
+        return self._aligned_items[key]
+
+    def load(self, flags=()):
+        """
+        Builds the lazy parts now, e.g. before the batch workers are forked so they share them,
+        and counts every org of both years at once.
+        flags: the flag columns of the GM orgs and sites to count too
+        """
+        self.response_states, self.respondents, self.past_respondents
+        for cube in [self.score_cube, self.past_score_cube]:
+            cube.orgs()
+            cube.flags(flags)
+        for category in self.item_catalog.categories:
+            self.getAlignedItems([self.item_catalog.getCode(item_id) for item_id in self.item_catalog.getItemIds(category)])
+        return self
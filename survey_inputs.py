@@ -0,0 +1,60 @@
+from snapshot import read_excel
+from heatmap import HeatmapPalette
+
+
+class SurveyInputs:
+    """
+    The input workbooks of one run, shared read-only by DemographicFileMaker, LTMaker and SSM.
+    Each sheet is read on its first use only, so the sheets no maker needs are never loaded.
+    """
+
+    ## attribute: (setting of the workbook, sheet name)
+    SHEETS = {
+        "origin_raw_data_pd": ("raw_data", 0),
+        "origin_raw_data_past_pd": ("raw_data_past", 0),
+        "item_code_pd": ("item_code", "ItemCodeSTAR"),
+        "origin_category_pd": ("item_code", "CurrentCategorySTAR"),
+        "origin_demographics_pd": ("demographics", 0),
+        "demographics_past_pd": ("demographics_past", 0),
+        "heatmap_color_pd": ("heatmap_color", 0),
+        "benchmark_pd": ("benchmark", 0),
+        "leaders": ("leader", "Leader"),
+        "GMs": ("leader", "GM"),
+        "site_leads": ("leader", "Site Leader"),
+        "GM_levels": ("gm_levels", 0),
+    }
+
+    def __init__(self, **args):
+        self.input_source = args['input_folder']
+        self._args = args
+        self._sheets = {}
+        self._heatmap_palette = None
+        self._logo = None
+
+    def __getattr__(self, name):
+        if name not in self.SHEETS:
+            raise AttributeError(name)
+        return self.getSheet(*self.SHEETS[name])
+
+    @property
+    def heatmap_palette(self):
+        if self._heatmap_palette is None:
+            self._heatmap_palette = HeatmapPalette(self.heatmap_color_pd)
+        return self._heatmap_palette
+
+    @property
+    def logo(self):
+        ## the image of the reports, read once instead of for every workbook.
+        if self._logo is None:
+            with open(self.input_source + "/" + self._args['image'], "rb") as file:
+                self._logo = file.read()
+        return self._logo
+
+    def getSheet(self, setting, sheet_name=0):
+        key = (setting, sheet_name)
+        if key not in self._sheets:
+            self._sheets[key] = read_excel(self.input_source + "/" + self._args[setting], engine="openpyxl", sheet_name=sheet_name)
+        return self._sheets[key]
+
+    def how2use(self, sheet_name):
+        return self.getSheet("how to use", sheet_name)
@@ -0,0 +1,50 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from org_tree import OrgTree, SUPERVISOR_LEVEL
+
+
+def make_demographics(chains):
+    ## one row per worker, the chain of supervisors of each worker from level 1.
+    rows = []
+    for worker_id, chain in chains.items():
+        row = {"Worker ID": worker_id, "Invitee Flag": 1}
+        for level in range(1, 4):
+            row[SUPERVISOR_LEVEL.format(level)] = chain[level - 1] if level <= len(chain) else np.nan
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def assert_columns(tree, demographics):
+    ## the rows, invited and direct reports of every supervisor against its Supervisor Level N ID column.
+    for level in range(1, 4):
+        column = SUPERVISOR_LEVEL.format(level)
+        for worker_id in demographics[column].dropna().unique():
+            expected = np.flatnonzero((demographics[column] == worker_id).to_numpy())
+            assert sorted(tree.rows(level, worker_id)) == list(expected)
+            assert tree.invited(level, worker_id) == len(expected)
+            if level < 3:
+                directs = demographics.loc[expected, SUPERVISOR_LEVEL.format(level + 1)].dropna().unique()
+                assert tree.children(level, worker_id) == sorted(directs)
+
+
+def test_rows_match_the_supervisor_columns():
+    demographics = make_demographics({1: [1], 2: [1, 2], 3: [1, 3], 4: [1, 2, 4], 5: [1, 2, 4], 6: [1, 3]})
+    tree = OrgTree(demographics)
+    assert tree.broken == set()
+    assert_columns(tree, demographics)
+
+
+def test_supervisor_with_two_chains_falls_back_to_the_columns():
+    ## supervisor 4 is under 2 for worker 4 and under 3 for worker 5, so the orgs of 2 and 3 are not one range.
+    demographics = make_demographics({1: [1], 2: [1, 2], 3: [1, 3], 4: [1, 2, 4], 5: [1, 3, 4], 6: [1, 2]})
+    tree = OrgTree(demographics)
+    assert tree.broken == {(2, 2), (2, 3)}
+    assert tree.span(2, 3) == (SUPERVISOR_LEVEL.format(2), 3)
+    assert sorted(tree.rows(2, 3)) == [2, 4]
+    assert sorted(tree.rows(2, 2)) == [1, 3, 5]
+    assert_columns(tree, demographics)
@@ -0,0 +1,163 @@
+import importlib.util
+import os
+import sys
+from copy import copy
+import openpyxl
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+from make_survey import make_survey, INPUT_FILES
+from instrumentation import set_progress
+import report_styles
+from report_styles import is_tested_openpyxl
+from report_template import SheetTemplate
+from streaming import StreamingWorkbook
+
+
+def load_makers():
+    ## the makers live in a script whose name is not importable.
+    spec = importlib.util.spec_from_file_location("merged_makers", os.path.join(ROOT, "mergedD&L_FM.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def survey(tmp_path_factory):
+    folder = str(tmp_path_factory.mktemp("input"))
+    make_survey(folder, respondents=400, leaders=6, items=12, seed=3)
+    return folder
+
+
+def build_reports(makers, folder, output_folder, streaming):
+    ## the Score Details and Score Summary workbooks of the overall report and of the first leader with enough respondents.
+    set_progress(False)
+    init_data = {name: files[0] for name, files in INPUT_FILES.items()}
+    init_data.update({
+        'output_folder': output_folder,
+        'input_folder': folder,
+        'streaming': streaming,
+        'custom text': "\n* 2018 indicates 2018 Global Employee Survey results\nGilead column compares {}'s scores to Gilead Overall ({})\n",
+    })
+    inputs = makers.SurveyInputs(**init_data)
+    dfm = makers.DemographicFileMaker(inputs, **init_data)
+    ltm = makers.LTMaker(inputs, **init_data)
+    ssm = makers.SSM(inputs, **init_data)
+    for maker in [dfm, ltm, ssm]:
+        maker.readAllFiles()
+    survey = dfm.getSurvey()
+    ltm.setSurvey(survey)
+    ssm.setSurvey(survey)
+
+    files = []
+    for job in makers.leader_jobs(dfm.leaders):
+        dfm.setLeader(*job)
+        ltm.setLeader(*job)
+        ssm.setLeader(*job)
+        if dfm.calculateValues():
+            continue
+        dfm.makeReport()
+        ltm.setWorkBook(dfm.getWorkBook())
+        ltm.calculateValues()
+        ltm.makeReport()
+        files.append(ltm.writeOutput())
+        ssm.calculateValues()
+        ssm.makeReport()
+        files.append(ssm.writeOutput())
+        if len(files) == 4:
+            break
+    return files
+
+
+def get_cells(sheet, rows, columns):
+    ## the value and the style objects of each cell, without the proxies of openpyxl which do not compare.
+    styles = {}
+    for row in sheet.iter_rows(min_row=1, max_row=rows, min_col=1, max_col=columns):
+        for cell in row:
+            if cell.style_id not in styles:
+                styles[cell.style_id] = (copy(cell.font), copy(cell.fill), copy(cell.border), copy(cell.alignment), cell.number_format)
+            yield cell.coordinate, cell.value, styles[cell.style_id]
+
+
+def get_images(sheet):
+    return [(image.anchor._from.col, image.anchor._from.row, image.width, image.height, image._data()) for image in sheet._images]
+
+
+def assert_same_books(expected_path, path):
+    ## the values, styles, merges, freeze panes, sizes and images of every sheet.
+    expected_book = openpyxl.load_workbook(expected_path)
+    book = openpyxl.load_workbook(path)
+    assert book.sheetnames == expected_book.sheetnames
+
+    for expected, sheet in zip(expected_book.worksheets, book.worksheets):
+        assert sheet.freeze_panes == expected.freeze_panes
+        assert sorted(map(str, sheet.merged_cells.ranges)) == sorted(map(str, expected.merged_cells.ranges))
+        assert {key: dimension.width for key, dimension in sheet.column_dimensions.items()} == \
+            {key: dimension.width for key, dimension in expected.column_dimensions.items()}
+        assert {key: dimension.height for key, dimension in sheet.row_dimensions.items() if dimension.height is not None} == \
+            {key: dimension.height for key, dimension in expected.row_dimensions.items() if dimension.height is not None}
+        assert get_images(sheet) == get_images(expected)
+
+        rows = max(sheet.max_row, expected.max_row)
+        columns = max(sheet.max_column, expected.max_column)
+        for cell, expected_cell in zip(get_cells(sheet, rows, columns), get_cells(expected, rows, columns)):
+            assert cell == expected_cell, "{}!{}".format(sheet.title, cell[0])
+
+
+@pytest.fixture(scope="module")
+def expected(survey, tmp_path_factory):
+    ## the reports styled through the public cell attributes of openpyxl.
+    tested = report_styles.is_tested_openpyxl
+    report_styles.is_tested_openpyxl = lambda: False
+    try:
+        output_folder = str(tmp_path_factory.mktemp("public"))
+        return output_folder, build_reports(load_makers(), survey, output_folder, streaming=False)
+    finally:
+        report_styles.is_tested_openpyxl = tested
+
+
+def assert_same_reports(expected, output_folder, files):
+    assert len(files) == 4
+    assert [os.path.relpath(path, output_folder) for path in files] == [os.path.relpath(path, expected[0]) for path in expected[1]]
+    for expected_path, path in zip(expected[1], files):
+        assert_same_books(expected_path, path)
+
+
+@pytest.mark.skipif(not is_tested_openpyxl(), reason="the style registry sets the styles itself on this openpyxl")
+def test_indexed_styles_match_openpyxl(survey, expected, tmp_path):
+    files = build_reports(load_makers(), survey, str(tmp_path), streaming=False)
+    assert_same_reports(expected, str(tmp_path), files)
+
+
+@pytest.mark.skipif(not is_tested_openpyxl(), reason="the streaming backend is off on this openpyxl")
+def test_streaming_reports_match_openpyxl(survey, expected, tmp_path):
+    files = build_reports(load_makers(), survey, str(tmp_path), streaming=True)
+    assert_same_reports(expected, str(tmp_path), files)
+
+
+def render(sheet, styles):
+    ## a static sheet with values, shared and single styles, number formats and sizes.
+    for row in range(1, 30):
+        sheet.row_dimensions[row].height = 13
+        for column in range(1, 12):
+            styles.apply(sheet.cell(row=row, column=column), fill=styles.white_back, font=styles.summary_font)
+    for column in range(1, 12):
+        sheet.column_dimensions[openpyxl.utils.get_column_letter(column)].width = 6.5
+    styles.apply(sheet.cell(row=1, column=1, value="How to Use"), font=styles.how_font, alignment=styles.how_alignment)
+    styles.apply(sheet.cell(row=2, column=2, value=0.25), number_format=styles.percent_format, border=styles.thin_border)
+    styles.apply(sheet.cell(row=40, column=3, value=12), number_format=styles.plus_format)
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_template_matches_the_rendered_sheet(tmp_path, streaming):
+    book = openpyxl.Workbook()
+    render(book.active, report_styles.ReportStyles(book))
+    book.save(str(tmp_path / "rendered.xlsx"))
+
+    book = StreamingWorkbook() if streaming else openpyxl.Workbook()
+    SheetTemplate(render).copyTo(book.active, report_styles.ReportStyles(book))
+    book.save(str(tmp_path / "copied.xlsx"))
+    assert_same_books(str(tmp_path / "rendered.xlsx"), str(tmp_path / "copied.xlsx"))
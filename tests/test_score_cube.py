@@ -0,0 +1,184 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from org_tree import OrgTree, SUPERVISOR_LEVEL
+from respondents import RespondentTable
+from score_cube import ScoreCube
+
+
+LEVELS = 4
+GRADES = ["Grade 1-5", "Grade 6-9", "Grade 10-12", "Grade 13+"]
+FLAGS = ["Europe Org", "Asia Org"]
+
+
+def random_survey(rng, workers, responses, cols, stale=0):
+    ## a random org tree of workers 1..workers under worker 1, each chain holds the worker unless it is too deep.
+    chains = {1: [1]}
+    rows = []
+    for worker_id in range(1, workers + 1):
+        if worker_id > 1:
+            manager = chains[int(rng.integers(1, worker_id))]
+            chains[worker_id] = manager + [worker_id] if len(manager) < LEVELS else manager
+        row = {"Worker ID": worker_id, "Invitee Flag": int(rng.random() < 0.9)}
+        for level in range(1, LEVELS + 1):
+            chain = chains[worker_id]
+            row[SUPERVISOR_LEVEL.format(level)] = chain[level - 1] if level <= len(chain) else np.nan
+
+        ## the rare grade is missing from most orgs, and some segments are blank.
+        row["Pay Grade Group"] = rng.choice(GRADES, p=[0.45, 0.35, 0.17, 0.03])
+        row["Gender"] = rng.choice(["Female", "Male", np.nan], p=[0.45, 0.45, 0.1])
+        for flag in FLAGS:
+            row[flag] = int(rng.random() < 0.3)
+        rows.append(row)
+    demographics = pd.DataFrame(rows)
+
+    ## stale rows list a supervisor under another level 2 supervisor, so some orgs are not one range of the tree.
+    column = SUPERVISOR_LEVEL.format(2)
+    deep = np.flatnonzero(demographics[SUPERVISOR_LEVEL.format(3)].notna().to_numpy())
+    for index in rng.choice(deep, size=min(stale, len(deep)), replace=False):
+        others = [value for value in demographics[column].dropna().unique() if value != demographics.loc[index, column]]
+        if others:
+            demographics.loc[index, column] = rng.choice(others)
+
+    ## most workers answer, and a few responses come from workers missing from the demographics.
+    worker_ids = rng.choice(np.arange(1, workers + 1), size=responses, replace=False).tolist()
+    worker_ids += [10 ** 6 + index for index in range(3)]
+    rng.shuffle(worker_ids)
+
+    columns = ["Q{}".format(ind) for ind in range(cols)]
+    values = rng.integers(0, 2, size=(len(worker_ids), cols)).astype(np.int8)
+    valid = rng.random((len(worker_ids), cols)) < 0.9
+    table = RespondentTable(pd.DataFrame({"ExternalReference": worker_ids}), demographics, OrgTree(demographics))
+    measures = {"favorable": values & valid, "valid": valid}
+    return table, columns, measures
+
+
+def counted(cube, counts, measures, mask):
+    ## the Counts of a group against the measures summed over its bitmap.
+    assert counts.respondents == int(mask.sum())
+    for name, values in measures.items():
+        assert counts.get(name, cube.columns).tolist() == values[mask].sum(axis=0).tolist()
+
+
+SURVEYS = [
+    (seed, workers, responses, cols, stale)
+    for seed, (workers, responses, cols, stale) in enumerate([(1, 1, 2, 0), (8, 6, 3, 0), (40, 30, 4, 0), (200, 150, 6, 0), (40, 30, 4, 2), (200, 150, 6, 5)])
+]
+
+
+def nodes(table):
+    ## every (level, Worker ID) node of the org tree.
+    return [
+        (level, worker_id)
+        for level in range(1, LEVELS + 1)
+        for worker_id in table.demographics[SUPERVISOR_LEVEL.format(level)].dropna().unique()
+    ]
+
+
+def column_mask(table, level, worker_id):
+    ## the responses whose Supervisor Level N ID is worker_id, the org of a supervisor before the org tree.
+    return table.segments.mask(SUPERVISOR_LEVEL.format(level), worker_id)
+
+
+@pytest.mark.parametrize("seed, workers, responses, cols, stale", SURVEYS)
+def test_orgs_match_the_segment_index(seed, workers, responses, cols, stale):
+    table, columns, measures = random_survey(np.random.default_rng(seed), workers, responses, cols, stale)
+    cube = ScoreCube(table, columns, measures)
+    cube.orgs()
+
+    counted(cube, cube.total(cube.full_span), measures, table.segments.answered())
+    for level, worker_id in nodes(table):
+        counted(cube, cube.total(table.org_tree.span(level, worker_id)), measures, column_mask(table, level, worker_id))
+        counted(cube, cube.org(table.org_tree.span(level, worker_id)), measures, column_mask(table, level, worker_id))
+        assert table.segments.org(level, worker_id).tolist() == column_mask(table, level, worker_id).tolist()
+
+
+@pytest.mark.parametrize("seed, workers, responses, cols, stale", SURVEYS)
+@pytest.mark.parametrize("columns", ["Pay Grade Group", "Gender", ["Pay Grade Group", "Gender"]])
+def test_groups_match_the_segment_index(seed, workers, responses, cols, stale, columns):
+    table, items, measures = random_survey(np.random.default_rng(seed), workers, responses, cols, stale)
+    cube = ScoreCube(table, items, measures)
+
+    spans = [(cube.full_span, table.segments.answered())]
+    spans += [(table.org_tree.span(level, worker_id), column_mask(table, level, worker_id)) for level, worker_id in nodes(table)]
+    for span, mask in spans:
+        groups = cube.groups(columns, span)
+        expected = table.segments.groups(columns, mask)
+
+        ## the values missing from the org are left out, in the same order as the bitmaps.
+        assert list(groups) == list(expected)
+        for key in expected:
+            counted(cube, groups[key], measures, expected[key])
+
+
+@pytest.mark.parametrize("seed, workers, responses, cols, stale", SURVEYS)
+def test_directs_match_the_supervisor_columns(seed, workers, responses, cols, stale):
+    table, columns, measures = random_survey(np.random.default_rng(seed), workers, responses, cols, stale)
+    cube = ScoreCube(table, columns, measures)
+    cube.orgs()
+
+    for level, worker_id in nodes(table):
+        if level == LEVELS:
+            continue
+        mask = column_mask(table, level, worker_id)
+        expected = {}
+        for child in table.demographics.loc[table.org_tree.rows(level, worker_id), SUPERVISOR_LEVEL.format(level + 1)].dropna().unique():
+            bitmap = mask & column_mask(table, level + 1, child)
+            if bitmap.any():
+                expected[child] = bitmap
+        directs = cube.directs(level, worker_id)
+        assert sorted(directs) == sorted(expected)
+        for child in expected:
+            counted(cube, directs[child], measures, expected[child])
+
+
+def test_stale_rows_break_orgs():
+    table = random_survey(np.random.default_rng(4), 40, 30, 4, 2)[0]
+    assert table.org_tree.broken
+
+
+def test_value_missing_from_the_org():
+    table, columns, measures = random_survey(np.random.default_rng(11), 200, 150, 4)
+    cube = ScoreCube(table, columns, measures)
+
+    ## an org without the rare grade, which some other respondent has.
+    assert "Grade 13+" in cube.groups("Pay Grade Group", cube.full_span)
+    orgs = [node for node in nodes(table) if table.segments.org(*node).any()]
+    level, worker_id = next(
+        node for node in orgs
+        if "Grade 13+" not in table.segments.groups("Pay Grade Group", table.segments.org(*node))
+    )
+    groups = cube.groups("Pay Grade Group", table.org_tree.span(level, worker_id))
+    assert groups and "Grade 13+" not in groups
+
+
+@pytest.mark.parametrize("seed, workers, responses, cols, stale", SURVEYS)
+def test_empty_span(seed, workers, responses, cols, stale):
+    table, columns, measures = random_survey(np.random.default_rng(seed), workers, responses, cols, stale)
+    cube = ScoreCube(table, columns, measures)
+
+    ## an unknown supervisor has the empty span, like an org without respondents.
+    span = table.org_tree.span(2, 10 ** 7)
+    assert span == (0, 0)
+    assert cube.groups("Pay Grade Group", span) == {}
+    assert cube.total(span).respondents == 0
+    assert cube.total(span).get("favorable", columns).tolist() == [0] * cols
+    assert cube.directs(2, 10 ** 7) == {}
+
+
+@pytest.mark.parametrize("seed, workers, responses, cols, stale", SURVEYS)
+def test_flags_match_the_segment_index(seed, workers, responses, cols, stale):
+    table, columns, measures = random_survey(np.random.default_rng(seed), workers, responses, cols, stale)
+    cube = ScoreCube(table, columns, measures)
+
+    ## the columns missing from the demographics are left out.
+    cube.flags(FLAGS + ["Missing Org"])
+    for flag in FLAGS:
+        counted(cube, cube.org(flag), measures, table.segments.mask(flag, 1))
+    with pytest.raises(KeyError):
+        cube.org("Missing Org")
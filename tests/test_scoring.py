@@ -0,0 +1,180 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from survey_data import MISSING, UNFAVORABLE, NEUTRAL, FAVORABLE
+from scoring import get_scores, get_count_scores, get_state_scores
+
+
+def old_get_sum(data, nums, item, implicity=False, ndigits=None):
+
+    ## the per-item loop of the makers before scoring.get_scores, blank cells are ''.
+    def _round(value):
+        return value if ndigits is None else round(value, ndigits)
+
+    _dict = {}
+    determine_parent_na = False
+
+    for ind in range(len(data.columns)):
+        _ = data.iloc[:, ind]
+        is_empty_column = True
+        lens = nums
+        sub = 0
+        count_valid = 0
+        for __ in _:
+            if __ != '':
+                is_empty_column = False
+                sub += __
+                count_valid += 1
+            else:
+                lens -= 1
+        if is_empty_column:
+            _dict.update({data.columns.values[ind]: ["N/A", 1]})
+            determine_parent_na = True
+        else:
+            if count_valid >= 4:
+                _dict.update({data.columns.values[ind]: [_round(sub / lens), 1]})
+            else:
+                _dict.update({data.columns.values[ind]: ["N/A", 1]})
+                determine_parent_na = True
+
+    if determine_parent_na:
+        _dict.update({item: ["N/A", 0]})
+    else:
+        total_lens = nums
+        total = 0
+        cols = len(data.columns)
+        for ind in range(nums):
+            _series = data.iloc[ind, :]
+            sub_sum = 0
+            _is_nan = False
+            for val in _series:
+                if val != '':
+                    sub_sum += val
+                else:
+                    _is_nan = True
+                    total_lens -= 1
+                    break
+
+            if not _is_nan:
+                total += sub_sum / cols
+
+        if total_lens < 4:
+            _dict.update({item: ["N/A", 0]})
+        else:
+            _dict.update({item: [_round(total / total_lens), 0]})
+
+    if implicity:
+        _dict.update({item: ["N/A", 0]})
+    return _dict
+
+
+def old_get_item_sum(data, nums, item):
+
+    ## the items-only loop of LTMaker before scoring.get_scores.
+    _dict = {}
+    for ind in range(len(data.columns)):
+        _ = data.iloc[:, ind]
+        lens = nums
+        sub = 0
+        count_valid = 0
+        for __ in _:
+            if __ != '':
+                sub += __
+                count_valid += 1
+            else:
+                lens -= 1
+        if count_valid >= 4:
+            _dict.update({data.columns.values[ind]: [sub / lens, 1]})
+        else:
+            _dict.update({data.columns.values[ind]: ["N/A", 1]})
+
+    if len(data.columns) > 0:
+        _dict.update({item: ["N/A", 0]})
+    return _dict
+
+
+def to_frame(columns, values):
+    ## the responses as the makers read them before, MISSING cells are ''.
+    frame = pd.DataFrame(values.astype(object), columns=columns)
+    return frame.mask(values == MISSING, '')
+
+
+def random_segment(rng, rows, cols, missing):
+    columns = np.array(["Q{}".format(ind) for ind in range(cols)], dtype=object)
+    values = rng.integers(0, 2, size=(rows, cols)).astype(np.int8)
+    values[rng.random((rows, cols)) < missing] = MISSING
+    return columns, values
+
+
+def random_states(rng, rows, cols, missing):
+    columns = np.array(["Q{}".format(ind) for ind in range(cols)], dtype=object)
+    states = rng.choice([UNFAVORABLE, NEUTRAL, FAVORABLE], size=(rows, cols)).astype(np.int8)
+    states[rng.random((rows, cols)) < missing] = MISSING
+    return columns, states
+
+
+SEGMENTS = [
+    (rows, cols, missing, seed)
+    for seed, (rows, cols, missing) in enumerate(
+        [(0, 5, 0.0), (3, 4, 0.0), (12, 6, 1.0), (12, 6, 0.0), (40, 1, 0.3), (60, 8, 0.05), (25, 3, 0.5), (200, 12, 0.02)]
+    )
+]
+
+
+@pytest.mark.parametrize("rows, cols, missing, seed", SEGMENTS)
+@pytest.mark.parametrize("implicity", [False, True])
+@pytest.mark.parametrize("ndigits", [None, 2])
+def test_get_scores_matches_the_loop(rows, cols, missing, seed, implicity, ndigits):
+    columns, values = random_segment(np.random.default_rng(seed), rows, cols, missing)
+    expected = old_get_sum(to_frame(columns, values), rows, "Category", implicity, ndigits)
+    assert get_scores(columns, values, rows, "Category", implicity, ndigits=ndigits) == expected
+
+
+@pytest.mark.parametrize("rows, cols, missing, seed", SEGMENTS)
+def test_item_scores_match_the_loop(rows, cols, missing, seed):
+    columns, values = random_segment(np.random.default_rng(seed), rows, cols, missing)
+    expected = old_get_item_sum(to_frame(columns, values), rows, "Category")
+    assert get_scores(columns, values, rows, "Category", category=False) == expected
+
+    valid = values != MISSING
+    favorable = np.where(valid, values, 0).sum(axis=0)
+    assert get_count_scores(columns, favorable, valid.sum(axis=0), "Category") == expected
+
+
+@pytest.mark.parametrize("rows, cols, missing, seed", SEGMENTS)
+def test_state_scores_match_the_loop(rows, cols, missing, seed):
+    columns, states = random_states(np.random.default_rng(seed), rows, cols, missing)
+    dicts = get_state_scores(columns, states, "Category")
+    for code, scores in zip([FAVORABLE, NEUTRAL, UNFAVORABLE], dicts):
+        values = np.where(states == MISSING, MISSING, states == code).astype(np.int8)
+        assert scores == old_get_sum(to_frame(columns, values), rows, "Category")
+
+
+def test_empty_segment():
+    columns = np.array(["Q1", "Q2"], dtype=object)
+    values = np.empty((0, 2), dtype=np.int8)
+    expected = {"Q1": ["N/A", 1], "Q2": ["N/A", 1], "Category": ["N/A", 0]}
+    assert get_scores(columns, values, 0, "Category") == expected
+    assert get_scores(columns, values, 0, "Category", category=False) == expected
+    assert get_count_scores(columns, np.zeros(2), np.zeros(2), "Category") == expected
+    assert get_state_scores(columns, values, "Category") == [expected] * 3
+
+
+def test_category_without_items():
+    ## the loop divided by the 0 items of the category, the category is N/A instead.
+    columns = np.array([], dtype=object)
+    values = np.empty((10, 0), dtype=np.int8)
+    assert get_scores(columns, values, 10, "Category") == {"Category": ["N/A", 0]}
+    assert get_scores(columns, values, 10, "Category", category=False) == {}
+    assert get_state_scores(columns, values, "Category") == [{"Category": ["N/A", 0]}] * 3
+
+
+def test_nums_must_match_the_rows():
+    columns, values = random_segment(np.random.default_rng(0), 10, 3, 0.0)
+    with pytest.raises(ValueError):
+        get_scores(columns, values, 12, "Category")